@@ -9,11 +9,48 @@
 # Résultat attendu :
 # - Un fichier linkedin_score_v1.csv avec une colonne "score" (et éventuellement d'autres colonnes de debug)
 # - Un petit résumé dans le terminal (lignes gardées, top scores, etc.)
+#
+# Mode A/B (plusieurs configs, variantes de default.json) :
+#   python 04_scoring_v1.py config_a.json config_b.json ...
+# -> une seule lecture du CSV + une seule normalisation, et un fichier
+#    linkedin_score_ab.csv avec score_<config> / garde_<config> par config.
+#
+# Les correspondances mots-clés x lignes sont gardées d'un run à l'autre
+# (wdc_api/matrice_regles.py, dossier $WDC_MATCH_CACHE) : si seuls des points /
+# seuils changent dans la config, aucune regex n'est relancée.
+
+import sys
+from pathlib import Path
 
 import pandas as pd
 
-from wdc_api.configs.loader import charger_configuration
-from wdc_api.rules_engine import appliquer_regles_generiques
+from wdc_api.configs.loader import charger_configuration, charger_regles
+from wdc_api.matrice_regles import MatriceCorrespondances
+from wdc_api.rules_engine import appliquer_regles, evaluer_multi_configs
+
+
+def main_ab(chemins_config: list[str]) -> None:
+    """
+    Compare plusieurs configs sur la même base de contacts, en une passe.
+    """
+    # Noms de colonnes : nom du fichier sans extension (ex: score_default)
+    configs = {Path(c).stem: charger_regles(c) for c in chemins_config}
+    if len(configs) != len(chemins_config):
+        raise ValueError("Deux configs ont le même nom de fichier : renomme-les pour les distinguer.")
+
+    fichier_entree = "linkedin_propre_v1.csv"
+    df = pd.read_csv(fichier_entree, encoding="utf-8-sig")
+
+    resultats = evaluer_multi_configs(df, configs, matrice=MatriceCorrespondances.ouvrir(df))
+    df_ab = pd.concat([df, resultats], axis=1)
+
+    fichier_sortie = "linkedin_score_ab.csv"
+    df_ab.to_csv(fichier_sortie, index=False, encoding="utf-8-sig")
+
+    print("OK ✅ Fichier A/B créé :", fichier_sortie)
+    print("Lignes input :", len(df))
+    for nom in configs:
+        print(f"- {nom:<20} gardés : {int(resultats[f'garde_{nom}'].sum()):>6}   score moyen : {resultats[f'score_{nom}'].mean():.2f}")
 
 
 def main():
@@ -33,9 +70,14 @@ def main():
     df = pd.read_csv(fichier_entree, encoding="utf-8-sig")
 
     # 4) Appliquer le moteur de règles générique
-    #    -> df_score : dataframe final avec score / statuts
+    #    -> df_score : dataframe final (lignes gardées) avec score
     #    -> stats : dictionnaire d'infos utiles pour debug
-    df_score, stats = appliquer_regles_generiques(df, config)
+    df_score = appliquer_regles(df, config, matrice=MatriceCorrespondances.ouvrir(df))
+    stats = {
+        "gardes": len(df_score),
+        "seuil": config.get("scoring", {}).get("seuils", {}).get("prospect_min", "N/A"),
+        "top_scores": df_score["score"].nlargest(5).tolist(),
+    }
 
     # 5) Export CSV scoré
     fichier_sortie = "linkedin_score_v1.csv"
@@ -50,5 +92,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        main_ab(sys.argv[1:])
+    else:
+        main()
 
@@ -0,0 +1,66 @@
+# tests/conftest.py
+# =================
+# Données et configs partagées par les tests (lancés depuis la racine du dépôt :
+# python -m pytest -q).
+
+from __future__ import annotations
+
+import copy
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+RACINE = Path(__file__).resolve().parents[1]
+CHEMIN_CONFIG = RACINE / "wdc_api" / "configs" / "default.json"
+
+# Morceaux de titres : mots-clés de default.json (casse / accents variés), bruit, vides
+MORCEAUX_TITRES = [
+    "CEO", "Fondateur", "Gérant", "gerante", "Head of Sales", "Directrice RH", "Président",
+    "Stagiaire", "Alternant", "Assistant commercial", "Intern", "Co-Founder", "Managing Partner",
+    "Développeur", "Consultant", "Chef de projet", "Associée", "chez Boîte", "  ", "",
+]
+
+
+def titres_aleatoires(n: int, graine: int = 0) -> list[str]:
+    rng = random.Random(graine)
+    return [" ".join(rng.sample(MORCEAUX_TITRES, rng.randint(0, 3))) for _ in range(n)]
+
+
+@pytest.fixture
+def config_defaut() -> dict:
+    return json.loads(CHEMIN_CONFIG.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def config_variee(config_defaut) -> dict:
+    """default.json + règles qui couvrent tous les cas (exclusion tardive, seuil intermédiaire, inactive)."""
+    config = copy.deepcopy(config_defaut)
+    config["regles"] = [
+        {"id": "bonus_fondateur", "actif": True, "champ": "poste", "type": "contient_un_mot_cle",
+         "mots_cles": ["fondateur", "founder"], "action": "score", "points": 25},
+        {"id": "malus_consultant", "actif": True, "champ": "poste", "type": "contient_un_mot_cle",
+         "mots_cles": ["consultant"], "action": "score", "points": -15},
+        {"id": "seuil_1", "actif": True, "type": "seuil", "champ_score": "score", "min": 0, "action": "garder"},
+        *config_defaut["regles"],
+        {"id": "exclure_rh", "actif": True, "champ": "poste", "type": "contient_un_mot_cle",
+         "mots_cles": ["rh"], "action": "exclure"},
+        {"id": "inactive", "actif": False, "champ": "poste", "type": "contient_un_mot_cle",
+         "mots_cles": ["ceo"], "action": "score", "points": 1000},
+        {"id": "champ_absent", "actif": True, "champ": "inconnu", "type": "contient_un_mot_cle",
+         "mots_cles": ["x"], "action": "exclure"},
+    ]
+    return config
+
+
+@pytest.fixture
+def contacts() -> pd.DataFrame:
+    """Colonnes logiques (poste, nom, url), comme après rules_engine.preparer_colonnes."""
+    titres = titres_aleatoires(2000)
+    return pd.DataFrame({
+        "nom": [f"Contact {i}" for i in range(len(titres))],
+        "poste": titres,
+        "url": [f"https://www.linkedin.com/in/c{i}" for i in range(len(titres))],
+    })
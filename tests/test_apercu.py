@@ -0,0 +1,124 @@
+# tests/test_apercu.py
+# ====================
+# apercu doit compter les mêmes lignes gardées que rules_engine.evaluer_regles
+# (mode exact) ou un intervalle qui les contient (estimation sur l'échantillon) ;
+# le calcul de fond des colonnes : un seul worker, file bornée, colonnes dédoublonnées.
+
+from __future__ import annotations
+
+import copy
+import re
+import threading
+
+import pandas as pd
+import pytest
+
+from conftest import CHEMIN_CONFIG, titres_aleatoires
+from wdc_api import apercu as module_apercu
+from wdc_api.apercu import EnsembleTravail, _CalculFond, apercu
+from wdc_api.configs.loader import charger_configuration
+from wdc_api.rules_engine import evaluer_regles
+
+
+@pytest.fixture
+def ensemble(tmp_path, monkeypatch) -> EnsembleTravail:
+    # Matrice persistée dans tmp_path (.correspondances relatif), config servie = default.json
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(module_apercu, "CHEMIN_CONFIG", str(CHEMIN_CONFIG))
+    monkeypatch.setattr(module_apercu, "TAILLE_ECHANTILLON", 1500)
+    titres = titres_aleatoires(6000, graine=1)
+    chemin = tmp_path / "contacts.csv"
+    pd.DataFrame({
+        "Name": [f"Contact {i}" for i in range(len(titres))],
+        "Title": titres,
+        "URL": [f"https://www.linkedin.com/in/c{i}" for i in range(len(titres))],
+    }).to_csv(chemin, index=False)
+    champs_csv = charger_configuration(CHEMIN_CONFIG)["champs_csv"]
+    return EnsembleTravail(chemin, champs_csv, signature=(str(chemin), 0, 0))
+
+
+def _candidate(config_variee) -> dict:
+    return {"regles": copy.deepcopy(config_variee["regles"])}
+
+
+def test_exact_meme_nombre_que_evaluer_regles(ensemble, config_variee):
+    res = apercu(_candidate(config_variee), complet=True, ensemble=ensemble)
+    attendu = evaluer_regles(ensemble.df, config_variee)
+    assert res["mode"] == "exact"
+    assert res["gardes"] == int(attendu["garde"].sum())
+    assert res["gardes_intervalle"] == [res["gardes"], res["gardes"]]
+    assert sum(s["gardes"] for s in res["par_strate"]) == res["gardes"]
+    assert res["scores_gardes"]["max"] == int(attendu.loc[attendu["garde"], "score"].max())
+    for exemple in res["exemples"]:
+        assert exemple["score"] >= res["scores_gardes"]["quantiles"]["p90"]
+
+
+def test_estimation_contient_le_nombre_exact(ensemble, config_variee):
+    res = apercu(_candidate(config_variee), budget_ms=0, ensemble=ensemble)
+    assert res["mode"] == "estimation"
+    assert res["lignes_evaluees"] == len(ensemble.echantillon) < len(ensemble.df)
+    exact = int(evaluer_regles(ensemble.df, config_variee)["garde"].sum())
+    bas, haut = res["gardes_intervalle"]
+    assert bas <= exact <= haut
+
+
+def test_colonnes_calculees_en_fond_puis_apercu_exact(ensemble, config_variee):
+    candidate = _candidate(config_variee)
+    assert apercu(candidate, budget_ms=0, ensemble=ensemble)["mode"] == "estimation"
+    module_apercu._calcul_fond._file.join()
+
+    jeu = module_apercu.compiler_regles({**config_variee, **candidate})
+    assert ensemble.colonnes_manquantes(jeu) == 0
+    res = apercu(candidate, budget_ms=60_000, ensemble=ensemble)
+    assert res["mode"] == "exact"
+    assert res["gardes"] == int(evaluer_regles(ensemble.df, config_variee)["garde"].sum())
+
+
+class _EnsembleBloque:
+    """Faux ensemble : calculer_colonne attend `liberer` (colonnes calculées notées)."""
+
+    signature = ("faux", 0, 0)
+
+    def __init__(self):
+        self.demarre = threading.Event()
+        self.liberer = threading.Event()
+        self.calculees: list = []
+
+    def calculer_colonne(self, champ, rx) -> None:
+        self.demarre.set()
+        self.liberer.wait(10)
+        self.calculees.append(rx.pattern)
+
+
+def test_calcul_fond_file_bornee_et_dedoublonnee():
+    calcul = _CalculFond(taille=1)
+    ensemble = _EnsembleBloque()
+    a, b, c = (re.compile(m) for m in ("a", "b", "c"))
+
+    assert calcul.demander(ensemble, "poste", a)
+    assert ensemble.demarre.wait(10)           # le worker calcule "a"
+    assert not calcul.demander(ensemble, "poste", a)  # déjà demandée
+    assert calcul.demander(ensemble, "poste", b)      # file : 1 place
+    assert not calcul.demander(ensemble, "poste", c)  # file pleine : ignorée
+
+    ensemble.liberer.set()
+    calcul._file.join()
+    assert ensemble.calculees == ["a", "b"]
+    assert calcul.demander(ensemble, "poste", a)      # terminée : peut être redemandée
+    calcul._file.join()
+
+
+def test_erreur_de_calcul_ne_bloque_pas_le_worker(caplog):
+    class _EnsembleEnErreur(_EnsembleBloque):
+        def calculer_colonne(self, champ, rx) -> None:
+            if rx.pattern == "a":
+                raise RuntimeError("disque plein")
+            self.calculees.append(rx.pattern)
+
+    calcul = _CalculFond(taille=4)
+    ensemble = _EnsembleEnErreur()
+    assert calcul.demander(ensemble, "poste", re.compile("a"))
+    assert calcul.demander(ensemble, "poste", re.compile("b"))
+    calcul._file.join()
+    assert ensemble.calculees == ["b"]
+    assert "Calcul de fond de la colonne poste" in caplog.text
@@ -0,0 +1,151 @@
+# tests/test_enrichment.py
+# ========================
+# MoteurEnrichissement + FournisseurHTTP contre un serveur HTTP local (http.server) :
+# nouvel essai sur 429 (Retry-After) / 5xx, 404 = non trouvé (cache négatif),
+# statut a_enrichir -> enrichi, second passage servi par le cache sans aucune requête.
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from wdc_api import enrichment
+from wdc_api.enrichment import (
+    A_ENRICHIR, ENRICHI, ERREUR_ENRICHISSEMENT, NON_TROUVE, FournisseurHTTP, MoteurEnrichissement, enrichir_dataframe,
+)
+from wdc_api.enrichment_cache import HIT, CacheEnrichissement
+
+# Réponses du bouchon par slug
+ALICE = {"entreprise": "Acme", "email": "alice@acme.fr", "inconnue": "ignorée"}
+
+
+class _Bouchon(BaseHTTPRequestHandler):
+    """
+    GET /lookup?slug=... :
+    - alice   : 200 + ALICE
+    - limite  : 429 (Retry-After: 0) au premier appel, puis 200
+    - panne   : toujours 503
+    - autre   : 404
+    """
+
+    requetes: list = []
+
+    def do_GET(self):  # noqa: N802 - nom imposé par BaseHTTPRequestHandler
+        slug = parse_qs(urlparse(self.path).query).get("slug", [""])[0]
+        self.requetes.append(slug)
+        if slug == "limite" and self.requetes.count("limite") == 1:
+            self._repondre(429, {}, {"Retry-After": "0"})
+        elif slug in ("alice", "limite"):
+            self._repondre(200, ALICE)
+        elif slug == "panne":
+            self._repondre(503, {})
+        else:
+            self._repondre(404, {})
+
+    def _repondre(self, code: int, corps: dict, entetes: dict | None = None) -> None:
+        contenu = json.dumps(corps).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contenu)))
+        for cle, valeur in (entetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(contenu)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def bouchon():
+    """URL du fournisseur local + liste des slugs demandés."""
+    requetes: list = []
+    gestionnaire = type("Bouchon", (_Bouchon,), {"requetes": requetes})
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), gestionnaire)
+    thread = threading.Thread(target=serveur.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{serveur.server_address[1]}/lookup", requetes
+    finally:
+        serveur.shutdown()
+        serveur.server_close()
+
+
+@pytest.fixture(autouse=True)
+def backoff_rapide(monkeypatch):
+    monkeypatch.setattr(enrichment, "BACKOFF_BASE", 0.001)
+
+
+def _contacts(*slugs: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "linkedin_slug": list(slugs),
+        "linkedin_url": [f"https://www.linkedin.com/in/{s}" for s in slugs],
+        "nom_complet": [s.title() for s in slugs],
+        "entreprise": ["" for _ in slugs],
+        "email": ["" for _ in slugs],
+        "statut": [A_ENRICHIR for _ in slugs],
+    })
+
+
+def _moteur(url: str, cache: CacheEnrichissement | None = None) -> MoteurEnrichissement:
+    fournisseur = FournisseurHTTP(url, nom="bouchon", champs=("entreprise", "email"))
+    return MoteurEnrichissement([fournisseur], concurrence=4, nb_essais=3, timeout=5, cache=cache)
+
+
+def test_enrichi_et_statut(bouchon):
+    url, requetes = bouchon
+    df, stats = enrichir_dataframe(_contacts("alice"), _moteur(url))
+    ligne = df.iloc[0]
+    assert (ligne["entreprise"], ligne["email"], ligne["statut"]) == ("Acme", "alice@acme.fr", ENRICHI)
+    assert stats["enrichis"] == 1 and requetes == ["alice"]
+
+
+def test_429_retry_after_puis_succes(bouchon):
+    url, requetes = bouchon
+    df, stats = enrichir_dataframe(_contacts("limite"), _moteur(url))
+    assert df.iloc[0]["statut"] == ENRICHI
+    assert df.iloc[0]["entreprise"] == "Acme"
+    assert requetes == ["limite", "limite"]
+    assert stats["reessais"] == 1
+
+
+def test_5xx_essais_epuises(bouchon):
+    url, requetes = bouchon
+    df, stats = enrichir_dataframe(_contacts("panne"), _moteur(url))
+    assert df.iloc[0]["statut"] == ERREUR_ENRICHISSEMENT
+    assert df.iloc[0]["entreprise"] == ""
+    assert requetes == ["panne"] * 3
+    assert stats["erreurs"] == 1 and stats["reessais"] == 2
+
+
+def test_404_non_trouve_et_cache_negatif(bouchon, tmp_path):
+    url, requetes = bouchon
+    cache = CacheEnrichissement(tmp_path / "cache.db")
+    df, stats = enrichir_dataframe(_contacts("inconnu"), _moteur(url, cache))
+    assert df.iloc[0]["statut"] == NON_TROUVE
+    assert stats["non_trouves"] == 1 and requetes == ["inconnu"]
+    assert cache.lire(["inconnu"]) == {"inconnu": {"entreprise": ("", True), "email": ("", True)}}
+
+
+def test_second_passage_servi_par_le_cache(bouchon, tmp_path):
+    url, requetes = bouchon
+    chemin = tmp_path / "cache.db"
+    contacts = _contacts("alice", "limite", "inconnu", "panne")
+
+    premier, _ = enrichir_dataframe(contacts, _moteur(url, CacheEnrichissement(chemin)))
+    assert premier["statut"].tolist() == [ENRICHI, ENRICHI, NON_TROUVE, ERREUR_ENRICHISSEMENT]
+
+    # Nouveau passage sur les mêmes contacts "a_enrichir" (ex: fichier ré-exporté), cache relu
+    # sur disque. "panne" (en échec, jamais mis en cache) serait redemandé : hors du lot.
+    requetes.clear()
+    cache = CacheEnrichissement(chemin)
+    second, stats = enrichir_dataframe(contacts.iloc[:3], _moteur(url, cache))
+    assert requetes == []
+    assert second["statut"].tolist() == [ENRICHI, ENRICHI, NON_TROUVE]
+    assert second["entreprise"].tolist() == ["Acme", "Acme", ""]
+    assert stats["cache_hit"] == 3 and cache.stats[HIT] == 3
@@ -0,0 +1,91 @@
+# tests/test_filters_engine.py
+# ============================
+# Un ProgrammeFiltres doit garder les mêmes lignes avec le même score_filtres,
+# évalué en pandas (evaluer_filtres) ou exécuté dans SQLite (filtrer_sqlite).
+
+from __future__ import annotations
+
+import copy
+import random
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import titres_aleatoires
+from wdc_api.filters_engine import COLONNES_PROSPECTS, compiler_filtres, evaluer_filtres, filtrer_sqlite
+
+SECTEURS = ["Recrutement", "Intérim et travail temporaire", "Immobilier", "Informatique", "Digital", "", "  "]
+SEGMENTS = ["tech", "Tech", "commerce", "agence", "", None]
+
+
+@pytest.fixture
+def prospects() -> pd.DataFrame:
+    """Colonnes logiques (champs de COLONNES_PROSPECTS), valeurs vides / NULL comprises."""
+    rng = random.Random(3)
+    titres = titres_aleatoires(1500, graine=2)
+    return pd.DataFrame({
+        "nom": [f"Contact {i}" for i in range(len(titres))],
+        "poste": titres,
+        "secteur": [rng.choice(SECTEURS) for _ in titres],
+        "email": [rng.choice(["", None, "a@b.fr", " "]) for _ in titres],
+        "segment": [rng.choice(SEGMENTS) for _ in titres],
+        "score": [rng.choice([None, 0, 15, 30, 55, 90]) for _ in titres],
+    })
+
+
+@pytest.fixture
+def config_filtres(config_defaut) -> dict:
+    """default.json + custom filters (et / ou / non, egal, min / max, vide, champ sans colonne)."""
+    config = copy.deepcopy(config_defaut)
+    config["filtres"]["secteurs_inclus"]["actif"] = True
+    config["filtres"]["secteurs_inclus"]["mots_cles"] += ["recrutement"]
+    config["custom_filters"]["filters"] = [
+        {"id": "tech_ou_agence", "action": "score", "points": 15,
+         "condition": {"champ": "segment", "egal": ["tech", "agence"]}},
+        {"id": "score_moyen", "action": "score", "points": 5,
+         "condition": {"champ": "score", "min": 15, "max": 60}},
+        {"id": "sans_email", "action": "score", "points": -10,
+         "condition": {"champ": "email", "vide": True}},
+        {"id": "pas_intérim_ou_fondateur", "action": "exclure",
+         "condition": {"et": [{"champ": "secteur", "contient": ["intérim"]},
+                              {"non": {"champ": "poste", "contient": ["fondateur", "ceo"]}}]}},
+        {"id": "inconnu_vide", "action": "garder", "condition": {"champ": "inconnu", "vide": True}},
+        {"id": "inconnu_non_vide", "action": "score", "points": 100,
+         "condition": {"champ": "inconnu", "vide": False}},
+        {"id": "ou_vide", "action": "garder", "condition": {"ou": []}, "actif": False},
+    ]
+    config["scoring"]["seuils"]["prospect_min"] = 0
+    return config
+
+
+def _sqlite(df: pd.DataFrame) -> sqlite3.Connection:
+    con = sqlite3.connect(":memory:")
+    colonnes = [COLONNES_PROSPECTS[c] for c in df.columns]
+    con.execute(f"CREATE TABLE prospects (id INTEGER PRIMARY KEY, {', '.join(colonnes)})")
+    con.executemany(
+        f"INSERT INTO prospects (id, {', '.join(colonnes)}) VALUES (?, {', '.join('?' for _ in colonnes)})",
+        [(i, *(None if pd.isna(v) else v for v in ligne)) for i, ligne in enumerate(df.itertuples(index=False))],
+    )
+    con.row_factory = sqlite3.Row
+    return con
+
+
+@pytest.mark.parametrize("nom_config", ["config_defaut", "config_filtres"])
+def test_meme_resultat_pandas_et_sqlite(request, prospects, nom_config):
+    programme = compiler_filtres(request.getfixturevalue(nom_config))
+    attendu = evaluer_filtres(prospects, programme)
+    lignes = filtrer_sqlite(_sqlite(prospects), programme)
+
+    gardes = attendu.index[attendu["garde_filtres"]].tolist()
+    assert 0 < len(gardes) < len(prospects)
+    assert [r["id"] for r in lignes] == gardes
+    assert [r["score_filtres"] for r in lignes] == attendu.loc[gardes, "score_filtres"].tolist()
+
+
+def test_champ_sans_colonne_est_vide(prospects):
+    programme = compiler_filtres({"custom_filters": {"filters": [
+        {"id": "non_vide", "action": "garder", "condition": {"champ": "inconnu", "vide": False}},
+    ]}})
+    assert not evaluer_filtres(prospects, programme)["garde_filtres"].any()
+    assert filtrer_sqlite(_sqlite(prospects), programme) == []
@@ -0,0 +1,135 @@
+# tests/test_filtre_urls.py
+# =========================
+# Filtre de Bloom de POST /prospects/lookup : jamais de faux négatif, taux de faux
+# positifs proche de la cible ; un filtre périmé (nouveau snapshot, durée de vie
+# dépassée, écriture hors sync, reconstruction en échec) n'est jamais utilisé.
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from wdc_api import crud, filtre_urls, models, schemas
+from wdc_api.filtre_urls import FiltreBloom, FiltreUrls
+from wdc_api.metrics import RECONSTRUCTIONS_FILTRE_URLS
+from wdc_api.routers import prospects as routes_prospects
+from wdc_api.snapshot import POINTEUR
+
+URLS = [f"https://www.linkedin.com/in/contact-{i}" for i in range(20000)]
+
+
+def _attendre(filtre: FiltreUrls):
+    """Filtre courant une fois la reconstruction de fond terminée."""
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        with filtre._verrou:
+            if not filtre._en_cours:
+                break
+        time.sleep(0.01)
+    return filtre.courant()
+
+
+@pytest.fixture(autouse=True)
+def dossier_snapshots(tmp_path, monkeypatch):
+    # Dossier relatif par défaut ("snapshots") : celui de crud.create_prospect aussi
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(filtre_urls, "DOSSIER_SNAPSHOTS", Path("snapshots"))
+    (tmp_path / "snapshots").mkdir()
+    return tmp_path / "snapshots"
+
+
+def test_aucun_faux_negatif_et_taux_de_faux_positifs():
+    filtre = FiltreBloom(len(URLS), taux_faux_positifs=0.01)
+    for url in URLS:
+        filtre.ajouter(url)
+    assert all(url in filtre for url in URLS)
+    absentes = [f"https://www.linkedin.com/in/inconnu-{i}" for i in range(20000)]
+    taux = sum(url in filtre for url in absentes) / len(absentes)
+    assert taux < 0.02
+
+
+def test_filtre_construit_en_fond():
+    filtre = FiltreUrls(lambda: URLS[:100])
+    assert filtre.courant() is None  # pas encore construit : tout passe par la base
+    bloom = _attendre(filtre)
+    assert bloom is not None
+    assert all(url in bloom for url in URLS[:100])
+
+
+def test_nouveau_snapshot_filtre_perime(dossier_snapshots):
+    urls = list(URLS[:100])
+    filtre = FiltreUrls(lambda: list(urls))
+    filtre.courant()
+    assert _attendre(filtre) is not None
+
+    # La sync publie un snapshot avec de nouvelles URLs
+    urls.append("https://www.linkedin.com/in/nouveau")
+    (dossier_snapshots / POINTEUR).write_text("snapshot-2", encoding="utf-8")
+    assert filtre.courant() is None
+    bloom = _attendre(filtre)
+    assert "https://www.linkedin.com/in/nouveau" in bloom
+
+
+def test_duree_de_vie_depassee(monkeypatch):
+    filtre = FiltreUrls(lambda: URLS[:10])
+    filtre.courant()
+    assert _attendre(filtre) is not None
+    monkeypatch.setattr(filtre_urls, "DUREE_VIE", 0.0)
+    assert filtre.courant() is None
+
+
+def test_reconstruction_en_echec_comptee_et_relancee(caplog):
+    appels = []
+
+    def _lire_urls():
+        appels.append(1)
+        if len(appels) == 1:
+            raise ConnectionError("base indisponible")
+        return URLS[:10]
+
+    avant = RECONSTRUCTIONS_FILTRE_URLS._valeurs.get(("erreur",), 0.0)
+    filtre = FiltreUrls(_lire_urls)
+    filtre.courant()
+    assert _attendre(filtre) is None  # échec : pas de filtre ; le second appel relance
+    assert RECONSTRUCTIONS_FILTRE_URLS._valeurs.get(("erreur",), 0.0) == avant + 1
+    assert "Reconstruction du filtre de Bloom" in caplog.text
+    assert _attendre(filtre) is not None
+    assert len(appels) == 2
+
+
+def test_prospect_cree_sans_snapshot_trouve_par_lookup(tmp_path, monkeypatch, dossier_snapshots):
+    # SQLite, aucune sync : pas de pointeur de snapshot
+    engine = create_engine(f"sqlite:///{tmp_path / 'prospects.db'}")
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def _lire_urls():
+        with Session() as db:
+            return crud.lister_urls(db)
+
+    monkeypatch.setattr(routes_prospects, "_filtre_urls", FiltreUrls(_lire_urls))
+    alice = "https://www.linkedin.com/in/alice"
+    bob = "https://www.linkedin.com/in/bob"
+
+    def _lookup(url: str) -> dict:
+        with Session() as db:
+            return routes_prospects.lookup_prospects(schemas.LookupIn(urls=[url]), db)["resultats"][0]
+
+    with Session() as db:
+        crud.create_prospect(db, schemas.ProspectCreate(name="Alice", title="CEO", sector=None, url=alice))
+    routes_prospects._filtre_urls.courant()
+    assert _attendre(routes_prospects._filtre_urls) is not None
+    assert _lookup(alice)["existe"]
+    assert not (dossier_snapshots / POINTEUR).exists()
+
+    with Session() as db:
+        crud.create_prospect(db, schemas.ProspectCreate(name="Bob", title="CTO", sector=None, url=bob))
+    assert routes_prospects._filtre_urls.courant() is None  # filtre construit avant bob : périmé
+    assert _lookup(bob)["existe"]
+    bloom = _attendre(routes_prospects._filtre_urls)
+    assert bloom is not None and bob in bloom
+    assert _lookup(bob)["existe"]
@@ -0,0 +1,112 @@
+# tests/test_matrice_regles.py
+# ============================
+# MatriceCorrespondances.evaluer doit donner le même score / garde que
+# rules_engine.evaluer_regles, que les colonnes soient calculées, relues du disque
+# ou évincées puis recalculées.
+
+from __future__ import annotations
+
+import copy
+
+import pandas as pd
+import pytest
+
+from wdc_api import matrice_regles
+from wdc_api.matrice_regles import MatriceCorrespondances, cle_colonne
+from wdc_api.rules_engine import appliquer_regles, compiler_regles, evaluer_multi_configs, evaluer_regles
+
+
+def _comparer(attendu: pd.DataFrame, obtenu: pd.DataFrame) -> None:
+    assert obtenu["score"].tolist() == attendu["score"].tolist()
+    assert obtenu["garde"].tolist() == attendu["garde"].tolist()
+
+
+@pytest.mark.parametrize("nom_config", ["config_defaut", "config_variee"])
+def test_meme_resultat_que_evaluer_regles(request, tmp_path, contacts, nom_config):
+    config = request.getfixturevalue(nom_config)
+    matrice = MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path)
+    _comparer(evaluer_regles(contacts, config), matrice.evaluer(compiler_regles(config)))
+
+
+def test_score_initial_et_points_modifies(tmp_path, contacts, config_variee):
+    df = contacts.assign(score=[i % 7 for i in range(len(contacts))])
+    matrice = MatriceCorrespondances.ouvrir(df, dossier=tmp_path)
+    _comparer(evaluer_regles(df, config_variee), matrice.evaluer(compiler_regles(config_variee)))
+
+    # Seuls points / min changent : mêmes colonnes, même résultat que le moteur pandas
+    config = copy.deepcopy(config_variee)
+    for regle in config["regles"]:
+        if regle.get("action") == "score":
+            regle["points"] = regle.get("points", 0) * 2 - 3
+        if regle.get("type") == "seuil":
+            regle["min"] = regle.get("min", 0) + 10
+    _comparer(evaluer_regles(df, config), matrice.evaluer(compiler_regles(config)))
+
+
+def test_colonnes_relues_apres_reouverture(tmp_path, contacts, config_variee):
+    jeu = compiler_regles(config_variee)
+    MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path).evaluer(jeu)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    relue = MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path)
+    assert relue._bits
+    _comparer(evaluer_regles(contacts, config_variee), relue.evaluer(jeu))
+    assert not relue._nouvelles  # aucune colonne recalculée
+
+
+def test_donnees_modifiees_autre_matrice(tmp_path, contacts, config_defaut):
+    jeu = compiler_regles(config_defaut)
+    MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path).evaluer(jeu)
+    autres = contacts.assign(poste=contacts["poste"].iloc[::-1].to_numpy())
+    matrice = MatriceCorrespondances.ouvrir(autres, dossier=tmp_path)
+    assert not matrice._bits
+    _comparer(evaluer_regles(autres, config_defaut), matrice.evaluer(jeu))
+
+
+def test_eviction_des_colonnes_les_moins_utilisees(tmp_path, monkeypatch, contacts, config_defaut):
+    monkeypatch.setattr(matrice_regles, "MAX_COLONNES", 2)
+    matrice = MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path)
+
+    def _config(*mots):
+        config = copy.deepcopy(config_defaut)
+        config["regles"] = [
+            {"id": f"r_{mot}", "actif": True, "champ": "poste", "type": "contient_un_mot_cle",
+             "mots_cles": [mot], "action": "score", "points": 10}
+            for mot in mots
+        ]
+        return config
+
+    for mots in [("ceo",), ("fondateur",), ("stagiaire",), ("ceo", "gerant", "consultant")]:
+        config = _config(*mots)
+        _comparer(evaluer_regles(contacts, config), matrice.evaluer(compiler_regles(config)))
+        # Plafond respecté, sauf pour les colonnes du jeu en cours (jamais évincées)
+        assert len(matrice._bits) <= max(2, len(mots))
+
+    # Colonnes du dernier jeu gardées ; la plus ancienne ("fondateur") évincée
+    jeu = compiler_regles(_config("ceo", "gerant", "consultant"))
+    for regle in jeu.regles:
+        assert cle_colonne(regle.champ, regle.regex) in matrice._bits
+    fondateur = compiler_regles(_config("fondateur")).regles[0]
+    assert cle_colonne(fondateur.champ, fondateur.regex) not in matrice._bits
+
+    # Une colonne évincée est recalculée à l'identique
+    config = _config("fondateur")
+    _comparer(evaluer_regles(contacts, config), matrice.evaluer(compiler_regles(config)))
+
+
+def test_appliquer_regles_avec_matrice(tmp_path, contacts, config_variee):
+    matrice = MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path)
+    attendu = appliquer_regles(contacts, config_variee)
+    obtenu = appliquer_regles(contacts, config_variee, matrice=matrice)
+    assert obtenu.index.tolist() == attendu.index.tolist()
+    assert obtenu["score"].tolist() == attendu["score"].tolist()
+
+
+def test_multi_configs_avec_matrice(tmp_path, contacts, config_defaut, config_variee):
+    configs = {"a": config_defaut, "b": config_variee}
+    matrice = MatriceCorrespondances.ouvrir(contacts, dossier=tmp_path)
+    pd.testing.assert_frame_equal(
+        evaluer_multi_configs(contacts, configs, matrice=matrice),
+        evaluer_multi_configs(contacts, configs),
+        check_dtype=False,
+    )
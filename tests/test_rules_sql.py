@@ -0,0 +1,137 @@
+# tests/test_rules_sql.py
+# =======================
+# rules_sql.traduire_regles doit donner le même score / garde / raisons que
+# rules_engine.evaluer_regles.
+#
+# Sans PostgreSQL : la requête générée est exécutée dans SQLite, après une traduction
+# minimale du dialecte (~ -> REGEXP, tableaux text[] -> liste JSON, wdc_norm en Python).
+# Avec WDC_TEST_DATABASE_URL (PostgreSQL, extensions unaccent / pg_trgm autorisées) :
+# même comparaison sur la vraie base.
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from wdc_api.rules_engine import _norm_txt, compiler_regles, evaluer_regles
+from wdc_api.rules_sql import DDL_SCHEMA, requete_rescore, traduire_regles
+
+
+def _sqlite(requete) -> str:
+    """Requête PostgreSQL de traduire_regles -> SQLite (mêmes expressions booléennes)."""
+    sql = requete.sql
+    sql = sql.replace("public.wdc_norm(", "wdc_norm(").replace('::text)', ")")
+    sql = sql.replace(" ~ %s", " REGEXP ?")
+    sql = sql.replace("array_remove(ARRAY[", "wdc_raisons(").replace("]::text[], NULL)", ")")
+    sql = sql.replace("ARRAY[]::text[]", "wdc_raisons()")
+    assert "::" not in sql and "%s" not in sql
+    return sql
+
+
+def _executer_sqlite(df: pd.DataFrame, config) -> pd.DataFrame:
+    con = sqlite3.connect(":memory:")
+    con.execute("ATTACH DATABASE ':memory:' AS public")
+    con.create_function("wdc_norm", 1, _norm_txt, deterministic=True)
+    con.create_function("regexp", 2, lambda rx, texte: re.search(rx, texte or "") is not None, deterministic=True)
+    con.create_function("wdc_raisons", -1, lambda *r: json.dumps([x for x in r if x is not None]))
+    con.execute("CREATE TABLE public.prospects (id INTEGER PRIMARY KEY, name TEXT, title TEXT, url TEXT)")
+    con.executemany(
+        "INSERT INTO public.prospects (id, name, title, url) VALUES (?, ?, ?, ?)",
+        [(i, r.nom, r.poste, r.url) for i, r in enumerate(df.itertuples(index=False))],
+    )
+    requete = traduire_regles(config)
+    lignes = con.execute(_sqlite(requete), requete.params).fetchall()
+    res = pd.DataFrame(lignes, columns=["id", "score", "garde", "raisons"]).set_index("id").sort_index()
+    res["garde"] = res["garde"].astype(bool)
+    res["raisons"] = res["raisons"].map(json.loads)
+    return res
+
+
+def _comparer(attendu: pd.DataFrame, obtenu: pd.DataFrame) -> None:
+    assert obtenu["score"].tolist() == attendu["score"].tolist()
+    assert obtenu["garde"].tolist() == attendu["garde"].tolist()
+    assert obtenu["raisons"].tolist() == attendu["raisons"].tolist()
+
+
+def test_meme_resultat_que_pandas_config_defaut(contacts, config_defaut):
+    _comparer(evaluer_regles(contacts, config_defaut), _executer_sqlite(contacts, config_defaut))
+
+
+def test_meme_resultat_que_pandas_exclusions_et_seuils(contacts, config_variee):
+    _comparer(evaluer_regles(contacts, config_variee), _executer_sqlite(contacts, config_variee))
+
+
+def test_sans_regles_tout_est_garde(contacts, config_defaut):
+    config = {**config_defaut, "regles": []}
+    res = _executer_sqlite(contacts, config)
+    assert res["garde"].all() and (res["score"] == 0).all() and not any(res["raisons"])
+
+
+def test_parametres_sont_les_regex_du_moteur_pandas(config_variee):
+    jeu = compiler_regles(config_variee)
+    attendues = [
+        r.regex.pattern for r in jeu.regles
+        if r.actif and r.type == "contient_un_mot_cle" and r.champ == "poste" and r.regex is not None
+    ]
+    assert list(traduire_regles(jeu).params) == attendues
+
+
+def test_regle_inactive_ou_champ_sans_colonne_ignoree(config_variee):
+    sql = traduire_regles(config_variee).sql
+    assert "inactive" not in sql
+    assert "champ_absent" not in sql
+
+
+def test_identifiant_de_regle_echappe(config_defaut):
+    config = {**config_defaut, "regles": [
+        {"id": "l'apostrophe", "actif": True, "champ": "poste", "type": "contient_un_mot_cle",
+         "mots_cles": ["ceo"], "action": "exclure"},
+    ]}
+    assert "'l''apostrophe:exclu'" in traduire_regles(config).sql
+
+
+def test_rescore_ne_reecrit_que_les_lignes_modifiees(config_defaut):
+    requete = requete_rescore(config_defaut)
+    assert "IS DISTINCT FROM" in requete.sql
+    empreinte = compiler_regles(config_defaut).empreinte
+    assert requete.params[-2:] == (empreinte, empreinte)
+
+
+# -----------------------------
+# PostgreSQL (optionnel)
+# -----------------------------
+
+URL_POSTGRES = os.getenv("WDC_TEST_DATABASE_URL")
+
+
+@pytest.mark.skipif(not URL_POSTGRES, reason="WDC_TEST_DATABASE_URL non défini (PostgreSQL de test)")
+def test_meme_resultat_que_pandas_postgresql(contacts, config_variee):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    engine = sqlalchemy.create_engine(URL_POSTGRES)
+    requete = traduire_regles(config_variee)
+    # Tout dans une transaction annulée à la fin : la base de test n'est pas modifiée
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS public.prospects (id serial PRIMARY KEY, name text, title text, "
+                "sector text, url text UNIQUE, email text, phone text, address text, city text, country text)"
+            )
+            for ddl in DDL_SCHEMA:
+                conn.exec_driver_sql(ddl)
+            conn.exec_driver_sql("DELETE FROM public.prospects")
+            conn.exec_driver_sql(
+                "INSERT INTO public.prospects (id, name, title, url) VALUES (%s, %s, %s, %s)",
+                [(i, r.nom, r.poste, r.url) for i, r in enumerate(contacts.itertuples(index=False))],
+            )
+            lignes = conn.exec_driver_sql(requete.sql, requete.params).fetchall()
+        finally:
+            transaction.rollback()
+    obtenu = pd.DataFrame(lignes, columns=["id", "score", "garde", "raisons"]).set_index("id").sort_index()
+    obtenu["raisons"] = obtenu["raisons"].map(list)
+    _comparer(evaluer_regles(contacts, config_variee), obtenu)
@@ -0,0 +1,31 @@
+# tests/test_snapshot.py
+# ======================
+# Écritures hors sync : le snapshot de GET /prospects/ est retiré et l'écriture reste
+# visible (generation_ecritures) même quand aucun pointeur n'existait.
+
+from __future__ import annotations
+
+import sqlalchemy
+
+from wdc_api.snapshot import (
+    POINTEUR, generation_ecritures, invalider_snapshot, publier_snapshot, rafraichir_snapshot, snapshot_courant,
+)
+
+
+def test_invalider_sans_pointeur_change_la_generation(tmp_path):
+    avant = generation_ecritures()
+    invalider_snapshot(tmp_path)
+    assert not (tmp_path / POINTEUR).exists()
+    assert generation_ecritures() == avant + 1
+
+
+def test_rafraichir_hors_postgresql_retire_le_snapshot(tmp_path):
+    publier_snapshot(b'[{"id": 1}]', tmp_path)
+    assert snapshot_courant(tmp_path) is not None
+    avant = generation_ecritures()
+
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.connect() as conn:
+        assert rafraichir_snapshot(conn, tmp_path) is None
+    assert snapshot_courant(tmp_path) is None
+    assert generation_ecritures() == avant + 1
@@ -0,0 +1,353 @@
+# wdc_api/apercu.py
+# =================
+# Aperçu interactif d'une config de règles candidate (route POST /regles/apercu) :
+# combien de lignes gardées, distribution des scores, exemples, en moins d'une seconde.
+#
+# Ensemble de travail (EnsembleTravail), chargé une fois et gardé en mémoire par l'API :
+# - le fichier WDC_PREVIEW_DATA (par défaut linkedin_propre_v1.csv, l'entrée de
+#   04_scoring_v1.py), colonnes logiques préparées avec la config servie (WDC_CONFIG)
+# - strates = segment x décideur (classification.classer_contacts)
+# - un échantillon stratifié (TAILLE_ECHANTILLON lignes, allocation proportionnelle)
+# - deux matrices de correspondances (wdc_api/matrice_regles.py) : ensemble complet
+#   (persistée) et échantillon (en mémoire) ; textes normalisés une fois par colonne
+# Rechargé automatiquement si le fichier de données change (mtime / taille).
+#
+# Pour chaque aperçu, dans le budget de latence (budget_ms) :
+# - mots-clés déjà connus sur l'ensemble complet (on ne change que des points / seuils)
+#   ou coût estimé des nouvelles colonnes dans le budget -> résultat exact
+# - sinon -> estimation sur l'échantillon (intervalle de confiance à 95 %), et les
+#   nouvelles colonnes sont calculées en tâche de fond : l'aperçu suivant sera exact
+#   (un seul worker, file bornée à TAILLE_FILE colonnes, colonne déjà demandée ignorée ;
+#   colonnes persistées bornées par matrice_regles.MAX_COLONNES)
+# - complet=True -> évaluation exacte quel que soit le temps
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from wdc_api.classification import classer_contacts
+from wdc_api.configs.loader import charger_configuration, valider_configuration
+from wdc_api.csv_reader import lire_csv
+from wdc_api.matrice_regles import MatriceCorrespondances, cle_colonne
+from wdc_api.rules_engine import JeuDeRegles, compiler_regles, evaluer_regles, preparer_colonnes
+from wdc_api.scoring import CHEMIN_CONFIG
+
+# Données de l'ensemble de travail
+CHEMIN_DONNEES = os.getenv("WDC_PREVIEW_DATA", "linkedin_propre_v1.csv")
+
+# Lignes de l'échantillon stratifié
+TAILLE_ECHANTILLON = int(os.getenv("WDC_PREVIEW_SAMPLE", "20000"))
+
+# Budget de latence par défaut d'un aperçu (ms)
+BUDGET_MS = int(os.getenv("WDC_PREVIEW_BUDGET_MS", "800"))
+
+# Colonnes en attente de calcul de fond (au-delà : ignorées, un aperçu suivant les redemandera)
+TAILLE_FILE = int(os.getenv("WDC_PREVIEW_QUEUE", "16"))
+
+# Coût initial (avant première mesure) d'une colonne de mots-clés, en secondes par ligne
+COUT_LIGNE_DEFAUT = 2e-6
+
+# Nombre de classes de l'histogramme des scores
+NB_CLASSES = 10
+
+GRAINE = 42
+
+# Colonnes des exemples (colonnes logiques de champs_csv)
+COLONNES_EXEMPLES = ("nom", "poste", "url")
+
+logger = logging.getLogger("wdc_api.apercu")
+
+
+class EnsembleTravail:
+    """Données pré-normalisées + échantillon stratifié + matrices de correspondances."""
+
+    def __init__(self, chemin: str | Path, champs_csv: Dict[str, Any], signature: tuple):
+        self.chemin = Path(chemin)
+        self.signature = signature
+        self.champs_csv = dict(champs_csv)
+
+        brut = lire_csv(self.chemin, keep_default_na=False)
+        brut.columns = [str(c).strip() for c in brut.columns]
+        self.df = preparer_colonnes(brut, self.champs_csv).reset_index(drop=True)
+
+        classes = classer_contacts(brut.reset_index(drop=True))
+        self.strates = (
+            classes["segment"].astype(str)
+            + "/"
+            + np.where(classes["decision_maker"].to_numpy(dtype=bool), "decideur", "autre")
+        ).to_numpy()
+
+        # Échantillon stratifié, allocation proportionnelle (au moins 1 ligne par strate)
+        rng = np.random.default_rng(GRAINE)
+        n = len(self.df)
+        taux = min(1.0, TAILLE_ECHANTILLON / n) if n else 1.0
+        positions: List[np.ndarray] = []
+        self.poids_strates: Dict[str, tuple[int, int]] = {}  # strate -> (N_h, n_h)
+        for strate in np.unique(self.strates):
+            lignes = np.flatnonzero(self.strates == strate)
+            n_h = min(len(lignes), max(1, round(len(lignes) * taux)))
+            positions.append(np.sort(rng.choice(lignes, size=n_h, replace=False)))
+            self.poids_strates[str(strate)] = (len(lignes), n_h)
+        self.positions_echantillon = np.sort(np.concatenate(positions)) if positions else np.zeros(0, np.int64)
+        self.echantillon = self.df.iloc[self.positions_echantillon].reset_index(drop=True)
+        self.strates_echantillon = self.strates[self.positions_echantillon]
+
+        self.complet = MatriceCorrespondances.ouvrir(self.df)
+        self.matrice_echantillon = MatriceCorrespondances(self.echantillon, dossier=None)
+        self.cout_ligne = COUT_LIGNE_DEFAUT
+        # Un seul calcul à la fois sur chaque matrice (requêtes concurrentes + tâche de fond)
+        self.verrou_complet = threading.Lock()
+        self.verrou_echantillon = threading.Lock()
+
+    def _colonnes_manquantes(self, jeu: JeuDeRegles) -> Dict[str, tuple]:
+        """cle_colonne -> (champ, regex) des colonnes du jeu absentes de l'ensemble complet."""
+        manquantes: Dict[str, tuple] = {}
+        for r in jeu.regles:
+            if r.actif and r.type == "contient_un_mot_cle" and r.regex is not None and r.champ in self.df.columns:
+                cle = cle_colonne(r.champ, r.regex)
+                if cle not in self.complet._bits:
+                    manquantes[cle] = (r.champ, r.regex)
+        return manquantes
+
+    def colonnes_manquantes(self, jeu: JeuDeRegles) -> int:
+        """Colonnes de mots-clés du jeu pas encore calculées sur l'ensemble complet."""
+        return len(self._colonnes_manquantes(jeu))
+
+    def evaluer_complet(self, jeu: JeuDeRegles) -> pd.DataFrame:
+        with self.verrou_complet:
+            manquantes = self.colonnes_manquantes(jeu)
+            t = time.perf_counter()
+            res = self.complet.evaluer(jeu)
+            if manquantes and len(self.df):
+                self.cout_ligne = (time.perf_counter() - t) / (manquantes * len(self.df))
+            return res
+
+    def calculer_colonne(self, champ: str, rx) -> None:
+        """Calcule et persiste une colonne de l'ensemble complet (worker de fond)."""
+        with self.verrou_complet:
+            if cle_colonne(champ, rx) in self.complet._bits:
+                return
+            t = time.perf_counter()
+            self.complet.masque(champ, rx)
+            if len(self.df):
+                self.cout_ligne = (time.perf_counter() - t) / len(self.df)
+            self.complet.enregistrer()
+
+    def completer_en_fond(self, jeu: JeuDeRegles) -> None:
+        """Demande le calcul de fond des colonnes manquantes (l'aperçu suivant sera exact)."""
+        for champ, rx in self._colonnes_manquantes(jeu).values():
+            _calcul_fond.demander(self, champ, rx)
+
+
+class _CalculFond:
+    """Un seul worker pour les colonnes de fond : file bornée, colonnes déjà en attente ignorées."""
+
+    def __init__(self, taille: int = TAILLE_FILE):
+        self._file: "queue.Queue[tuple]" = queue.Queue(maxsize=max(1, taille))
+        self._en_attente: Set[Tuple[tuple, str]] = set()
+        self._verrou = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def demander(self, ensemble: EnsembleTravail, champ: str, rx) -> bool:
+        """Met la colonne en file ; False si déjà demandée ou file pleine."""
+        cle = (ensemble.signature, cle_colonne(champ, rx))
+        with self._verrou:
+            if cle in self._en_attente:
+                return False
+            try:
+                self._file.put_nowait((ensemble, champ, rx, cle))
+            except queue.Full:
+                return False
+            self._en_attente.add(cle)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._boucle, daemon=True, name="apercu-colonnes")
+                self._thread.start()
+        return True
+
+    def _boucle(self) -> None:
+        while True:
+            ensemble, champ, rx, cle = self._file.get()
+            try:
+                ensemble.calculer_colonne(champ, rx)
+            except Exception:  # un aperçu ne doit jamais faire tomber l'API
+                logger.exception("Calcul de fond de la colonne %s (%s) impossible", champ, rx.pattern[:200])
+            finally:
+                with self._verrou:
+                    self._en_attente.discard(cle)
+                self._file.task_done()
+
+
+_calcul_fond = _CalculFond()
+
+
+_ensemble: Optional[EnsembleTravail] = None
+_verrou_chargement = threading.Lock()
+
+
+def ensemble_courant(chemin: str | Path = CHEMIN_DONNEES) -> EnsembleTravail:
+    """Ensemble de travail en mémoire (chargé au premier appel, rechargé si le fichier change)."""
+    global _ensemble
+    try:
+        st = Path(chemin).stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Données d'aperçu introuvables : {chemin} (WDC_PREVIEW_DATA)")
+    signature = (str(Path(chemin).resolve()), st.st_mtime_ns, st.st_size)
+
+    ensemble = _ensemble
+    if ensemble is not None and ensemble.signature == signature:
+        return ensemble
+    with _verrou_chargement:
+        if _ensemble is None or _ensemble.signature != signature:
+            champs_csv = charger_configuration(CHEMIN_CONFIG).get("champs_csv") or {}
+            _ensemble = EnsembleTravail(chemin, champs_csv, signature)
+        return _ensemble
+
+
+def prechauffer() -> None:
+    """Charge l'ensemble de travail en tâche de fond (démarrage de l'API), s'il existe."""
+    def _charger() -> None:
+        try:
+            ensemble_courant()
+        except (FileNotFoundError, ValueError):
+            pass  # pas de données d'aperçu : la route répondra 503
+        except Exception:
+            logger.exception("Chargement de l'ensemble de travail de l'aperçu impossible")
+    threading.Thread(target=_charger, daemon=True, name="apercu-chargement").start()
+
+
+# -----------------------------
+# Statistiques
+# -----------------------------
+
+def _distribution(scores: np.ndarray, poids: np.ndarray) -> Dict[str, Any]:
+    """Distribution (pondérée) des scores : min, max, moyenne, quantiles, histogramme."""
+    if not len(scores):
+        return {"min": None, "max": None, "moyenne": None, "quantiles": {}, "histogramme": []}
+    ordre = np.argsort(scores, kind="stable")
+    s, w = scores[ordre], poids[ordre]
+    cumul = np.cumsum(w) / w.sum()
+    quantiles = {f"p{q}": int(s[min(len(s) - 1, np.searchsorted(cumul, q / 100))]) for q in (10, 25, 50, 75, 90)}
+    bornes = np.linspace(s[0], s[-1], NB_CLASSES + 1) if s[-1] > s[0] else np.array([s[0], s[0] + 1])
+    effectifs, _ = np.histogram(s, bins=bornes, weights=w)
+    return {
+        "min": int(s[0]),
+        "max": int(s[-1]),
+        "moyenne": float(np.average(s, weights=w)),
+        "quantiles": quantiles,
+        "histogramme": [
+            {"de": float(bornes[i]), "a": float(bornes[i + 1]), "lignes": int(round(effectifs[i]))}
+            for i in range(len(effectifs))
+        ],
+    }
+
+
+def _exemples(df: pd.DataFrame, res: pd.DataFrame, jeu: JeuDeRegles, nb: int) -> List[Dict[str, Any]]:
+    """Les nb lignes gardées de meilleur score, avec les règles déclenchées."""
+    if nb <= 0:
+        return []
+    gardes = np.flatnonzero(res["garde"].to_numpy())
+    if not len(gardes):
+        return []
+    scores = res["score"].to_numpy()[gardes]
+    choix = gardes[np.argsort(-scores, kind="stable")[:nb]]
+    lignes = df.iloc[choix]
+    exemples = pd.DataFrame(
+        {c: lignes[c].astype(str) if c in lignes.columns else "" for c in COLONNES_EXEMPLES}
+    )
+    exemples["score"] = res["score"].to_numpy()[choix].astype(int)
+    exemples["raisons"] = evaluer_regles(lignes, jeu)["raisons"].tolist()
+    return exemples.to_dict(orient="records")
+
+
+# -----------------------------
+# Aperçu
+# -----------------------------
+
+def apercu(
+    candidate: Dict[str, Any],
+    budget_ms: int = BUDGET_MS,
+    complet: bool = False,
+    nb_exemples: int = 10,
+    ensemble: Optional[EnsembleTravail] = None,
+) -> Dict[str, Any]:
+    """
+    Aperçu d'une config candidate (complétée par la config servie pour les clés absentes :
+    un éditeur peut n'envoyer que "regles").
+
+    Erreurs : ValueError (config invalide), FileNotFoundError (pas de données d'aperçu).
+    """
+    t0 = time.perf_counter()
+    config = {**charger_configuration(CHEMIN_CONFIG), **candidate}
+    valider_configuration(config)
+    jeu = compiler_regles(config)
+    ensemble = ensemble or ensemble_courant()
+
+    # Exact si les colonnes manquantes tiennent dans le budget restant
+    manquantes = ensemble.colonnes_manquantes(jeu)
+    cout = manquantes * len(ensemble.df) * ensemble.cout_ligne
+    restant = budget_ms / 1000 - (time.perf_counter() - t0)
+    # (calcul en cours sur l'ensemble complet, autre aperçu / tâche de fond : pas d'attente)
+    exact = complet or (cout <= restant * 0.5 and not ensemble.verrou_complet.locked())
+
+    if exact:
+        res = ensemble.evaluer_complet(jeu)
+        df = ensemble.df
+        garde = res["garde"].to_numpy()
+        scores = res["score"].to_numpy()
+        nb_gardes = int(garde.sum())
+        intervalle = [nb_gardes, nb_gardes]
+        poids = np.ones(len(df))
+        par_strate = {
+            s: (n_h, int(garde[ensemble.strates == s].sum())) for s, (n_h, _) in ensemble.poids_strates.items()
+        }
+        lignes_evaluees = len(df)
+    else:
+        with ensemble.verrou_echantillon:
+            res = ensemble.matrice_echantillon.evaluer(jeu)
+        if manquantes:
+            ensemble.completer_en_fond(jeu)
+        df = ensemble.echantillon
+        garde = res["garde"].to_numpy()
+        scores = res["score"].to_numpy()
+        strates = ensemble.strates_echantillon
+        # Estimateur stratifié : N_h / n_h par ligne de la strate h
+        poids = np.zeros(len(df))
+        estimation, variance = 0.0, 0.0
+        par_strate = {}
+        for s, (n_total, n_h) in ensemble.poids_strates.items():
+            dans = strates == s
+            p = float(garde[dans].mean()) if n_h else 0.0
+            poids[dans] = n_total / n_h
+            estimation += n_total * p
+            if n_h > 1:
+                variance += n_total ** 2 * (1 - n_h / n_total) * p * (1 - p) / (n_h - 1)
+            par_strate[s] = (n_total, int(round(n_total * p)))
+        nb_gardes = int(round(estimation))
+        marge = 1.96 * math.sqrt(variance)
+        intervalle = [max(0, int(math.floor(estimation - marge))), int(math.ceil(estimation + marge))]
+        lignes_evaluees = len(df)
+
+    total = len(ensemble.df)
+    return {
+        "mode": "exact" if exact else "estimation",
+        "version_config": jeu.version,
+        "lignes": total,
+        "lignes_evaluees": lignes_evaluees,
+        "gardes": nb_gardes,
+        "gardes_intervalle": intervalle,
+        "taux_garde": nb_gardes / total if total else 0.0,
+        "scores_gardes": _distribution(scores[garde], poids[garde]),
+        "par_strate": [{"strate": s, "lignes": n, "gardes": g} for s, (n, g) in sorted(par_strate.items())],
+        "exemples": _exemples(df, res, jeu, nb_exemples),
+        "duree_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
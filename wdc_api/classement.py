@@ -0,0 +1,54 @@
+# wdc_api/classement.py
+# =====================
+# Top-K par groupe (segment, secteur) sur un CSV de prospects, sans tri complet.
+#
+# Les commerciaux ne lisent que les k meilleurs prospects de leur segment / secteur :
+# inutile de trier toutes les lignes (O(n log n)), une sélection partielle par groupe
+# (nlargest, O(n log k)) suffit.
+#
+# Pendant en base : GET /prospects/top (cf. crud.get_top_prospects).
+#
+# NB : tri_linkedin_plus.py garde son tri complet, l'ordre de prospects_recommandes.csv
+# fait partie du contrat des fichiers de sortie.
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import pandas as pd
+
+# Groupes par défaut
+GROUPES = ("segment", "sector")
+
+# Nombre de prospects gardés par groupe
+K_DEFAUT = 50
+
+
+def top_k_par_groupe(
+    df: pd.DataFrame,
+    k: int = K_DEFAUT,
+    groupes: Sequence[str] = GROUPES,
+    score: str = "score",
+) -> pd.DataFrame:
+    """
+    Les k lignes de meilleur score de chaque groupe (valeurs vides = un groupe à part).
+    Retour : lignes triées par groupe puis score décroissant (ordre d'origine à score égal),
+    + colonne "rang" (1 = meilleur du groupe). Les lignes sans score sont ignorées.
+    """
+    if k < 1:
+        raise ValueError(f"k doit être >= 1 (reçu : {k})")
+    manquantes = [c for c in (*groupes, score) if c not in df.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes pour le classement : {manquantes}")
+
+    scores = pd.to_numeric(df[score], errors="coerce")
+    valides = scores.notna()
+    cles = [df.loc[valides, c].fillna("").astype(str) for c in groupes]
+
+    # nlargest par groupe : sélection partielle, keep="first" = ordre d'origine à score égal
+    meilleurs = scores[valides].groupby(cles, sort=True).nlargest(k)
+    index = meilleurs.index.get_level_values(-1)
+
+    top = df.loc[index].copy()
+    top["rang"] = meilleurs.groupby(level=list(range(len(groupes)))).cumcount().to_numpy() + 1
+    return top.reset_index(drop=True)
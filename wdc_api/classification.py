@@ -0,0 +1,521 @@
+# wdc_api/classification.py
+# =========================
+# Heuristiques de classification des contacts LinkedIn
+# (exclusions, segment business/tech, décideur, secteur).
+#
+# Utilisées par le script tri_linkedin_plus.py ET par l'API (/score) :
+# une seule source de vérité pour les deux.
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from wdc_api.patterns import JeuDeMotifs, compiler_motifs
+
+_RE_ESPACES = re.compile(r"\s+")
+
+# -------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------
+
+def normalize_text(text: str) -> str:
+    """Texte en minuscule, sans espaces superflus."""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    text = text.strip().lower()
+    return _RE_ESPACES.sub(" ", text)
+
+# Colonnes d'un contact -> mots-clés cherchés dans les noms de colonnes (find_col)
+COLONNES_CONTACT: dict[str, list[str]] = {
+    "name": ["name", "nom"],
+    "title": ["title", "position", "occupation", "headline", "poste", "fonction"],
+    "url": ["url", "profile"],
+}
+
+
+def find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
+    """Trouve une colonne dont le nom contient un mot-clé parmi `candidates`."""
+    lower_cols = {c.lower(): c for c in df.columns}
+    for pattern in candidates:
+        for lc, original in lower_cols.items():
+            if pattern in lc:
+                return original
+    return None
+
+# -------------------------------------------------------------------
+# MOTIFS (compilés une seule fois via wdc_api.patterns)
+# -------------------------------------------------------------------
+
+# Décideurs (sur le titre)
+DECISION_MAKER_PATTERNS: list[str] = [
+    r"\b(gérant|gerant|co[- ]gérant|co[- ]gerant)\b",
+    r"\b(dirigeant|dirigeante)\b",
+    r"\b(fondateur|fondatrice|co[- ]fondateur|co[- ]fondatrice)\b",
+    r"\b(président|présidente|president|presidente)\b",
+    r"\b(ceo|coo|cto|cmo|cfo)\b",
+    r"\b(owner|propriétaire)\b",
+    r"chef d'entreprise",
+    r"cheffe d'entreprise",
+    r"\b(associé|associée|partner)\b",
+    # Ajout de titres plus larges
+    r"\b(manager|responsable|directeur|directrice|head|lead|co[- ]founder)\b",
+]
+
+# Secteurs, par ordre de priorité (le premier qui matche gagne)
+SECTOR_PATTERNS: list[tuple[str, str]] = [
+    ("association", r"\b(association|asso|ong|fondation)\b"),
+    ("artisanat", r"\b(artisan|artisanal|boulangerie|boucherie|coiffure|salon)\b"),
+    ("commerce", r"\b(commerce|boutique|magasin|retail|e[- ]commerce)\b"),
+    ("tpe/pme", r"\b(tpe|pme|micro[- ]entreprise|microentreprise)\b"),
+    ("agence/cabinet", r"\b(agence|studio|cabinet|conseil)\b"),
+]
+
+# 1) Exclusions dures : profils qu’on ne contactera jamais
+EXCLUDE_PATTERNS: list[str] = [
+    # Étudiants / alternants / stages
+    r"\b(étudiant|etudiant|étudiante|etudiante)\b",
+    r"\b(alternant|alternante|alternance)\b",
+    r"\b(apprenti|apprentie)\b",
+    r"\b(stagiaire|stage)\b",
+    r"\b(intern|internship)\b",
+    # RH / recrutement pur
+    r"\b(talent acquisition|recruteur|recrutement|ressources humaines|rh)\b",
+    # On ne bloque plus "junior", "bachelor", "licence", "master" pour laisser passer des profils potentiellement intéressants
+]
+
+# 2) Tech bloquée : dev salariés, stagiaires, juniors… qu’on ne veut pas
+TECH_BLOCK_STRICT: list[str] = [
+    r"\bstagiaire dev\b",
+    r"\bjunior dev\b",
+    r"\balternant dev\b",
+    r"\betudiant dev\b",
+    r"\bdeveloper intern\b",
+    r"\bsoftware intern\b",
+]
+
+# 3) Tech qu’on accepte : freelance, agences, no-code, IA, automation…
+TECH_ALLOWED: list[str] = [
+    r"\b(freelance|indépendant|independant|consultant|consultante)\b",
+    r"\b(agence|agency|studio|cabinet)\b",
+    r"\b(no[- ]?code|nocode|automation|automatisation|ia|ai|ml|data)\b",
+    r"\b(bubble|webflow|make\.com|zapier|n8n|wordpress|shopify)\b",
+    r"\b(marketing|growth|seo|digital|communication)\b",  # ajout de mots-clés marketing/digital
+]
+
+# Grades qui rendent un profil tech intéressant malgré tout
+SENIOR_PATTERNS: list[str] = [r"\b(senior|lead|manager|head|director)\b"]
+
+# Mots (sous-chaînes simples) signalant un profil dev / data
+DEV_WORDS: list[str] = ["developer", "développeur", "developpeur", " dev", "data ", "data engineer", "data scientist"]
+
+# Segment tech : profils dev / data / ingénierie
+DEV_PATTERNS: list[str] = [
+    r"\b(developer|développeur|developpeur|devops|frontend|front[- ]end|backend|back[- ]end|fullstack|full[- ]stack)\b",
+    r"\b(data engineer|data scientist|ml engineer)\b",
+]
+
+# Segment tech : agences / studios web orientés digital (les deux doivent matcher)
+AGENCY_PATTERNS: list[str] = [r"\b(agence|agency|studio|web agency)\b"]
+WEB_MARKERS: list[str] = [
+    r"\b(web|digital|numérique|seo|site|wordpress|shopify|e[- ]?commerce)\b",
+]
+
+# Segment tech : no-code / IA / automatisation
+NOCODE_PATTERNS: list[str] = [
+    r"\b(no[- ]?code|nocode|bubble|webflow)\b",
+    r"\b(make\.com|zapier|n8n)\b",
+    r"\b(intelligence artificielle|ia|ai|automation|automatisation)\b",
+]
+
+_DECISION_MAKER = compiler_motifs(DECISION_MAKER_PATTERNS, re.IGNORECASE)
+_SECTOR = compiler_motifs([rx for _, rx in SECTOR_PATTERNS])
+_EXCLUDE = compiler_motifs(EXCLUDE_PATTERNS)
+_TECH_BLOCK = compiler_motifs(TECH_BLOCK_STRICT)
+_TECH_ALLOWED = compiler_motifs(TECH_ALLOWED)
+_SENIOR = compiler_motifs(SENIOR_PATTERNS)
+_DEV = compiler_motifs(DEV_PATTERNS)
+_AGENCY = compiler_motifs(AGENCY_PATTERNS)
+_WEB = compiler_motifs(WEB_MARKERS)
+_NOCODE = compiler_motifs(NOCODE_PATTERNS)
+
+# -------------------------------------------------------------------
+# HEURISTIQUES
+# -------------------------------------------------------------------
+
+def is_decision_maker(title: str) -> bool:
+    """Heuristique pour repérer un décideur."""
+    if not isinstance(title, str):
+        return False
+
+    return _DECISION_MAKER.cherche(normalize_text(title))
+
+def detect_sector(text: str) -> str | None:
+    """Détection très simple du secteur / type d'organisation."""
+    if not isinstance(text, str):
+        return None
+
+    i = _SECTOR.premier(normalize_text(text))
+    return None if i is None else SECTOR_PATTERNS[i][0]
+
+def smart_exclude(row_text: str) -> bool:
+    """Filtrage intelligent pour virer le tech non monétisable + profils non pertinents."""
+    if not isinstance(row_text, str):
+        row_text = "" if row_text is None else str(row_text)
+
+    t = row_text.lower()
+
+    # 1) Exclusion stricte (étudiants, alternants, RH, etc.)
+    if _EXCLUDE.cherche(t):
+        return True
+
+    # 2) Cas développeurs / data / tech très exécutant
+    if any(word in t for word in DEV_WORDS):
+        # on exclut seulement si aucune indication business/freelance/agence/marketing ET pas de grade senior/lead/manager
+        if not _TECH_ALLOWED.cherche(t) and not _SENIOR.cherche(t):
+            return True
+
+    # 3) Tech bloqués explicitement (stagiaire dev, junior dev, etc.)
+    if _TECH_BLOCK.cherche(t):
+        return True
+
+    # Sinon on garde
+    return False
+
+def classify_segment(row_text: str) -> str:
+    """
+    Retourne 'tech' ou 'business' pour affiner la com plus tard.
+    """
+    if not isinstance(row_text, str):
+        row_text = "" if row_text is None else str(row_text)
+
+    t = row_text.lower()
+
+    # 1) Profils dev / data / ingénierie
+    if _DEV.cherche(t):
+        return "tech"
+
+    # 2) Agences / studios web orientés digital
+    if _AGENCY.cherche(t) and _WEB.cherche(t):
+        return "tech"
+
+    # 3) No-code / IA / automatisation
+    if _NOCODE.cherche(t):
+        return "tech"
+
+    # Par défaut : business classique
+    return "business"
+
+# -------------------------------------------------------------------
+# CLASSIFICATION PAR VALEUR DISTINCTE
+# -------------------------------------------------------------------
+#
+# `combined` = "nom | titre | url". Les titres ("CEO", "Gérant", "Freelance"...) se
+# répètent énormément : au lieu d'appliquer les heuristiques ligne par ligne, on
+# évalue chaque PARTIE distincte une seule fois puis on recombine par ligne.
+#
+# C'est exact car chaque heuristique est une combinaison de "motif présent dans le texte",
+# et aucun motif ne peut traverser le séparateur " | " : présent dans combined
+# <=> présent dans au moins une partie. Chaque partie est évaluée "encadrée" par ses
+# séparateurs ("nom |", "| titre |", "| url") pour que les sous-chaînes avec espace
+# (" dev", "data ") et les \b voient exactement le même contexte que dans combined.
+
+_CADRES = ("{} |", "| {} |", "| {}")
+
+# Colonnes des traits (booléens sauf secteur = index du 1er motif, len(SECTOR_PATTERNS) si aucun)
+_TRAITS = ("exclu", "dev_mot", "tech_ok", "senior", "tech_bloque", "dev", "agence", "web", "nocode", "secteur")
+_SANS_SECTEUR = len(SECTOR_PATTERNS)
+
+
+def _traits_partie(t: str) -> tuple:
+    """Traits élémentaires d'une partie (encadrée, en minuscules) de `combined`."""
+    i = _SECTOR.premier(normalize_text(t))
+    return (
+        _EXCLUDE.cherche(t),
+        any(word in t for word in DEV_WORDS),
+        _TECH_ALLOWED.cherche(t),
+        _SENIOR.cherche(t),
+        _TECH_BLOCK.cherche(t),
+        _DEV.cherche(t),
+        _AGENCY.cherche(t),
+        _WEB.cherche(t),
+        _NOCODE.cherche(t),
+        _SANS_SECTEUR if i is None else i,
+    )
+
+
+def _par_valeur_distincte(serie: pd.Series, fonction, largeur: int) -> tuple[np.ndarray, int]:
+    """
+    Applique `fonction` (-> tuple de `largeur` entiers) une fois par valeur distincte de `serie`.
+    Retour : (tableau lignes x largeur, nombre de valeurs distinctes).
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    resultats = np.array([fonction(u) for u in uniques], dtype="int64").reshape(len(uniques), largeur)
+    return resultats[codes], len(uniques)
+
+
+def _parties(df: pd.DataFrame) -> list[pd.Series]:
+    """Parties encadrées de `combined` : nom, titre, url (en minuscules)."""
+    return [
+        df[col].fillna("").astype(str).str.lower().map(cadre.format)
+        for col, cadre in zip(("_name", "_title", "_url"), _CADRES)
+    ]
+
+
+# -------------------------------------------------------------------
+# SCORING "PROSPECT RECOMMANDÉ"
+# -------------------------------------------------------------------
+
+# Titres très intéressants (freelance, consultant, CEO, manager, etc.)
+ROLE_HIT_PATTERN = (
+    r"(gérant|gerant|dirigeant|dirigeante|fondateur|fondatrice|"
+    r"président|présidente|president|presidente|owner|"
+    r"freelance|freelancer|indépendant|independant|"
+    r"consultant|consultante|"
+    r"entrepreneur|entrepreneure|entrepreneuse|"
+    r"chef d'entreprise|cheffe d'entreprise|"
+    r"co[- ]gérant|co[- ]gerant|co[- ]gérante|co[- ]gerante|"
+    r"manager|responsable|directeur|directrice|head|lead)"
+)
+
+# Petite structure / indépendant / agence / cabinet...
+MICRO_HIT_PATTERN = (
+    r"(tpe|pme|micro[- ]entreprise|microentreprise|"
+    r"auto[- ]entrepreneur|autoentrepreneur|"
+    r"artisan|artisanal|commerce|boutique|magasin|"
+    r"agence|studio|cabinet)"
+)
+
+# Signaux par défaut (si la config ne déclare pas de section "signaux").
+# Même contenu que la section "signaux" de configs/default.json.
+SIGNAUX_DEFAUT: dict = {
+    "recommande_min": 1,
+    "recommande_si": ["decision_maker"],
+    "liste": [
+        {"id": "decision_maker", "champ": "titre", "motifs": DECISION_MAKER_PATTERNS, "poids": 2},
+        {"id": "role_hit", "champ": "titre", "motifs": [ROLE_HIT_PATTERN], "poids": 1},
+        {"id": "micro_hit", "champ": "texte", "motifs": [MICRO_HIT_PATTERN], "poids": 1},
+    ],
+}
+
+# Champs sur lesquels un signal peut porter
+CHAMPS_SIGNAUX = ("titre", "texte")
+
+# Motifs "texte" dont on SAIT qu'ils ne traversent pas le séparateur " | " (signaux par
+# défaut) : évalués partie par partie (cf. _parties). Un motif venu de la config
+# ("ceo.*agence" ...) peut couvrir plusieurs champs : évalué sur le texte combiné.
+_MOTIFS_PAR_PARTIES = frozenset(
+    tuple(sig["motifs"]) for sig in SIGNAUX_DEFAUT["liste"] if sig["champ"] == "texte"
+)
+
+
+@dataclass(frozen=True)
+class Signal:
+    """Un signal de scoring : motifs regex sur un champ, poids en points, bit dans le masque."""
+
+    id: str
+    champ: str
+    motifs: JeuDeMotifs
+    poids: int
+    bit: int
+    par_parties: bool = False  # "texte" évaluable partie par partie (cf. _MOTIFS_PAR_PARTIES)
+
+
+@dataclass(frozen=True)
+class JeuDeSignaux:
+    """Signaux compilés + règle de recommandation."""
+
+    signaux: Tuple[Signal, ...]
+    recommande_min: float = 1
+    recommande_si: Tuple[str, ...] = ()
+
+    def legende(self) -> str:
+        """Ex: "1=decision_maker, 2=role_hit, 4=micro_hit"."""
+        return ", ".join(f"{1 << s.bit}={s.id}" for s in self.signaux)
+
+    def decoder(self, masque: int) -> list[str]:
+        """Masque de raisons -> ids des signaux déclenchés."""
+        return [s.id for s in self.signaux if int(masque) >> s.bit & 1]
+
+
+def compiler_signaux(config: dict | None = None) -> JeuDeSignaux:
+    """
+    Compile la section config["signaux"] (ou SIGNAUX_DEFAUT si absente).
+    Les regex passent par le registre wdc_api.patterns (insensibles à la casse).
+    """
+    bloc = (config or {}).get("signaux") or SIGNAUX_DEFAUT
+    signaux = tuple(
+        Signal(
+            id=sig["id"],
+            champ=sig.get("champ", "texte"),
+            motifs=compiler_motifs(sig["motifs"], re.IGNORECASE),
+            poids=int(sig.get("poids", 1)),
+            bit=bit,
+            par_parties=tuple(sig["motifs"]) in _MOTIFS_PAR_PARTIES,
+        )
+        for bit, sig in enumerate(bloc.get("liste", []))
+    )
+    return JeuDeSignaux(
+        signaux=signaux,
+        recommande_min=float(bloc.get("recommande_min", 1)),
+        recommande_si=tuple(bloc.get("recommande_si", [])),
+    )
+
+
+def _contient_distinct(serie: pd.Series, motifs: JeuDeMotifs) -> np.ndarray:
+    """str.contains évalué une fois par valeur distincte, rediffusé ligne par ligne."""
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    if not motifs.combine:  # motifs non combinables (cf. patterns.JeuDeMotifs) : un par un
+        hits = np.fromiter((isinstance(u, str) and motifs.cherche(u) for u in uniques), dtype=bool, count=len(uniques))
+        return hits[codes]
+    hits = pd.Series(uniques, dtype=object).str.contains(motifs.regex_simple, na=False).to_numpy(dtype=bool)
+    return hits[codes]
+
+
+def evaluer_signaux(
+    titres: pd.Series,
+    textes: pd.Series,
+    jeu: JeuDeSignaux,
+    parties: Sequence[pd.Series] | None = None,
+) -> pd.DataFrame:
+    """
+    Évalue tous les signaux en colonnes booléennes (une recherche par valeur DISTINCTE).
+
+    `textes` : le texte combiné ("nom | titre | url").
+    `parties` : ses parties (cf. _parties), si disponibles : un signal "texte" par_parties
+    est alors déclenché si au moins une partie le déclenche (même résultat, valeurs
+    distinctes bien moins nombreuses) ; les autres signaux "texte" portent sur `textes`.
+
+    Retour (aligné sur titres.index) : une colonne booléenne par signal,
+    + score (somme des poids) + raisons (masque : bit i = signal i déclenché).
+    """
+    out = pd.DataFrame(index=titres.index)
+    score = pd.Series(0, index=titres.index, dtype="int64")
+    raisons = pd.Series(0, index=titres.index, dtype="int64")
+
+    for sig in jeu.signaux:
+        if sig.champ == "titre":
+            brut = _contient_distinct(titres, sig.motifs)
+        elif parties is not None and sig.par_parties:
+            brut = np.logical_or.reduce([_contient_distinct(p, sig.motifs) for p in parties])
+        else:
+            brut = _contient_distinct(textes, sig.motifs)
+        hit = pd.Series(brut, index=titres.index, dtype=bool)
+        out[sig.id] = hit
+        score += hit.astype("int64") * sig.poids
+        raisons += hit.astype("int64") * (1 << sig.bit)
+
+    out["score"] = score
+    out["raisons"] = raisons
+    return out
+
+
+def classer_contacts(df: pd.DataFrame, signaux: JeuDeSignaux | None = None) -> pd.DataFrame:
+    """
+    Classe chaque contact d'un export LinkedIn (une ligne = un contact).
+
+    Retour : copie de df + colonnes
+    - _name, _title, _url, combined : textes normalisés utilisés par les regex
+    - excluded       : True si smart_exclude (profil non ciblé)
+    - segment        : 'business' ou 'tech'
+    - decision_maker : décideur détecté (False pour les exclus)
+    - sector         : secteur détecté (ou None)
+    - score          : somme des poids des signaux déclenchés (0 pour les exclus)
+                       par défaut 2*decision_maker + role_hit + micro_hit
+    - raisons        : masque des signaux déclenchés (bit i = signal i, cf. JeuDeSignaux.legende)
+    - recommended    : signal "recommande_si" (décideur) OU score >= recommande_min,
+                       jamais pour un exclu
+
+    `signaux` : jeu compilé depuis la config (compiler_signaux) ; par défaut SIGNAUX_DEFAUT.
+
+    Les heuristiques sont évaluées une fois par nom / titre / url DISTINCT (cf. _traits_partie).
+    Statistiques de dédoublonnage dans df.attrs["classification"] :
+    lignes, noms / titres / urls distincts, ratio_titres (titres distincts / lignes).
+    """
+    df = df.copy()
+
+    # Normalisation des colonnes importantes
+    name_col = find_col(df, COLONNES_CONTACT["name"])
+    title_col = find_col(df, COLONNES_CONTACT["title"])
+    url_col = find_col(df, COLONNES_CONTACT["url"])
+
+    df["_name"] = df[name_col].astype(str) if name_col else ""
+    df["_title"] = df[title_col].astype(str) if title_col else ""
+    df["_url"] = df[url_col].astype(str) if url_col else ""
+
+    # Ligne combinée pour les regex
+    df["combined"] = (
+        df["_name"].fillna("").astype(str)
+        + " | "
+        + df["_title"].fillna("").astype(str)
+        + " | "
+        + df["_url"].fillna("").astype(str)
+    ).str.lower()
+
+    # Traits élémentaires par nom / titre / url distinct, recombinés par ligne :
+    # présent dans combined <=> présent dans une des parties (secteur : motif le plus prioritaire)
+    parties = _parties(df)
+    traits, distincts = zip(*(_par_valeur_distincte(p, _traits_partie, len(_TRAITS)) for p in parties))
+    t = np.maximum.reduce(traits)
+    t[:, -1] = np.minimum.reduce([tr[:, -1] for tr in traits])
+    trait = {nom: t[:, i] for i, nom in enumerate(_TRAITS)}
+
+    # Exclusions intelligentes (étudiants, stages, RH, tech non pertinent…) = smart_exclude
+    exclu = (
+        trait["exclu"].astype(bool)
+        | (trait["dev_mot"].astype(bool) & ~trait["tech_ok"].astype(bool) & ~trait["senior"].astype(bool))
+        | trait["tech_bloque"].astype(bool)
+    )
+    excluded = pd.Series(exclu, index=df.index, dtype=bool)
+    df["excluded"] = excluded
+
+    # Segment business / tech (standardisé : uniquement 'business' ou 'tech') = classify_segment
+    tech = trait["dev"].astype(bool) | (trait["agence"].astype(bool) & trait["web"].astype(bool)) | trait["nocode"].astype(bool)
+    df["segment"] = np.where(tech, "tech", "business")
+
+    # Secteur = detect_sector
+    noms_secteurs = np.array([nom for nom, _ in SECTOR_PATTERNS] + [None], dtype=object)
+    df["sector"] = noms_secteurs[trait["secteur"]]
+
+    # Signaux pondérés (config "signaux") évalués en colonnes, sur les lignes conservées.
+    # Par défaut : decision_maker (2 pts), role_hit (1 pt), micro_hit (1 pt).
+    signaux = signaux or compiler_signaux()
+    titres = df["_title"].fillna("").astype(str).str.strip().str.lower().str.replace(_RE_ESPACES, " ", regex=True)
+    hits = evaluer_signaux(
+        titres[~excluded], df.loc[~excluded, "combined"], signaux, parties=[p[~excluded] for p in parties]
+    )
+
+    df["decision_maker"] = False
+    if "decision_maker" in hits.columns:
+        df.loc[~excluded, "decision_maker"] = hits["decision_maker"]
+    df["decision_maker"] = df["decision_maker"].astype(bool)
+
+    df["score"] = 0
+    df["raisons"] = 0
+    df.loc[~excluded, "score"] = hits["score"]
+    df.loc[~excluded, "raisons"] = hits["raisons"]
+    df["score"] = df["score"].astype(int)
+    df["raisons"] = df["raisons"].astype("int64")
+
+    # Règle finale :
+    # - recommandé si un signal "recommande_si" est déclenché (décideur détecté)
+    # - OU si score >= recommande_min (au moins un bon signal : rôle ou micro structure)
+    force = pd.Series(False, index=df.index)
+    for sig in signaux.signaux:
+        if sig.id in signaux.recommande_si:
+            force |= (df["raisons"] & (1 << sig.bit)) != 0
+    df["recommended"] = (force | (df["score"] >= signaux.recommande_min)) & ~excluded
+
+    n = len(df)
+    df.attrs["classification"] = {
+        "lignes": n,
+        "noms_distincts": distincts[0],
+        "titres_distincts": distincts[1],
+        "urls_distinctes": distincts[2],
+        "ratio_titres": round(distincts[1] / n, 4) if n else 0.0,
+    }
+    return df
@@ -0,0 +1,391 @@
+# wdc_api/cli.py
+# ==============
+# Point d'entrée unique (CLI) pour lancer les étapes du pipeline :
+#
+#   python -m wdc_api.cli normalise   # 01_normalisation_linkedin.py
+#   python -m wdc_api.cli enrich      # 02_enrichissement_minimal.py
+#   python -m wdc_api.cli dedup       # 03_dedoublonnage_qualite.py
+#   python -m wdc_api.cli score       # 04_scoring_v1.py
+#   python -m wdc_api.cli score --config a.json --config b.json   # A/B en une passe
+#   python -m wdc_api.cli classify    # tri_linkedin_plus.py
+#   python -m wdc_api.cli sync        # sync_prospects_postgres.py
+#   python -m wdc_api.cli ingest <dossier|glob> [-o sortie.csv]   # fusionne plusieurs exports
+#   python -m wdc_api.cli config [chemin]   # valide un fichier de config
+#   python -m wdc_api.cli snapshot    # reconstruit le snapshot JSON servi par GET /prospects/
+#   python -m wdc_api.cli rescore [--config chemin] [--sql]   # re-score la table prospects dans PostgreSQL
+#   python -m wdc_api.cli enrich-contacts --fournisseur URL [--rps 5]   # complète entreprise, email...
+#   python -m wdc_api.cli gazetteer build <registre.csv>   # index mmap d'un dump SIRENE
+#   python -m wdc_api.cli gazetteer match [CSV]            # entreprise / secteur NAF depuis le titre
+#   python -m wdc_api.cli export-xlsx [CSV] [-o fichier.xlsx]   # Excel des prospects recommandés
+#   python -m wdc_api.cli top [CSV] [-k 50] [--segment tech]    # k meilleurs par segment / secteur
+#   python -m wdc_api.cli index build|update [CSV]             # index inversé des jetons (<CSV>.idx)
+#   python -m wdc_api.cli index count CSV mot [mot...] [--champ poste] [--tous]
+#
+# Démarrage rapide (cron, conteneurs éphémères) :
+# - ce module n'importe RIEN de lourd au chargement (ni pandas, ni SQLAlchemy)
+# - chaque sous-commande importe ses dépendances au dernier moment
+# - --help, config et sync ne chargent jamais pandas
+#
+# Option --temps-import : affiche (sur stderr) le temps d'import de chaque
+# dépendance lourde + du script, pour mesurer le coût du démarrage.
+# Pour le détail complet : python -X importtime -m wdc_api.cli <commande>
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+_T0 = time.perf_counter()
+
+# Racine du dépôt : les scripts numérotés y sont (01_..., 02_..., tri_linkedin_plus.py)
+RACINE = Path(__file__).resolve().parent.parent
+
+# sous-commande -> (script, dépendances lourdes importées par ce script, aide)
+ETAPES: dict[str, tuple[str, tuple[str, ...], str]] = {
+    "normalise": ("01_normalisation_linkedin.py", ("pandas",), "Normalise l'export LinkedIn"),
+    "enrich": ("02_enrichissement_minimal.py", ("pandas",), "Nettoie les URLs + extrait le slug"),
+    "dedup": ("03_dedoublonnage_qualite.py", ("pandas",), "Dédoublonne sur linkedin_slug"),
+    "score": ("04_scoring_v1.py", ("pandas",), "Applique les règles de la config (score)"),
+    "classify": ("tri_linkedin_plus.py", ("pandas",), "Classe les contacts + prospects recommandés"),
+    "sync": ("sync_prospects_postgres.py", ("psycopg2",), "Envoie les prospects dans PostgreSQL"),
+}
+
+_temps_import: list[tuple[str, float]] = []
+
+
+def _importer(nom: str) -> ModuleType:
+    """Importe un module en mesurant le temps (0 s s'il est déjà chargé)."""
+    t = time.perf_counter()
+    module = importlib.import_module(nom)
+    _temps_import.append((nom, time.perf_counter() - t))
+    return module
+
+
+def _charger_script(fichier: str) -> ModuleType:
+    """Charge un script du dépôt par son chemin (les noms 01_... ne sont pas importables)."""
+    chemin = RACINE / fichier
+    if not chemin.exists():
+        raise FileNotFoundError(f"Script introuvable : {chemin}")
+
+    # Les scripts importent wdc_api : la racine doit être dans sys.path
+    if str(RACINE) not in sys.path:
+        sys.path.insert(0, str(RACINE))
+
+    t = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(chemin.stem, chemin)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _temps_import.append((fichier, time.perf_counter() - t))
+    return module
+
+
+def _lancer_etape(commande: str, args: argparse.Namespace) -> None:
+    fichier, dependances, _ = ETAPES[commande]
+
+    # Dépendances lourdes d'abord, une par une : le temps du script reste le sien
+    for dep in dependances:
+        _importer(dep)
+    module = _charger_script(fichier)
+
+    if commande == "sync":
+        try:
+            module.insert_prospects(module.load_prospects(module.CSV_PATH))
+        finally:
+            module.close_pools()
+    elif commande == "score" and args.config:
+        module.main_ab(args.config)
+    else:
+        module.main()
+
+
+def _valider_config(chemin: str) -> None:
+    loader = _importer("wdc_api.configs.loader")
+    config = loader.charger_configuration(chemin)
+    regles = config.get("regles", [])
+    actives = sum(1 for r in regles if r.get("actif"))
+    print(f"OK ✅ Configuration valide : {chemin}")
+    print(f"Version : {config.get('version', 'N/A')}")
+    print(f"Règles  : {len(regles)} ({actives} actives)")
+
+
+def _ingerer(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    ingestion = _importer("wdc_api.ingestion")
+    df, stats = ingestion.ingerer_exports(args.source, nb_workers=args.workers or ingestion.NB_WORKERS)
+    df.to_csv(args.sortie, index=False, encoding="utf-8-sig")
+    print(f"OK ✅ Fichier fusionné créé : {args.sortie}")
+    print(f"Exports lus     : {stats['fichiers']}")
+    print(f"Lignes exports  : {stats['lignes_exports']}")
+    print(f"Doublons        : {stats['doublons']}")
+    print(f"Lignes output   : {stats['lignes']}")
+
+
+def _snapshot() -> None:
+    database = _importer("wdc_api.database")
+    snapshot = _importer("wdc_api.snapshot")
+    conn = database.engine.raw_connection()
+    try:
+        version = snapshot.reconstruire_snapshot(conn)
+    finally:
+        conn.close()
+    print(f"OK ✅ Snapshot publié : version {version} ({snapshot.DOSSIER_SNAPSHOTS})")
+
+
+def _rescorer(args: argparse.Namespace) -> None:
+    rules_sql = _importer("wdc_api.rules_sql")
+    if args.sql:
+        loader = _importer("wdc_api.configs.loader")
+        requete = rules_sql.requete_rescore(loader.charger_regles(args.config))
+        print(requete.sql)
+        print(f"-- paramètres : {list(requete.params)}")
+        return
+    nb = rules_sql.rescorer_base(args.config)
+    print(f"OK ✅ {nb} prospects re-scorés ({args.config})")
+
+
+def _enrichir_contacts(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    enrichment = _importer("wdc_api.enrichment")
+    urls = args.fournisseur or [u for u in os.getenv("WDC_ENRICH_URLS", "").split(",") if u.strip()]
+    fournisseurs = [enrichment.FournisseurHTTP(u.strip(), requetes_par_seconde=args.rps) for u in urls]
+    sortie = args.sortie or args.entree
+    cache = None
+    if not args.sans_cache:
+        enrichment_cache = _importer("wdc_api.enrichment_cache")
+        cache = enrichment_cache.CacheEnrichissement(args.cache or enrichment_cache.CHEMIN_CACHE)
+    stats = enrichment.enrichir_fichier(
+        args.entree, sortie, fournisseurs, concurrence=args.concurrence or enrichment.NB_CONCURRENCE, cache=cache
+    )
+    print(f"OK ✅ Contacts enrichis : {sortie}")
+    print(f"Contacts traités : {stats['contacts']}")
+    print(f"Enrichis         : {stats['enrichis']}")
+    print(f"Non trouvés      : {stats['non_trouves']}")
+    print(f"Erreurs          : {stats['erreurs']} (re-tentés au prochain passage)")
+    print(f"Nouveaux essais  : {stats['reessais']}")
+    if cache is not None:
+        taux = cache.taux()
+        print(
+            f"Cache            : {taux['hit']:.0%} hits, {taux['stale']:.0%} périmés, {taux['miss']:.0%} absents"
+            f" ({stats['cache_hit']} / {stats['cache_stale']} / {stats['cache_miss']})"
+        )
+
+
+def _gazetteer(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    gazetteer = _importer("wdc_api.gazetteer")
+    if args.action == "build":
+        nb = gazetteer.construire_index(args.registre, args.index)
+        print(f"OK ✅ Index du registre créé : {args.index} ({nb} noms distincts)")
+        return
+
+    csv_reader = _importer("wdc_api.csv_reader")
+    df = csv_reader.lire_csv(args.entree, keep_default_na=False)
+    with gazetteer.Gazetteer(args.index) as index:
+        df, stats = gazetteer.completer_entreprises(df, index)
+    sortie = args.sortie or args.entree
+    df.to_csv(sortie, index=False, encoding="utf-8-sig")
+    print(f"OK ✅ Entreprises complétées : {sortie}")
+    print(f"Lignes           : {stats['lignes']}")
+    print(f"Titres distincts : {stats['titres_distincts']}")
+    print(f"Trouvées         : {stats['trouvees']}")
+
+
+def _exporter_xlsx(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    export_xlsx = _importer("wdc_api.export_xlsx")
+    if not Path(args.entree).exists():
+        raise FileNotFoundError(f"Fichier introuvable : {args.entree}")
+    sortie = args.sortie or str(Path(args.entree).with_suffix(".xlsx"))
+    temp = Path(sortie + ".part")
+    lignes = export_xlsx.csv_vers_xlsx(args.entree, temp)
+    temp.replace(sortie)
+    print(f"OK ✅ Classeur Excel créé : {sortie}")
+    for feuille, n in lignes.items():
+        print(f"{feuille:<16} : {n} lignes")
+
+
+def _top(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    classement = _importer("wdc_api.classement")
+    csv_reader = _importer("wdc_api.csv_reader")
+    if not Path(args.entree).exists():
+        raise FileNotFoundError(f"Fichier introuvable : {args.entree}")
+    df = csv_reader.lire_csv(args.entree, keep_default_na=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    if args.segment is not None and "segment" in df.columns:
+        df = df.loc[df["segment"] == args.segment]
+    if args.secteur is not None and "sector" in df.columns:
+        df = df.loc[df["sector"] == args.secteur]
+    top = classement.top_k_par_groupe(df, args.k)
+    top.to_csv(args.sortie, index=False, encoding="utf-8-sig")
+    nb_groupes = len(top.drop_duplicates(list(classement.GROUPES))) if len(top) else 0
+    print(f"OK ✅ {len(top)} prospects ({nb_groupes} groupes, k={args.k}) -> {args.sortie}")
+
+
+def _index(args: argparse.Namespace) -> None:
+    _importer("pandas")
+    index_tokens = _importer("wdc_api.index_tokens")
+    if not Path(args.entree).exists():
+        raise FileNotFoundError(f"Fichier introuvable : {args.entree}")
+    dossier = args.index or index_tokens.chemin_index(args.entree)
+
+    if args.action == "count":
+        t = time.perf_counter()
+        index = index_tokens.IndexTokens.ouvrir(dossier)
+        ouverture = time.perf_counter() - t
+        t = time.perf_counter()
+        nb = index.compter(args.champ, args.mots, tous=args.tous)
+        requete = time.perf_counter() - t
+        print(f"{nb} / {index.nb_lignes} lignes ({args.champ}, {'tous' if args.tous else 'un des'} : {args.mots})")
+        print(f"ouverture {ouverture * 1000:.0f} ms, requête {requete * 1000:.1f} ms")
+        return
+
+    loader = _importer("wdc_api.configs.loader")
+    config = loader.charger_configuration(args.config)
+    index, nb = index_tokens.mettre_a_jour_index(
+        args.entree, config.get("champs_csv") or {}, dossier, reconstruire=args.action == "build"
+    )
+    print(f"OK ✅ Index {dossier} : {nb} lignes ajoutées ({index.nb_lignes} au total, {len(index.segments)} segments)")
+
+
+def _afficher_temps_import() -> None:
+    print("\n--- TEMPS D'IMPORT ---", file=sys.stderr)
+    for nom, duree in _temps_import:
+        print(f"{nom:<32} {duree * 1000:8.1f} ms", file=sys.stderr)
+    print(f"{'total depuis démarrage CLI':<32} {(time.perf_counter() - _T0) * 1000:8.1f} ms", file=sys.stderr)
+
+
+def construire_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m wdc_api.cli",
+        description="Pipeline prospects LinkedIn (normalisation, scoring, classification, sync).",
+    )
+    parser.add_argument(
+        "--temps-import",
+        action="store_true",
+        help="Affiche le temps d'import de chaque dépendance (stderr).",
+    )
+    sous = parser.add_subparsers(dest="commande", required=True, metavar="commande")
+
+    sous_parsers = {
+        nom: sous.add_parser(nom, help=f"{aide} ({fichier})")
+        for nom, (fichier, _, aide) in ETAPES.items()
+    }
+    sous_parsers["score"].add_argument(
+        "--config",
+        action="append",
+        metavar="CHEMIN",
+        help="Config à comparer (répéter l'option) : A/B en une seule passe.",
+    )
+
+    p_config = sous.add_parser("config", help="Valide un fichier de configuration JSON")
+    p_config.add_argument("chemin", nargs="?", default="wdc_api/configs/default.json")
+
+    p_ingest = sous.add_parser("ingest", help="Fusionne plusieurs exports LinkedIn (dossier ou glob), en parallèle")
+    p_ingest.add_argument("source", help="Dossier d'exports *.csv ou motif glob")
+    p_ingest.add_argument("-o", "--sortie", default="connections_fusionnees.csv", metavar="CHEMIN")
+    p_ingest.add_argument("--workers", type=int, default=None, help="Nombre de process de lecture.")
+
+    sous.add_parser("snapshot", help="Reconstruit le snapshot JSON de GET /prospects/ depuis PostgreSQL")
+
+    p_rescore = sous.add_parser("rescore", help="Re-score la table prospects dans PostgreSQL (UPDATE ensembliste)")
+    p_rescore.add_argument("--config", default="wdc_api/configs/default.json", metavar="CHEMIN")
+    p_rescore.add_argument("--sql", action="store_true", help="Affiche la requête sans l'exécuter.")
+
+    p_enrich = sous.add_parser(
+        "enrich-contacts", help="Complète entreprise, secteur, email... via des fournisseurs HTTP (asyncio)"
+    )
+    p_enrich.add_argument("entree", nargs="?", default="linkedin_propre_v1.csv", metavar="CSV")
+    p_enrich.add_argument("-o", "--sortie", default=None, metavar="CHEMIN", help="Par défaut : le fichier d'entrée.")
+    p_enrich.add_argument(
+        "--fournisseur",
+        action="append",
+        metavar="URL",
+        help="API JSON d'enrichissement (répéter l'option : interrogées dans l'ordre). Défaut : $WDC_ENRICH_URLS.",
+    )
+    p_enrich.add_argument("--rps", type=float, default=0.0, help="Requêtes / seconde max par fournisseur (0 = illimité).")
+    p_enrich.add_argument("--concurrence", type=int, default=None, help="Contacts traités en parallèle.")
+    p_enrich.add_argument("--cache", default=None, metavar="CHEMIN", help="Cache SQLite (défaut : $WDC_ENRICH_CACHE).")
+    p_enrich.add_argument("--sans-cache", action="store_true", help="Interroge les fournisseurs pour tous les contacts.")
+
+    p_gaz = sous.add_parser("gazetteer", help="Registre local d'entreprises (SIRENE) : index mmap + recherche")
+    actions_gaz = p_gaz.add_subparsers(dest="action", required=True, metavar="action")
+    p_build = actions_gaz.add_parser("build", help="Construit l'index trié depuis un CSV de registre")
+    p_build.add_argument("registre", help="CSV du registre (ex: StockUniteLegale_utf8.csv)")
+    p_match = actions_gaz.add_parser("match", help="Complète entreprise / secteur / naf / siren depuis le titre")
+    p_match.add_argument("entree", nargs="?", default="linkedin_propre_v1.csv", metavar="CSV")
+    p_match.add_argument("-o", "--sortie", default=None, metavar="CHEMIN", help="Par défaut : le fichier d'entrée.")
+    for p in (p_build, p_match):
+        p.add_argument("--index", default=os.getenv("WDC_GAZETTEER_INDEX", "registre_entreprises.idx"), metavar="CHEMIN")
+
+    p_index = sous.add_parser("index", help="Index inversé des jetons (poste, combined) : comptages en millisecondes")
+    actions_index = p_index.add_subparsers(dest="action", required=True, metavar="action")
+    p_ibuild = actions_index.add_parser("build", help="(Re)construit l'index de tout le fichier")
+    p_iupdate = actions_index.add_parser("update", help="Indexe les lignes ajoutées depuis le dernier build / update")
+    p_icount = actions_index.add_parser("count", help="Nombre de lignes contenant les mots-clés")
+    for p in (p_ibuild, p_iupdate):
+        p.add_argument("entree", nargs="?", default="linkedin_propre_v1.csv", metavar="CSV")
+        p.add_argument("--config", default="wdc_api/configs/default.json", metavar="CHEMIN")
+    p_icount.add_argument("entree", metavar="CSV")
+    p_icount.add_argument("mots", nargs="+", metavar="MOT")
+    for p in (p_ibuild, p_iupdate, p_icount):
+        p.add_argument("--index", default=None, metavar="DOSSIER", help="Par défaut : <CSV>.idx")
+    p_icount.add_argument("--champ", default="poste", choices=("poste", "combined"))
+    p_icount.add_argument("--tous", action="store_true", help="Lignes contenant TOUS les mots (défaut : au moins un).")
+
+    p_xlsx = sous.add_parser("export-xlsx", help="Excel des prospects recommandés (une feuille par segment)")
+    p_xlsx.add_argument("entree", nargs="?", default="prospects_recommandes.csv", metavar="CSV")
+    p_xlsx.add_argument("-o", "--sortie", default=None, metavar="CHEMIN", help="Par défaut : <CSV>.xlsx")
+
+    p_top = sous.add_parser("top", help="k meilleurs prospects (score) par segment / secteur, sans tri complet")
+    p_top.add_argument("entree", nargs="?", default="prospects_recommandes.csv", metavar="CSV")
+    p_top.add_argument("-k", type=int, default=50, help="Prospects par groupe (défaut : 50)")
+    p_top.add_argument("--segment", default=None, help="Un seul segment")
+    p_top.add_argument("--secteur", default=None, help="Un seul secteur")
+    p_top.add_argument("-o", "--sortie", default="prospects_top.csv", metavar="CHEMIN")
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = construire_parser().parse_args(argv)
+
+    try:
+        if args.commande == "config":
+            _valider_config(args.chemin)
+        elif args.commande == "ingest":
+            _ingerer(args)
+        elif args.commande == "snapshot":
+            _snapshot()
+        elif args.commande == "rescore":
+            _rescorer(args)
+        elif args.commande == "enrich-contacts":
+            _enrichir_contacts(args)
+        elif args.commande == "gazetteer":
+            _gazetteer(args)
+        elif args.commande == "export-xlsx":
+            _exporter_xlsx(args)
+        elif args.commande == "top":
+            _top(args)
+        elif args.commande == "index":
+            _index(args)
+        else:
+            _lancer_etape(args.commande, args)
+    except (FileNotFoundError, ValueError) as erreur:
+        print(f"❌ {erreur}", file=sys.stderr)
+        return 1
+    finally:
+        if args.temps_import:
+            _afficher_temps_import()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
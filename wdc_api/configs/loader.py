@@ -2,33 +2,342 @@
 # =========================
 # Ce fichier sert à charger et valider les fichiers de configuration JSON
 # utilisés pour piloter les règles de tri (filtres, scoring, etc.)
+#
+# Cache :
+# - un fichier n'est lu, parsé et validé qu'UNE fois tant qu'il ne change pas
+# - clé du cache = chemin absolu + signature (mtime, taille) du fichier
+# - à chaque appel on fait juste un os.stat() : si le fichier a été modifié
+#   sur disque, il est relu automatiquement (hot reload, sans redémarrer l'API)
+# - les objets compilés (règles, signaux, filtres : regex prêtes à l'emploi) sont mis
+#   en cache avec, et recompilés seulement si le fichier change
 
+from __future__ import annotations
+
+import copy
 import json
+import re
+import threading
 from pathlib import Path
+from typing import Any, Callable
 
+from wdc_api.patterns import compiler_motifs
 
-def charger_configuration(chemin_config: str = "wdc_api/configs/default.json") -> dict:
-    """
-    Charge un fichier de configuration JSON et le retourne sous forme de dictionnaire Python.
+CHEMIN_CONFIG_DEFAUT = "wdc_api/configs/default.json"
 
-    Paramètre :
-    - chemin_config : chemin vers le fichier JSON de configuration
+# Types de règles connus -> actions autorisées pour ce type
+ACTIONS_PAR_TYPE: dict[str, set[str]] = {
+    "contient_un_mot_cle": {"exclure", "score"},
+    "seuil": {"garder"},
+}
 
-    Retour :
-    - dict contenant toute la configuration
 
-    Erreurs possibles :
-    - FileNotFoundError : si le fichier n'existe pas
-    - ValueError : si le JSON est invalide
+# Champs possibles pour un signal (cf. classification.CHAMPS_SIGNAUX)
+CHAMPS_SIGNAUX = ("titre", "texte")
+
+# Un bit par signal dans un masque int64
+NB_MAX_SIGNAUX = 63
+
+# custom_filters : opérateurs d'une condition + actions d'un filtre (cf. filters_engine)
+OPERATEURS_FILTRE = ("contient", "egal", "min", "max", "vide")
+ACTIONS_FILTRE = ("garder", "exclure", "score")
+
+
+class _EntreeCache:
+    """Une configuration chargée + ses objets compilés (créés à la demande)."""
+
+    __slots__ = ("signature", "configuration", "compiles")
+
+    def __init__(self, signature: tuple[int, int], configuration: dict):
+        self.signature = signature
+        self.configuration = configuration
+        self.compiles: dict[str, Any] = {}
+
+
+_cache: dict[Path, _EntreeCache] = {}
+_verrou = threading.Lock()
+
+
+# -----------------------------
+# Validation du schéma
+# -----------------------------
+
+def _est_entier(v: Any) -> bool:
+    # bool est une sous-classe de int : on ne veut pas de "points": true
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _est_nombre(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _cles_utiles(bloc: dict) -> list[str]:
+    """Clés d'un bloc sans les commentaires ("_commentaire", ...)."""
+    return [k for k in bloc if not str(k).startswith("_")]
+
+
+def _valider_mots_cles(mots_cles: Any, contexte: str, erreurs: list[str]) -> None:
+    if not isinstance(mots_cles, list) or not mots_cles:
+        erreurs.append(f"{contexte} : 'mots_cles' doit être une liste non vide")
+        return
+    for m in mots_cles:
+        if not isinstance(m, str) or not m.strip():
+            erreurs.append(f"{contexte} : mot-clé invalide {m!r}")
+
+
+def _valider_regles(regles: Any, erreurs: list[str]) -> None:
+    if not isinstance(regles, list):
+        erreurs.append("'regles' doit être une liste")
+        return
+
+    ids_vus: set[str] = set()
+    for i, regle in enumerate(regles):
+        if not isinstance(regle, dict):
+            erreurs.append(f"regles[{i}] doit être un objet")
+            continue
+
+        rid = regle.get("id")
+        ctx = f"regle '{rid}'" if rid else f"regles[{i}]"
+        if not isinstance(rid, str) or not rid.strip():
+            erreurs.append(f"{ctx} : 'id' obligatoire (texte non vide)")
+        elif rid in ids_vus:
+            erreurs.append(f"{ctx} : 'id' en double")
+        else:
+            ids_vus.add(rid)
+
+        if not isinstance(regle.get("actif", False), bool):
+            erreurs.append(f"{ctx} : 'actif' doit être true/false")
+
+        rtype = regle.get("type")
+        if rtype not in ACTIONS_PAR_TYPE:
+            erreurs.append(f"{ctx} : type inconnu {rtype!r} (attendu : {sorted(ACTIONS_PAR_TYPE)})")
+            continue
+
+        action = regle.get("action")
+        if action not in ACTIONS_PAR_TYPE[rtype]:
+            erreurs.append(
+                f"{ctx} : action {action!r} invalide pour le type '{rtype}' "
+                f"(attendu : {sorted(ACTIONS_PAR_TYPE[rtype])})"
+            )
+
+        if rtype == "contient_un_mot_cle":
+            champ = regle.get("champ")
+            if not isinstance(champ, str) or not champ.strip():
+                erreurs.append(f"{ctx} : 'champ' obligatoire")
+            _valider_mots_cles(regle.get("mots_cles"), ctx, erreurs)
+            if action == "score" and not _est_entier(regle.get("points")):
+                erreurs.append(f"{ctx} : 'points' doit être un entier pour action=score")
+
+        elif rtype == "seuil":
+            if not isinstance(regle.get("champ_score", "score"), str):
+                erreurs.append(f"{ctx} : 'champ_score' doit être un texte")
+            if not _est_nombre(regle.get("min")):
+                erreurs.append(f"{ctx} : 'min' obligatoire (nombre)")
+
+
+def _valider_signaux(bloc: Any, erreurs: list[str]) -> None:
+    if not isinstance(bloc, dict):
+        erreurs.append("'signaux' doit être un objet")
+        return
+    if not _est_nombre(bloc.get("recommande_min", 1)):
+        erreurs.append("signaux.recommande_min doit être un nombre")
+
+    liste = bloc.get("liste")
+    if not isinstance(liste, list) or not liste:
+        erreurs.append("signaux.liste doit être une liste non vide")
+        return
+    if len(liste) > NB_MAX_SIGNAUX:
+        erreurs.append(f"signaux.liste : {NB_MAX_SIGNAUX} signaux maximum (un bit chacun)")
+
+    ids: list[str] = []
+    for i, sig in enumerate(liste):
+        if not isinstance(sig, dict):
+            erreurs.append(f"signaux.liste[{i}] doit être un objet")
+            continue
+        sid = sig.get("id")
+        ctx = f"signal '{sid}'" if sid else f"signaux.liste[{i}]"
+        if not isinstance(sid, str) or not sid.strip():
+            erreurs.append(f"{ctx} : 'id' obligatoire (texte non vide)")
+        elif sid in ids:
+            erreurs.append(f"{ctx} : 'id' en double")
+        else:
+            ids.append(sid)
+        if sig.get("champ", "texte") not in CHAMPS_SIGNAUX:
+            erreurs.append(f"{ctx} : 'champ' doit valoir {' ou '.join(CHAMPS_SIGNAUX)}")
+        if not _est_entier(sig.get("poids", 1)):
+            erreurs.append(f"{ctx} : 'poids' doit être un entier")
+        motifs = sig.get("motifs")
+        if not isinstance(motifs, list) or not motifs:
+            erreurs.append(f"{ctx} : 'motifs' doit être une liste non vide")
+            continue
+        invalides = False
+        for m in motifs:
+            try:
+                re.compile(m, re.IGNORECASE)
+            except (re.error, TypeError) as e:
+                erreurs.append(f"{ctx} : motif regex invalide {m!r} ({e})")
+                invalides = True
+        if invalides:
+            continue
+        # Compilés ensemble comme au chargement (classification.compiler_signaux)
+        try:
+            compiler_motifs(motifs, re.IGNORECASE)
+        except (re.error, ValueError) as e:
+            erreurs.append(f"{ctx} : motifs incompatibles entre eux ({e})")
+
+    recommande_si = bloc.get("recommande_si", [])
+    if not isinstance(recommande_si, list):
+        erreurs.append("signaux.recommande_si doit être une liste")
+        return
+    for sid in recommande_si:
+        if sid not in ids:
+            erreurs.append(f"signaux.recommande_si : signal inconnu {sid!r}")
+
+
+def _valider_condition(cond: Any, ctx: str, erreurs: list[str]) -> None:
+    if not isinstance(cond, dict):
+        erreurs.append(f"{ctx} : condition invalide (objet attendu)")
+        return
+    for cle in ("et", "ou"):
+        if cle in cond:
+            if not isinstance(cond[cle], list):
+                erreurs.append(f"{ctx} : '{cle}' doit être une liste de conditions")
+                return
+            for i, enfant in enumerate(cond[cle]):
+                _valider_condition(enfant, f"{ctx}.{cle}[{i}]", erreurs)
+            return
+    if "non" in cond:
+        _valider_condition(cond["non"], f"{ctx}.non", erreurs)
+        return
+
+    if not isinstance(cond.get("champ"), str) or not cond["champ"]:
+        erreurs.append(f"{ctx} : 'champ' obligatoire (texte non vide)")
+    ops = [op for op in OPERATEURS_FILTRE if op in cond]
+    if not ops:
+        erreurs.append(f"{ctx} : opérateur manquant (attendu : {', '.join(OPERATEURS_FILTRE)})")
+        return
+    if len(ops) > 1 and set(ops) != {"min", "max"}:
+        erreurs.append(f"{ctx} : un seul opérateur par condition (sauf min + max)")
+    if "contient" in cond:
+        mots = cond["contient"]
+        if isinstance(mots, str):
+            mots = [mots]
+        _valider_mots_cles(mots, ctx, erreurs)
+    if "egal" in cond:
+        valeurs = cond["egal"] if isinstance(cond["egal"], list) else [cond["egal"]]
+        if not valeurs or not all(isinstance(v, str) or _est_nombre(v) for v in valeurs):
+            erreurs.append(f"{ctx} : 'egal' doit être un texte, un nombre ou une liste non vide")
+    for borne in ("min", "max"):
+        if borne in cond and not _est_nombre(cond[borne]):
+            erreurs.append(f"{ctx} : '{borne}' doit être un nombre")
+    if "vide" in cond and not isinstance(cond["vide"], bool):
+        erreurs.append(f"{ctx} : 'vide' doit être true/false")
+
+
+def _valider_custom_filters(bloc: Any, erreurs: list[str]) -> None:
+    if not isinstance(bloc, dict) or not isinstance(bloc.get("filters", []), list):
+        erreurs.append("custom_filters.filters doit être une liste")
+        return
+    for i, f in enumerate(bloc.get("filters", [])):
+        if not isinstance(f, dict):
+            erreurs.append(f"custom_filters.filters[{i}] doit être un objet")
+            continue
+        fid = f.get("id")
+        ctx = f"filtre '{fid}'" if fid else f"custom_filters.filters[{i}]"
+        if not isinstance(f.get("actif", True), bool):
+            erreurs.append(f"{ctx} : 'actif' doit être true/false")
+        action = f.get("action", "garder")
+        if action not in ACTIONS_FILTRE:
+            erreurs.append(f"{ctx} : action {action!r} invalide (attendu : {', '.join(ACTIONS_FILTRE)})")
+        if action == "score" and not _est_entier(f.get("points")):
+            erreurs.append(f"{ctx} : 'points' obligatoire (entier) pour l'action score")
+        elif "points" in f and not _est_entier(f["points"]):
+            erreurs.append(f"{ctx} : 'points' doit être un entier")
+        if "condition" not in f:
+            erreurs.append(f"{ctx} : 'condition' obligatoire")
+        else:
+            _valider_condition(f["condition"], ctx, erreurs)
+
+
+def valider_configuration(configuration: Any) -> None:
     """
+    Valide le schéma complet d'une configuration
+    (champs_csv, filtres, scoring, regles, signaux, custom_filters).
 
-    # Conversion du chemin en objet Path (plus robuste et cross-platform)
-    chemin = Path(chemin_config)
+    Toutes les erreurs sont collectées puis remontées ensemble dans une seule ValueError,
+    pour pouvoir corriger le fichier en une fois.
+    """
+    if not isinstance(configuration, dict):
+        raise ValueError("Configuration invalide : la racine doit être un objet JSON")
 
-    # Vérification de l'existence du fichier
-    if not chemin.exists():
-        raise FileNotFoundError(f"Fichier de configuration introuvable : {chemin}")
+    erreurs: list[str] = []
 
+    # Clés obligatoires (comme avant)
+    for cle in ("filtres", "scoring"):
+        if cle not in configuration:
+            erreurs.append(f"clé '{cle}' manquante")
+
+    # champs_csv : mapping logique -> colonne réelle (ou null)
+    champs_csv = configuration.get("champs_csv", {})
+    if not isinstance(champs_csv, dict):
+        erreurs.append("'champs_csv' doit être un objet")
+    else:
+        for k in _cles_utiles(champs_csv):
+            if champs_csv[k] is not None and not isinstance(champs_csv[k], str):
+                erreurs.append(f"champs_csv.{k} doit être un texte ou null")
+
+    # filtres : blocs { actif, mots_cles }
+    filtres = configuration.get("filtres", {})
+    if not isinstance(filtres, dict):
+        erreurs.append("'filtres' doit être un objet")
+    else:
+        for nom in _cles_utiles(filtres):
+            bloc = filtres[nom]
+            if not isinstance(bloc, dict):
+                erreurs.append(f"filtres.{nom} doit être un objet")
+                continue
+            if not isinstance(bloc.get("actif", False), bool):
+                erreurs.append(f"filtres.{nom} : 'actif' doit être true/false")
+            _valider_mots_cles(bloc.get("mots_cles"), f"filtres.{nom}", erreurs)
+
+    # scoring : points entiers + seuils numériques
+    scoring = configuration.get("scoring", {})
+    if not isinstance(scoring, dict):
+        erreurs.append("'scoring' doit être un objet")
+    else:
+        points = scoring.get("points", {})
+        if not isinstance(points, dict):
+            erreurs.append("scoring.points doit être un objet")
+        else:
+            for k in _cles_utiles(points):
+                if not _est_entier(points[k]):
+                    erreurs.append(f"scoring.points.{k} doit être un entier")
+        seuils = scoring.get("seuils", {})
+        if not isinstance(seuils, dict):
+            erreurs.append("scoring.seuils doit être un objet")
+        else:
+            for k in _cles_utiles(seuils):
+                if not _est_nombre(seuils[k]):
+                    erreurs.append(f"scoring.seuils.{k} doit être un nombre")
+
+    _valider_regles(configuration.get("regles", []), erreurs)
+
+    if "signaux" in configuration:
+        _valider_signaux(configuration["signaux"], erreurs)
+
+    _valider_custom_filters(configuration.get("custom_filters", {}), erreurs)
+
+    if len(erreurs) == 1:
+        raise ValueError(f"Configuration invalide : {erreurs[0]}")
+    if erreurs:
+        raise ValueError("Configuration invalide :\n- " + "\n- ".join(erreurs))
+
+
+# -----------------------------
+# Chargement + cache
+# -----------------------------
+
+def _lire_fichier(chemin: Path) -> dict:
+    """Lit + parse + valide un fichier JSON (sans cache)."""
     try:
         # Ouverture et lecture du fichier JSON
         with open(chemin, "r", encoding="utf-8") as fichier:
@@ -38,14 +347,96 @@ def charger_configuration(chemin_config: str = "wdc_api/configs/default.json") -
         # Erreur si le JSON est mal formé
         raise ValueError(f"Erreur de format JSON dans {chemin} : {erreur}")
 
-    # Vérification minimale de structure (sécurité)
-    if "filtres" not in configuration:
-        raise ValueError("Configuration invalide : clé 'filtres' manquante")
+    valider_configuration(configuration)
+    return configuration
 
-    if "scoring" not in configuration:
-        raise ValueError("Configuration invalide : clé 'scoring' manquante")
-    print("CONFIG FILE LOADED =", chemin_config)
-    print("CONFIG KEYS =", list(configuration.keys()))
 
-    # Si tout est OK, on retourne la configuration complète
-    return configuration
+def _entree_cache(chemin_config: str) -> _EntreeCache:
+    """
+    Retourne l'entrée de cache à jour pour ce fichier.
+    Un simple stat() suffit à détecter une modification : pas de relecture si rien n'a changé.
+    """
+    # Conversion du chemin en objet Path (plus robuste et cross-platform)
+    chemin = Path(chemin_config).resolve()
+
+    try:
+        st = chemin.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Fichier de configuration introuvable : {chemin_config}")
+    signature = (st.st_mtime_ns, st.st_size)
+
+    entree = _cache.get(chemin)
+    if entree is not None and entree.signature == signature:
+        return entree
+
+    with _verrou:
+        # Un autre thread a peut-être déjà rechargé le fichier
+        entree = _cache.get(chemin)
+        if entree is None or entree.signature != signature:
+            entree = _EntreeCache(signature, _lire_fichier(chemin))
+            _cache[chemin] = entree
+        return entree
+
+
+def charger_configuration(chemin_config: str = CHEMIN_CONFIG_DEFAUT) -> dict:
+    """
+    Charge un fichier de configuration JSON et le retourne sous forme de dictionnaire Python.
+
+    Paramètre :
+    - chemin_config : chemin vers le fichier JSON de configuration
+
+    Retour :
+    - dict contenant toute la configuration (copie : l'appelant peut la modifier
+      sans corrompre le cache)
+
+    Erreurs possibles :
+    - FileNotFoundError : si le fichier n'existe pas
+    - ValueError : si le JSON est invalide ou ne respecte pas le schéma
+    """
+    return copy.deepcopy(_entree_cache(chemin_config).configuration)
+
+
+def _compile_une_fois(chemin_config: str, nom: str, fabrique: Callable[[dict], Any]) -> Any:
+    """Objet compilé `nom` pour la version courante du fichier (fabrique appelée une seule fois)."""
+    entree = _entree_cache(chemin_config)
+    compile_ = entree.compiles.get(nom)
+    if compile_ is None:
+        with _verrou:
+            compile_ = entree.compiles.get(nom)
+            if compile_ is None:
+                compile_ = fabrique(entree.configuration)
+                entree.compiles[nom] = compile_
+    return compile_
+
+
+def charger_regles(chemin_config: str = CHEMIN_CONFIG_DEFAUT):
+    """
+    Retourne le jeu de règles compilé (immuable) pour ce fichier de configuration.
+
+    Compilé une seule fois par version du fichier : à utiliser dans l'API / les workers
+    pour ne jamais re-parser ni recompiler les regex à chaque requête.
+    """
+    # Import local : valider une config ne doit pas charger pandas
+    from wdc_api.rules_engine import compiler_regles
+
+    return _compile_une_fois(chemin_config, "regles", compiler_regles)
+
+
+def charger_signaux(chemin_config: str = CHEMIN_CONFIG_DEFAUT):
+    """Retourne les signaux de classement compilés (section "signaux"), en cache comme les règles."""
+    from wdc_api.classification import compiler_signaux
+
+    return _compile_une_fois(chemin_config, "signaux", compiler_signaux)
+
+
+def charger_filtres(chemin_config: str = CHEMIN_CONFIG_DEFAUT):
+    """Retourne le programme de filtres compilé (filtres.*, custom_filters, seuil), en cache."""
+    from wdc_api.filters_engine import compiler_filtres
+
+    return _compile_une_fois(chemin_config, "filtres", compiler_filtres)
+
+
+def vider_cache() -> None:
+    """Oublie toutes les configurations chargées (le prochain appel relira les fichiers)."""
+    with _verrou:
+        _cache.clear()
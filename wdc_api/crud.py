@@ -3,9 +3,55 @@
 # Ce fichier regroupe les fonctions "métier" (CRUD) :
 # Create / Read / Update / Delete sur la base de données.
 
+from typing import Optional
+
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 
 from wdc_api import models, schemas
+from wdc_api.snapshot import rafraichir_snapshot
+
+# Top-K par groupe (segment, secteur), PostgreSQL : pour chaque groupe, un
+# ORDER BY score DESC LIMIT k servi par l'index ix_prospects_top_groupe
+# (cf. rules_sql.DDL_SCHEMA) -> on ne lit que k lignes par groupe, sans tri complet
+SQL_TOP_POSTGRES = """
+    SELECT p.id, p.name, p.title, p.sector, p.segment, p.url, p.score
+    FROM (
+        SELECT DISTINCT coalesce(segment, '') AS segment, coalesce(sector, '') AS sector
+        FROM public.prospects
+        WHERE score IS NOT NULL {filtres}
+    ) g
+    CROSS JOIN LATERAL (
+        SELECT id, name, title, sector, segment, url, score
+        FROM public.prospects
+        WHERE coalesce(segment, '') = g.segment
+          AND coalesce(sector, '') = g.sector
+          AND score IS NOT NULL
+        ORDER BY score DESC, id
+        LIMIT :k
+    ) p
+    ORDER BY g.segment, g.sector, p.score DESC, p.id
+"""
+
+# Autres bases (SQLite en local / tests) : même résultat avec ROW_NUMBER()
+SQL_TOP_GENERIQUE = """
+    SELECT id, name, title, sector, segment, url, score
+    FROM (
+        SELECT id, name, title, sector, segment, url, score,
+               ROW_NUMBER() OVER (
+                   PARTITION BY coalesce(segment, ''), coalesce(sector, '')
+                   ORDER BY score DESC, id
+               ) AS rang
+        FROM {table}
+        WHERE score IS NOT NULL {filtres}
+    ) classes
+    WHERE rang <= :k
+    ORDER BY coalesce(segment, ''), coalesce(sector, ''), score DESC, id
+"""
+
+
+# Existence par URL (POST /prospects/lookup) : un seul parcours de l'index unique sur url
+SQL_LOOKUP_POSTGRES = "SELECT id, url, score FROM public.prospects WHERE url = ANY(:urls)"
 
 
 def get_prospects(db: Session):
@@ -28,4 +74,47 @@ def create_prospect(db: Session, prospect: schemas.ProspectCreate):
     db.add(db_prospect)
     db.commit()
     db.refresh(db_prospect)
+    # Le snapshot de GET /prospects/ ne contient pas ce prospect : reconstruit (ou retiré)
+    rafraichir_snapshot(db.connection())
     return db_prospect
+
+
+def get_top_prospects(db: Session, k: int, segment: Optional[str] = None, sector: Optional[str] = None):
+    """
+    Récupère les k meilleurs prospects (score décroissant) de chaque groupe (segment, secteur).
+    segment / sector : restreignent à un seul segment / secteur.
+    Retour : lignes triées par groupe puis score décroissant.
+    """
+    filtres = ""
+    params: dict = {"k": k}
+    if segment is not None:
+        filtres += " AND coalesce(segment, '') = :segment"
+        params["segment"] = segment
+    if sector is not None:
+        filtres += " AND coalesce(sector, '') = :sector"
+        params["sector"] = sector
+
+    if db.get_bind().dialect.name == "postgresql":
+        sql = SQL_TOP_POSTGRES.format(filtres=filtres)
+    else:
+        sql = SQL_TOP_GENERIQUE.format(table=models.Prospect.__tablename__, filtres=filtres)
+    return db.execute(text(sql), params).mappings().all()
+
+
+def lookup_prospects(db: Session, urls: list[str]):
+    """
+    Prospects dont l'URL est dans `urls` (URLs déjà canoniques, cf. ingestion.url_canonique).
+    Retour : lignes {id, url, score}, uniquement pour les URLs trouvées.
+    """
+    if not urls:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return db.execute(text(SQL_LOOKUP_POSTGRES), {"urls": list(urls)}).mappings().all()
+    p = models.Prospect
+    requete = select(p.id, p.url, p.score).where(p.url.in_(list(urls)))
+    return db.execute(requete).mappings().all()
+
+
+def lister_urls(db: Session) -> list[str]:
+    """Toutes les URLs de la table prospects (construction du filtre de Bloom de POST /prospects/lookup)."""
+    return list(db.execute(select(models.Prospect.url)).scalars())
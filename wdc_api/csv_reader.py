@@ -0,0 +1,181 @@
+# wdc_api/csv_reader.py
+# =====================
+# Lecture rapide et robuste des exports CSV (LinkedIn, fichiers clients, uploads API).
+#
+# Avant : on parsait tout le fichier avec le séparateur par défaut, et en cas d'erreur
+# on le re-parsait entièrement avec sep=";" (double parse), avec inférence de type
+# sur toutes les colonnes.
+#
+# Maintenant :
+# 1) detecter_format() lit seulement les premiers Ko et en déduit :
+#    - l'encodage (BOM utf-8 / utf-16, sinon utf-8, sinon cp1252)
+#    - le nombre de lignes de préambule avant l'en-tête (export LinkedIn : "Notes:" ...)
+#    - le séparateur (, ; tabulation |) et le caractère de citation
+# 2) lire_csv() parse le fichier UNE seule fois (moteur C, ou pyarrow si demandé),
+#    en texte (dtype=str) et seulement les colonnes utiles (usecols)
+#
+# Les champs multilignes entre guillemets (noms + titres sur plusieurs lignes dans
+# Connections_from_LinkedIn.csv) sont gérés par le moteur C.
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Mapping, Sequence, Union
+
+import pandas as pd
+
+from wdc_api.classification import find_col
+
+Source = Union[str, Path, bytes]
+
+# Taille de l'échantillon lu pour détecter le format
+TAILLE_ECHANTILLON = 64 * 1024
+
+# Nombre max de lignes de préambule examinées avant l'en-tête
+NB_LIGNES_PREAMBULE = 50
+
+SEPARATEURS = ",;\t|"
+
+# Mots qui signent une ligne d'en-tête (export LinkedIn, fichiers du pipeline)
+MOTS_ENTETE = (
+    "name", "nom", "url", "title", "titre", "position", "poste", "company", "entreprise",
+    "email", "profile", "headline", "occupation", "fonction", "connected",
+)
+
+
+@dataclass(frozen=True)
+class FormatCSV:
+    """Format détecté d'un fichier CSV."""
+
+    encoding: str
+    sep: str
+    quotechar: str
+    lignes_preambule: int
+    colonnes: tuple[str, ...]
+
+
+def _echantillon(source: Source, taille: int) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:taille])
+    with open(source, "rb") as f:
+        return f.read(taille)
+
+
+def _detecter_encodage(brut: bytes) -> str:
+    if brut.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if brut.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False : un caractère coupé en fin d'échantillon n'est pas une erreur
+        codecs.getincrementaldecoder("utf-8")().decode(brut, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        pass
+    try:
+        brut.decode("cp1252")
+        return "cp1252"  # export Excel Windows
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _decoder(brut: bytes, encoding: str) -> str:
+    return codecs.getincrementaldecoder(encoding)(errors="replace").decode(brut, final=False)
+
+
+def _separateur(lignes: list[str]) -> str:
+    try:
+        return csv.Sniffer().sniff("\n".join(lignes), delimiters=SEPARATEURS).delimiter
+    except csv.Error:
+        # Sniffer indécis (1 seule colonne, guillemets partout...) : le plus fréquent dans l'en-tête
+        return max(SEPARATEURS, key=lignes[0].count) if lignes and any(s in lignes[0] for s in SEPARATEURS) else ","
+
+
+def _est_entete(ligne: str, sep: str) -> bool:
+    # En-tête = au moins 2 noms de colonnes connus, tous courts
+    # (une phrase de préambule avec des virgules n'en est pas un)
+    champs = [c.strip().lower() for c in next(csv.reader([ligne], delimiter=sep), []) if c.strip()]
+    if len(champs) < 2 or any(len(c) > 40 or len(c.split()) > 4 for c in champs):
+        return False
+    return sum(1 for c in champs if any(mot in c for mot in MOTS_ENTETE)) >= 2
+
+
+def detecter_format(source: Source, taille_echantillon: int = TAILLE_ECHANTILLON) -> FormatCSV:
+    """Détecte encodage, préambule, séparateur et colonnes à partir des premiers Ko seulement."""
+    brut = _echantillon(source, taille_echantillon)
+    encoding = _detecter_encodage(brut)
+    texte = _decoder(brut, encoding).lstrip("\ufeff")
+    lignes = texte.splitlines()[:NB_LIGNES_PREAMBULE]
+
+    # Préambule : première ligne qui ressemble à un en-tête (avec n'importe quel séparateur)
+    preambule = 0
+    for i, ligne in enumerate(lignes):
+        if any(_est_entete(ligne, s) for s in SEPARATEURS if s in ligne):
+            preambule = i
+            break
+
+    utiles = [l for l in lignes[preambule:preambule + 20] if l.strip()]
+    sep = _separateur(utiles) if utiles else ","
+    entete = next(csv.reader([utiles[0]], delimiter=sep), []) if utiles else []
+
+    return FormatCSV(
+        encoding=encoding,
+        sep=sep,
+        quotechar='"',
+        lignes_preambule=preambule,
+        colonnes=tuple(c.strip() for c in entete),
+    )
+
+
+def colonnes_candidates(colonnes: Sequence[str], candidats: Mapping[str, list[str]]) -> dict[str, str | None]:
+    """{colonne logique: colonne réelle ou None}, même détection que classification.find_col."""
+    vide = pd.DataFrame(columns=list(colonnes))
+    return {logique: find_col(vide, mots) for logique, mots in candidats.items()}
+
+
+def lire_csv(
+    source: Source,
+    usecols: Sequence[str] | Callable[[str], bool] | None = None,
+    candidats: Mapping[str, list[str]] | None = None,
+    dtype: Any = str,
+    fmt: FormatCSV | None = None,
+    moteur: str = "c",
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Parse un CSV en UNE passe avec le format détecté.
+
+    - usecols   : colonnes à lire (noms ou fonction), comme pandas
+    - candidats : alternative à usecols : {logique: [mots-clés]} -> seules les colonnes
+                  détectées (cf. colonnes_candidates) sont lues
+    - dtype     : str par défaut (pas d'inférence de type colonne par colonne)
+    - moteur    : "c" (gère les champs multilignes) ou "pyarrow" (si installé, sans multilignes)
+    - kwargs    : passés à pandas.read_csv (chunksize, keep_default_na, ...)
+    """
+    fmt = fmt or detecter_format(source)
+    if candidats is not None and usecols is None:
+        trouvees = colonnes_candidates(fmt.colonnes, candidats)
+        usecols = sorted({c for c in trouvees.values() if c}) or None
+
+    # Les noms d'en-tête peuvent contenir des espaces autour : on compare sans
+    if usecols is not None and not callable(usecols):
+        voulues = {str(c).strip() for c in usecols}
+        usecols = lambda c, voulues=voulues: str(c).strip() in voulues  # noqa: E731
+
+    options: dict[str, Any] = {
+        "encoding": fmt.encoding,
+        "sep": fmt.sep,
+        "quotechar": fmt.quotechar,
+        "skiprows": fmt.lignes_preambule or None,
+        "usecols": usecols,
+        "dtype": dtype,
+        "engine": moteur,
+    }
+    options.update(kwargs)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return pd.read_csv(source, **options)
@@ -0,0 +1,387 @@
+# wdc_api/enrichment.py
+# =====================
+# Enrichissement asynchrone des champs laissés vides par 01_normalisation_linkedin.py
+# (entreprise, secteur, email, telephone, site_web, reseaux_sociaux).
+#
+#   python -m wdc_api.cli enrich-contacts --fournisseur http://localhost:8081/lookup
+#
+# Principe :
+# - un fournisseur (Fournisseur) = une source de données (API interne, Google Maps,
+#   scraping...) qui, pour un contact, renvoie {champ: valeur} pour les champs qu'il connaît
+# - les contacts sont traités en parallèle par NB_CONCURRENCE workers asyncio
+#   (I/O concurrentes : quelques minutes au lieu de plusieurs heures en séquentiel)
+# - pour un contact, les fournisseurs sont interrogés dans l'ordre (cascade) : un
+#   fournisseur n'est appelé que s'il peut remplir un champ encore vide
+# - chaque fournisseur a sa limite de débit (requêtes / seconde, seau à jetons)
+# - erreurs temporaires (timeout, connexion, 429, 5xx) : nouvel essai avec backoff
+#   exponentiel + jitter (Retry-After respecté)
+# - un seul httpx.AsyncClient pour tout le lot : connexions keep-alive réutilisées
+# - cache persistant par linkedin_slug (enrichment_cache.py) : les champs déjà
+#   connus et frais ne sont jamais redemandés (hit = aucun appel réseau)
+# - seules les cellules vides sont remplies, puis le statut avance :
+#     a_enrichir -> enrichi | non_trouve | erreur_enrichissement (re-tenté au prochain passage)
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+import httpx
+import pandas as pd
+
+from wdc_api.csv_reader import lire_csv
+from wdc_api.enrichment_cache import HIT, MISS, STALE, CacheEnrichissement
+
+# Champs "à remplir" créés par 01_normalisation_linkedin.py
+CHAMPS_ENRICHIS = ("entreprise", "secteur", "email", "telephone", "site_web", "reseaux_sociaux")
+
+# Statuts
+A_ENRICHIR = "a_enrichir"
+ENRICHI = "enrichi"
+NON_TROUVE = "non_trouve"
+ERREUR_ENRICHISSEMENT = "erreur_enrichissement"
+
+# Statuts (re)traités par un passage d'enrichissement
+STATUTS_A_TRAITER = (A_ENRICHIR, ERREUR_ENRICHISSEMENT)
+
+# Nombre de contacts traités en même temps
+NB_CONCURRENCE = int(os.getenv("WDC_ENRICH_CONCURRENCY", "20"))
+
+# Timeout HTTP (secondes) et nombre d'essais par appel fournisseur
+TIMEOUT_HTTP = float(os.getenv("WDC_ENRICH_TIMEOUT", "10"))
+NB_ESSAIS = int(os.getenv("WDC_ENRICH_RETRIES", "4"))
+
+# Backoff : BACKOFF_BASE * 2^essai (+ jitter), plafonné à BACKOFF_MAX secondes
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Codes HTTP qui valent la peine d'un nouvel essai
+CODES_TEMPORAIRES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class ErreurTemporaire(Exception):
+    """Erreur d'un fournisseur qui mérite un nouvel essai (attente imposée éventuelle en secondes)."""
+
+    def __init__(self, message: str, attente: float | None = None):
+        super().__init__(message)
+        self.attente = attente
+
+
+# -----------------------------
+# Limite de débit
+# -----------------------------
+
+class LimiteurDebit:
+    """Seau à jetons asyncio : au plus `par_seconde` appels / seconde (rafale de `rafale`)."""
+
+    def __init__(self, par_seconde: float, rafale: int = 1):
+        self.par_seconde = par_seconde
+        self.rafale = max(1, rafale)
+        self._jetons = float(self.rafale)
+        self._dernier = time.monotonic()
+        self._verrou = asyncio.Lock()
+
+    async def attendre(self) -> None:
+        if self.par_seconde <= 0:
+            return
+        async with self._verrou:
+            while True:
+                maintenant = time.monotonic()
+                self._jetons = min(self.rafale, self._jetons + (maintenant - self._dernier) * self.par_seconde)
+                self._dernier = maintenant
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return
+                await asyncio.sleep((1 - self._jetons) / self.par_seconde)
+
+
+# -----------------------------
+# Fournisseurs
+# -----------------------------
+
+class Fournisseur(ABC):
+    """
+    Interface d'un fournisseur d'enrichissement.
+
+    - nom               : identifiant (stats, logs)
+    - champs            : champs de CHAMPS_ENRICHIS que le fournisseur peut remplir
+    - requetes_par_seconde : limite de débit propre au fournisseur (0 = illimité)
+
+    enrichir() renvoie {champ: valeur} (dict vide = rien trouvé) ou lève
+    ErreurTemporaire / httpx.TransportError pour déclencher un nouvel essai.
+    """
+
+    nom: str = "fournisseur"
+    champs: tuple[str, ...] = CHAMPS_ENRICHIS
+    requetes_par_seconde: float = 0.0
+
+    @abstractmethod
+    async def enrichir(self, client: httpx.AsyncClient, contact: Mapping[str, str]) -> dict[str, str]:
+        ...
+
+
+class FournisseurHTTP(Fournisseur):
+    """
+    Fournisseur générique : API JSON interrogée en GET.
+
+    GET <url>?slug=<linkedin_slug>&nom=<nom_complet>&url=<linkedin_url>
+      200 -> {"entreprise": "...", "email": "...", ...} (clés inconnues ignorées)
+      404 -> contact inconnu
+    """
+
+    def __init__(
+        self,
+        url: str,
+        nom: str | None = None,
+        champs: Iterable[str] = CHAMPS_ENRICHIS,
+        requetes_par_seconde: float = 0.0,
+        entetes: Mapping[str, str] | None = None,
+    ):
+        self.url = url
+        self.nom = nom or httpx.URL(url).host or url
+        self.champs = tuple(c for c in champs if c in CHAMPS_ENRICHIS)
+        self.requetes_par_seconde = requetes_par_seconde
+        self.entetes = dict(entetes or {})
+
+    async def enrichir(self, client: httpx.AsyncClient, contact: Mapping[str, str]) -> dict[str, str]:
+        params = {
+            "slug": contact.get("linkedin_slug", ""),
+            "nom": contact.get("nom_complet", ""),
+            "url": contact.get("linkedin_url", ""),
+        }
+        reponse = await client.get(self.url, params=params, headers=self.entetes)
+        if reponse.status_code == 404:
+            return {}
+        if reponse.status_code in CODES_TEMPORAIRES:
+            retry_after = reponse.headers.get("Retry-After", "")
+            attente = float(retry_after) if retry_after.replace(".", "", 1).isdigit() else None
+            raise ErreurTemporaire(f"{self.nom} : HTTP {reponse.status_code}", attente)
+        reponse.raise_for_status()
+        donnees = reponse.json()
+        if not isinstance(donnees, dict):
+            raise ValueError(f"{self.nom} : réponse JSON inattendue ({type(donnees).__name__})")
+        return {c: str(donnees[c]).strip() for c in self.champs if donnees.get(c) not in (None, "")}
+
+
+# -----------------------------
+# Moteur
+# -----------------------------
+
+def _backoff(essai: int, attente: float | None = None) -> float:
+    if attente is not None:
+        return min(attente, BACKOFF_MAX)
+    delai = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** essai)
+    return delai / 2 + random.uniform(0, delai / 2)  # jitter : évite que les workers repartent ensemble
+
+
+class MoteurEnrichissement:
+    """Interroge les fournisseurs pour des contacts, en parallèle et dans les limites de chacun."""
+
+    def __init__(
+        self,
+        fournisseurs: Iterable[Fournisseur],
+        concurrence: int = NB_CONCURRENCE,
+        nb_essais: int = NB_ESSAIS,
+        timeout: float = TIMEOUT_HTTP,
+        cache: CacheEnrichissement | None = None,
+    ):
+        self.fournisseurs = list(fournisseurs)
+        if not self.fournisseurs:
+            raise ValueError("Aucun fournisseur d'enrichissement configuré.")
+        self.concurrence = max(1, concurrence)
+        self.nb_essais = max(1, nb_essais)
+        self.timeout = timeout
+        self.cache = cache
+        self.stats: dict[str, int] = {}
+
+    def _compter(self, cle: str, n: int = 1) -> None:
+        self.stats[cle] = self.stats.get(cle, 0) + n
+
+    async def _appeler(self, client, fournisseur: Fournisseur, limiteur: LimiteurDebit, contact) -> dict[str, str]:
+        for essai in range(self.nb_essais):
+            await limiteur.attendre()
+            self._compter(f"requetes_{fournisseur.nom}")
+            try:
+                return await fournisseur.enrichir(client, contact)
+            except (ErreurTemporaire, httpx.TransportError) as erreur:
+                if essai == self.nb_essais - 1:
+                    raise
+                self._compter("reessais")
+                await asyncio.sleep(_backoff(essai, getattr(erreur, "attente", None)))
+        return {}
+
+    async def _enrichir_contact(
+        self, client, limiteurs, contact: Mapping[str, str], connus: Mapping[str, str]
+    ) -> tuple[dict[str, str], str, dict[str, str]]:
+        """
+        connus : valeurs fraîches du cache ({champ: valeur}, "" = déjà cherché sans résultat) :
+        ces champs ne sont jamais redemandés aux fournisseurs.
+        Retour : (champs trouvés, nouveau statut, valeurs à mettre en cache).
+        """
+        trouves = {c: v for c, v in connus.items() if v and not contact.get(c)}
+        a_cacher: dict[str, str] = {}
+        cherches: set[str] = set()
+        en_echec: set[str] = set()
+        erreurs = 0
+        for fournisseur, limiteur in zip(self.fournisseurs, limiteurs):
+            manquants = [c for c in fournisseur.champs if not contact.get(c) and c not in trouves and c not in connus]
+            if not manquants:
+                continue
+            try:
+                resultat = await self._appeler(client, fournisseur, limiteur, contact)
+            except (ErreurTemporaire, httpx.HTTPError, ValueError):
+                erreurs += 1
+                en_echec.update(manquants)
+                self._compter(f"erreurs_{fournisseur.nom}")
+                continue
+            cherches.update(manquants)
+            for champ in manquants:
+                if resultat.get(champ):
+                    trouves[champ] = a_cacher[champ] = resultat[champ]
+
+        # Cache négatif : seulement si aucun fournisseur de ce champ n'a échoué
+        for champ in cherches - en_echec - trouves.keys():
+            a_cacher[champ] = ""
+
+        if trouves:
+            return trouves, ENRICHI, a_cacher
+        if erreurs:
+            return trouves, ERREUR_ENRICHISSEMENT, a_cacher
+        return trouves, NON_TROUVE, a_cacher
+
+    def _lire_cache(self, contacts: Mapping[Any, Mapping[str, str]]) -> dict[Any, dict[str, str]]:
+        """{cle: valeurs fraîches du cache} + stats hit / stale / miss par contact."""
+        if self.cache is None:
+            return {}
+        champs_possibles = {c for f in self.fournisseurs for c in f.champs}
+        en_cache = self.cache.lire(c.get("linkedin_slug", "") for c in contacts.values())
+
+        connus: dict[Any, dict[str, str]] = {}
+        for cle, contact in contacts.items():
+            entree = en_cache.get(contact.get("linkedin_slug", ""))
+            if entree is None:
+                self.cache.compter(MISS)
+                continue
+            frais = {c: v for c, (v, est_frais) in entree.items() if est_frais and c in champs_possibles}
+            manquants = {c for c in champs_possibles if not contact.get(c)}
+            self.cache.compter(HIT if manquants <= frais.keys() else STALE)
+            connus[cle] = frais
+        return connus
+
+    async def enrichir_contacts(
+        self,
+        contacts: Mapping[Any, Mapping[str, str]],
+        client: httpx.AsyncClient | None = None,
+    ) -> dict[Any, tuple[dict[str, str], str]]:
+        """{cle: contact} -> {cle: (champs trouvés, nouveau statut)}."""
+        limiteurs = [LimiteurDebit(f.requetes_par_seconde) for f in self.fournisseurs]
+        connus = self._lire_cache(contacts)
+        resultats: dict[Any, tuple[dict[str, str], str]] = {}
+        a_cacher: dict[str, dict[str, str]] = {}
+        file: asyncio.Queue = asyncio.Queue()
+        for cle in contacts:
+            file.put_nowait(cle)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    cle = file.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                contact = contacts[cle]
+                trouves, statut, nouveaux = await self._enrichir_contact(
+                    client, limiteurs, contact, connus.get(cle, {})
+                )
+                resultats[cle] = (trouves, statut)
+                if nouveaux and contact.get("linkedin_slug"):
+                    a_cacher.setdefault(contact["linkedin_slug"], {}).update(nouveaux)
+
+        # Un seul client (pool keep-alive) dimensionné sur la concurrence
+        propre_client = client is None
+        if propre_client:
+            limites = httpx.Limits(max_connections=self.concurrence, max_keepalive_connections=self.concurrence)
+            client = httpx.AsyncClient(timeout=self.timeout, limits=limites)
+        try:
+            nb_workers = min(self.concurrence, len(contacts)) or 1
+            await asyncio.gather(*(worker() for _ in range(nb_workers)))
+        finally:
+            if propre_client:
+                await client.aclose()
+            # Même interrompu, ce qui a été payé reste en cache
+            if self.cache is not None:
+                self.cache.ecrire(a_cacher)
+                self.cache.compacter()
+        return resultats
+
+
+# -----------------------------
+# DataFrame / fichiers
+# -----------------------------
+
+def enrichir_dataframe(df: pd.DataFrame, moteur: MoteurEnrichissement) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Remplit les champs vides des lignes à traiter (STATUTS_A_TRAITER) et fait avancer `statut`.
+    Retour : (copie enrichie, stats {contacts, enrichis, non_trouves, erreurs, reessais, requetes_<fournisseur>...})
+    """
+    if "statut" not in df.columns:
+        raise ValueError("Colonne 'statut' introuvable (fichier issu de 01_normalisation_linkedin.py attendu)")
+    df = df.copy()
+    for champ in CHAMPS_ENRICHIS:
+        if champ not in df.columns:
+            df[champ] = ""
+        df[champ] = df[champ].fillna("").astype(str)
+
+    a_traiter = df.index[df["statut"].isin(STATUTS_A_TRAITER)]
+    colonnes = [c for c in ("linkedin_slug", "linkedin_url", "nom_complet", *CHAMPS_ENRICHIS) if c in df.columns]
+    contacts = {
+        i: {c: ("" if pd.isna(v) else str(v)) for c, v in ligne.items()}
+        for i, ligne in df.loc[a_traiter, colonnes].iterrows()
+    }
+
+    moteur.stats = {}
+    resultats = asyncio.run(moteur.enrichir_contacts(contacts))
+
+    for i, (trouves, statut) in resultats.items():
+        for champ, valeur in trouves.items():
+            df.at[i, champ] = valeur
+        df.at[i, "statut"] = statut
+
+    statuts = [s for _, s in resultats.values()]
+    stats = {
+        "contacts": len(contacts),
+        "enrichis": statuts.count(ENRICHI),
+        "non_trouves": statuts.count(NON_TROUVE),
+        "erreurs": statuts.count(ERREUR_ENRICHISSEMENT),
+        "reessais": 0,
+        **moteur.stats,
+    }
+    if moteur.cache is not None:
+        stats.update({f"cache_{etat}": n for etat, n in moteur.cache.stats.items()})
+    return df, stats
+
+
+def enrichir_fichier(
+    entree: str | Path,
+    sortie: str | Path,
+    fournisseurs: Iterable[Fournisseur],
+    concurrence: int = NB_CONCURRENCE,
+    cache: CacheEnrichissement | None = None,
+) -> dict[str, int]:
+    """CSV du pipeline (ex: linkedin_propre_v1.csv) -> même CSV avec les champs complétés."""
+    entree = Path(entree)
+    if not entree.exists():
+        raise FileNotFoundError(f"Fichier introuvable : {entree}")
+    df = lire_csv(entree, keep_default_na=False)
+    df_enrichi, stats = enrichir_dataframe(df, MoteurEnrichissement(fournisseurs, concurrence=concurrence, cache=cache))
+
+    # Écriture atomique : la sortie peut être le fichier d'entrée
+    sortie = Path(sortie)
+    temp = sortie.with_name(sortie.name + ".part")
+    df_enrichi.to_csv(temp, index=False, encoding="utf-8-sig")
+    os.replace(temp, sortie)
+    return stats
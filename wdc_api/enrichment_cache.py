@@ -0,0 +1,181 @@
+# wdc_api/enrichment_cache.py
+# ===========================
+# Cache persistant (SQLite) des résultats d'enrichissement, clé = linkedin_slug
+# (extrait par 02_enrichissement_minimal.py).
+#
+# ~90 % des recherches d'une semaine sur l'autre sont des répétitions : les appels
+# fournisseurs (lents, facturés) ne sont refaits que pour les champs absents ou périmés.
+#
+# - une ligne par (slug, champ) : valeur + date de mise à jour
+# - TTL par champ (un email change plus vite qu'un secteur), cf. TTL_CHAMPS
+# - cache négatif : valeur "" = "cherché, rien trouvé" (TTL plus court, TTL_NEGATIF)
+# - taille bornée : au-delà de TAILLE_MAX slugs, les moins récemment utilisés sont supprimés
+# - lectures / écritures par lots (un aller-retour SQLite par TAILLE_LOT slugs)
+#
+# Statistiques (par contact) : hit = tous les champs manquants sont connus et frais
+# (aucun appel réseau), stale = entrée présente mais périmée, miss = slug inconnu.
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping
+
+# Fichier SQLite du cache
+CHEMIN_CACHE = os.getenv("WDC_ENRICH_CACHE", "enrichissement_cache.db")
+
+# Nombre max de slugs gardés (éviction LRU au-delà)
+TAILLE_MAX = int(os.getenv("WDC_ENRICH_CACHE_MAX", "200000"))
+
+_JOUR = 24 * 3600
+
+# Durée de validité d'une valeur trouvée, par champ (secondes)
+TTL_CHAMPS: dict[str, int] = {
+    "entreprise": 90 * _JOUR,
+    "secteur": 180 * _JOUR,
+    "email": 30 * _JOUR,
+    "telephone": 60 * _JOUR,
+    "site_web": 180 * _JOUR,
+    "reseaux_sociaux": 90 * _JOUR,
+}
+TTL_DEFAUT = 90 * _JOUR
+
+# Durée de validité d'un "rien trouvé" (cache négatif)
+TTL_NEGATIF = int(os.getenv("WDC_ENRICH_CACHE_TTL_NEGATIF", str(7 * _JOUR)))
+
+TAILLE_LOT = 500
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+class CacheEnrichissement:
+    """
+    Usage (cf. enrichment.MoteurEnrichissement) :
+        cache = CacheEnrichissement()
+        connus = cache.lire(slugs)              # {slug: {champ: (valeur, frais)}}
+        cache.ecrire({slug: {champ: valeur}})   # valeur "" = négatif
+        cache.compacter()
+    """
+
+    def __init__(self, chemin: str | Path = CHEMIN_CACHE, taille_max: int = TAILLE_MAX):
+        self.chemin = Path(chemin)
+        self.taille_max = taille_max
+        self.stats = {HIT: 0, STALE: 0, MISS: 0}
+        if self.chemin.parent != Path("."):
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    # -----------------------------
+    # SQLite
+    # -----------------------------
+
+    @contextmanager
+    def _connexion(self) -> Iterator[sqlite3.Connection]:
+        """Connexion le temps d'un bloc : commit (rollback si erreur) puis fermeture."""
+        con = sqlite3.connect(self.chemin, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _init_db(self) -> None:
+        with self._connexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS enrichissement (
+                    slug    TEXT NOT NULL,
+                    champ   TEXT NOT NULL,
+                    valeur  TEXT NOT NULL,
+                    maj_le  REAL NOT NULL,
+                    PRIMARY KEY (slug, champ)
+                ) WITHOUT ROWID
+                """
+            )
+            # Dernier accès par slug : sert à l'éviction LRU
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS acces (
+                    slug     TEXT PRIMARY KEY,
+                    acces_le REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_acces_le ON acces (acces_le)")
+
+    # -----------------------------
+    # API publique
+    # -----------------------------
+
+    @staticmethod
+    def est_frais(champ: str, valeur: str, maj_le: float, maintenant: float) -> bool:
+        ttl = TTL_CHAMPS.get(champ, TTL_DEFAUT) if valeur else TTL_NEGATIF
+        return maintenant - maj_le < ttl
+
+    def lire(self, slugs: Iterable[str]) -> dict[str, dict[str, tuple[str, bool]]]:
+        """{slug: {champ: (valeur, frais)}} pour les slugs présents (valeur "" = négatif)."""
+        slugs = list(dict.fromkeys(s for s in slugs if s))
+        maintenant = time.time()
+        resultat: dict[str, dict[str, tuple[str, bool]]] = {}
+        with self._connexion() as con:
+            for i in range(0, len(slugs), TAILLE_LOT):
+                lot = slugs[i:i + TAILLE_LOT]
+                marques = ",".join("?" * len(lot))
+                for slug, champ, valeur, maj_le in con.execute(
+                    f"SELECT slug, champ, valeur, maj_le FROM enrichissement WHERE slug IN ({marques})", lot
+                ):
+                    resultat.setdefault(slug, {})[champ] = (valeur, self.est_frais(champ, valeur, maj_le, maintenant))
+            con.executemany(
+                "UPDATE acces SET acces_le = ? WHERE slug = ?",
+                [(maintenant, s) for s in resultat],
+            )
+        return resultat
+
+    def ecrire(self, valeurs: Mapping[str, Mapping[str, str]]) -> None:
+        """Enregistre {slug: {champ: valeur}} ("" = cherché sans résultat)."""
+        maintenant = time.time()
+        lignes = [(s, c, v, maintenant) for s, champs in valeurs.items() if s for c, v in champs.items()]
+        if not lignes:
+            return
+        with self._connexion() as con:
+            con.executemany(
+                "INSERT INTO enrichissement (slug, champ, valeur, maj_le) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (slug, champ) DO UPDATE SET valeur = excluded.valeur, maj_le = excluded.maj_le",
+                lignes,
+            )
+            con.executemany(
+                "INSERT INTO acces (slug, acces_le) VALUES (?, ?) "
+                "ON CONFLICT (slug) DO UPDATE SET acces_le = excluded.acces_le",
+                [(s, maintenant) for s in valeurs if s],
+            )
+
+    def compacter(self) -> int:
+        """Éviction LRU au-delà de taille_max slugs. Retourne le nombre de slugs supprimés."""
+        with self._connexion() as con:
+            nb = con.execute("SELECT COUNT(*) FROM acces").fetchone()[0]
+            exces = nb - self.taille_max
+            if exces <= 0:
+                return 0
+            con.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS a_supprimer AS "
+                "SELECT slug FROM acces ORDER BY acces_le LIMIT ?",
+                (exces,),
+            )
+            con.execute("DELETE FROM enrichissement WHERE slug IN (SELECT slug FROM a_supprimer)")
+            con.execute("DELETE FROM acces WHERE slug IN (SELECT slug FROM a_supprimer)")
+            con.execute("DROP TABLE a_supprimer")
+        return exces
+
+    def compter(self, etat: str) -> None:
+        self.stats[etat] += 1
+
+    def taux(self) -> dict[str, float]:
+        """Part de hits / stale / miss sur les contacts vus depuis la création du cache."""
+        total = sum(self.stats.values())
+        return {etat: (n / total if total else 0.0) for etat, n in self.stats.items()}
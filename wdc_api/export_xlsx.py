@@ -0,0 +1,155 @@
+# wdc_api/export_xlsx.py
+# ======================
+# Export Excel des prospects recommandés pour les commerciaux (prospects_recommandes.xlsx),
+# à mémoire constante même pour 100k+ lignes.
+#
+# - classeur openpyxl en mode write_only : chaque ligne est écrite tout de suite dans le
+#   XML de sa feuille (fichier temporaire), rien n'est gardé en mémoire
+# - une feuille "recommandes" (tout) + une feuille par segment (business, tech...)
+# - colonnes typées : score en nombre, recommended en booléen (tri / filtres Excel corrects)
+# - en-tête figé + filtre automatique sur chaque feuille
+#
+# Utilisé par :
+# - tri_linkedin_plus.py (SortieXLSX, écrite avec les autres sorties, cf. wdc_api/sorties.py)
+# - GET /jobs/{job_id}/resultat.xlsx (csv_vers_xlsx : le CSV résultat est lu par morceaux)
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO, Sequence
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.filters import AutoFilter
+
+from wdc_api.csv_reader import lire_csv
+from wdc_api.sorties import Sortie
+
+FEUILLE_PRINCIPALE = "recommandes"
+
+# Colonnes exportées (même ordre que prospects_recommandes.csv)
+COLONNES_XLSX = ["name", "title", "sector", "segment", "recommended", "score", "raisons", "url"]
+
+# Largeur des colonnes (caractères) ; les autres : LARGEUR_DEFAUT
+LARGEURS = {"name": 28, "title": 60, "sector": 18, "segment": 12, "url": 50, "raisons": 10}
+LARGEUR_DEFAUT = 14
+
+# Lignes lues par morceau dans csv_vers_xlsx
+TAILLE_MORCEAU = 20_000
+
+_VRAI = {"true", "1", "vrai", "oui", "yes"}
+
+
+def _typer(lot: pd.DataFrame) -> pd.DataFrame:
+    """score -> entier, recommended -> booléen, valeurs manquantes -> cellule vide."""
+    lot = lot.copy()
+    if "score" in lot.columns:
+        lot["score"] = pd.to_numeric(lot["score"], errors="coerce").round().astype("Int64")
+    if "recommended" in lot.columns and lot["recommended"].dtype != bool:
+        lot["recommended"] = lot["recommended"].astype(str).str.strip().str.lower().isin(_VRAI)
+    lot = lot.astype(object)
+    return lot.where(lot.notna(), None)
+
+
+class ClasseurProspects:
+    """
+    Classeur write_only : ajouter() par lots (dans l'ordre), puis enregistrer().
+    Les feuilles de segment sont créées à la première ligne de ce segment.
+    """
+
+    def __init__(self, colonnes: Sequence[str], colonne_segment: str | None = "segment"):
+        self.colonnes = list(colonnes)
+        self.colonne_segment = colonne_segment if colonne_segment in self.colonnes else None
+        self._classeur = Workbook(write_only=True)
+        self._feuilles: dict[str, object] = {}
+        self._lignes: dict[str, int] = {}
+        self._feuille(FEUILLE_PRINCIPALE)
+
+    def _feuille(self, nom: str):
+        feuille = self._feuilles.get(nom)
+        if feuille is None:
+            # Titre Excel : 31 caractères max, sans []:*?/\
+            titre = "".join(c for c in nom if c not in '[]:*?/\\')[:31] or "sans_segment"
+            feuille = self._classeur.create_sheet(titre)
+            # Largeurs + volet figé : à poser AVANT la première ligne en mode write_only
+            for i, colonne in enumerate(self.colonnes, start=1):
+                feuille.column_dimensions[get_column_letter(i)].width = LARGEURS.get(colonne, LARGEUR_DEFAUT)
+            feuille.freeze_panes = "A2"
+            feuille.append(self.colonnes)
+            self._feuilles[nom] = feuille
+            self._lignes[nom] = 1
+        return feuille
+
+    def ajouter(self, lot: pd.DataFrame) -> None:
+        lot = _typer(lot[self.colonnes])
+        principale = self._feuille(FEUILLE_PRINCIPALE)
+        i_segment = self.colonnes.index(self.colonne_segment) if self.colonne_segment else None
+        for ligne in lot.itertuples(index=False, name=None):
+            principale.append(ligne)
+            self._lignes[FEUILLE_PRINCIPALE] += 1
+            if i_segment is not None and ligne[i_segment]:
+                segment = str(ligne[i_segment])
+                self._feuille(segment).append(ligne)
+                self._lignes[segment] += 1
+
+    @property
+    def lignes(self) -> dict[str, int]:
+        """Lignes de données par feuille (hors en-tête)."""
+        return {nom: n - 1 for nom, n in self._lignes.items()}
+
+    def enregistrer(self, destination: str | Path | IO[bytes]) -> None:
+        derniere = get_column_letter(len(self.colonnes))
+        for nom, feuille in self._feuilles.items():
+            feuille.auto_filter = AutoFilter(ref=f"A1:{derniere}{self._lignes[nom]}")
+        self._classeur.save(destination)
+
+
+class SortieXLSX(Sortie):
+    """Sortie (cf. wdc_api/sorties.py) : le classeur est enregistré à fermer()."""
+
+    def __init__(self, chemin: str | Path, colonne_segment: str | None = "segment"):
+        self.chemin = Path(chemin)
+        self.colonne_segment = colonne_segment
+        self._classeur: ClasseurProspects | None = None
+
+    def ouvrir(self, colonnes: Sequence[str]) -> None:
+        self._classeur = ClasseurProspects(colonnes, self.colonne_segment)
+
+    def ecrire_lot(self, lot: pd.DataFrame) -> None:
+        self._classeur.ajouter(lot)
+
+    def fermer(self) -> None:
+        temp = self.chemin.with_name(self.chemin.name + ".part")
+        self._classeur.enregistrer(temp)
+        temp.replace(self.chemin)
+
+
+def csv_vers_xlsx(
+    source: str | Path,
+    destination: str | Path | IO[bytes],
+    colonnes: Sequence[str] = COLONNES_XLSX,
+    recommandes_seulement: bool = True,
+    taille_morceau: int = TAILLE_MORCEAU,
+) -> dict[str, int]:
+    """
+    CSV (ex: résultat d'un job) -> classeur, lu par morceaux : mémoire bornée par taille_morceau.
+    recommandes_seulement : ne garde que les lignes recommended = True.
+    Retour : lignes par feuille.
+    """
+    classeur: ClasseurProspects | None = None
+    for morceau in lire_csv(source, keep_default_na=False, chunksize=taille_morceau):
+        morceau.columns = [str(c).strip() for c in morceau.columns]
+        if classeur is None:
+            manquantes = [c for c in colonnes if c not in morceau.columns]
+            if manquantes:
+                raise ValueError(f"{source} : colonnes manquantes pour l'export Excel : {manquantes}")
+            classeur = ClasseurProspects(colonnes)
+        if recommandes_seulement and "recommended" in morceau.columns:
+            morceau = morceau.loc[morceau["recommended"].str.strip().str.lower().isin(_VRAI)]
+        classeur.ajouter(morceau)
+
+    if classeur is None:  # CSV sans aucune ligne
+        classeur = ClasseurProspects(colonnes)
+    classeur.enregistrer(destination)
+    return classeur.lignes
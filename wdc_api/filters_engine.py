@@ -0,0 +1,432 @@
+"""
+wdc_api/filters_engine.py
+
+Moteur de filtres déclaratifs (sections "filtres", "scoring" et "custom_filters" de default.json).
+
+Une config est compilée une fois en ProgrammeFiltres, qu'on peut ensuite :
+- évaluer sur un DataFrame en colonnes (masques booléens vectorisés, pas de boucle par ligne)
+- traduire en SQL (WHERE + expression de score) pour PostgreSQL ou SQLite :
+  le filtrage se fait dans la base, sans rapatrier les lignes en Python
+
+Ce qui est compilé :
+- filtres.*  : secteurs_inclus / metiers_inclus -> on garde si le champ contient un mot-clé
+               secteurs_exclus / metiers_exclus -> on exclut si le champ contient un mot-clé
+               seniority_decisionnaire          -> bonus de score uniquement
+               + points correspondants de scoring.points (secteur_inclus, metier_exclus, ...)
+- custom_filters.filters : conditions combinables (et / ou / non) sur n'importe quel champ,
+               action "garder", "exclure" ou "score" (+ points)
+- scoring.seuils.prospect_min : on garde si score_filtres >= seuil
+
+Format d'une condition (custom_filters) :
+    {"et": [cond, ...]}  {"ou": [cond, ...]}  {"non": cond}
+    {"champ": "poste", "contient": ["ceo", "gérant"]}   (insensible casse / accents)
+    {"champ": "segment", "egal": "tech"}                (ou une liste de valeurs)
+    {"champ": "score", "min": 30, "max": 100}           (bornes numériques incluses)
+    {"champ": "email", "vide": false}
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+import sqlite3
+
+import pandas as pd
+
+from wdc_api.configs.loader import ACTIONS_FILTRE, OPERATEURS_FILTRE
+from wdc_api.rules_engine import CacheMasques, _norm_txt, _regex_mots_cles
+
+
+# Bloc de config["filtres"] -> (champ logique, mode, clé de scoring.points)
+BLOCS_FILTRES: Dict[str, Tuple[str, Optional[str], str]] = {
+    "secteurs_inclus": ("secteur", "garder", "secteur_inclus"),
+    "secteurs_exclus": ("secteur", "exclure", "secteur_exclus"),
+    "metiers_inclus": ("poste", "garder", "metier_inclus"),
+    "metiers_exclus": ("poste", "exclure", "metier_exclus"),
+    "seniority_decisionnaire": ("poste", None, "seniority_decisionnaire"),
+}
+
+# Champs logiques -> colonnes de la table prospects (PostgreSQL public.prospects
+# et table SQLite générée par tri_linkedin_plus.py)
+COLONNES_PROSPECTS: Dict[str, str] = {
+    "nom": "name",
+    "poste": "title",
+    "secteur": "sector",
+    "url": "url",
+    "email": "email",
+    "telephone": "phone",
+    "localisation": "city",
+    "pays": "country",
+    "segment": "segment",
+    "score": "score",
+}
+
+
+# -----------------------------
+# Arbre de conditions compilé
+# -----------------------------
+
+@dataclass(frozen=True)
+class Condition:
+    """Feuille : un opérateur sur un champ."""
+
+    champ: str
+    operateur: str
+    valeur: Any
+
+
+@dataclass(frozen=True)
+class Et:
+    enfants: Tuple["Noeud", ...]
+
+
+@dataclass(frozen=True)
+class Ou:
+    enfants: Tuple["Noeud", ...]
+
+
+@dataclass(frozen=True)
+class Non:
+    enfant: "Noeud"
+
+
+Noeud = Union[Condition, Et, Ou, Non]
+
+
+@dataclass(frozen=True)
+class FiltreCompile:
+    """Un filtre (bloc filtres.* ou custom filter) : condition + action + points."""
+
+    id: str
+    condition: Noeud
+    action: Optional[str]  # "garder", "exclure" ou None (score seul)
+    points: int = 0
+
+
+@dataclass(frozen=True)
+class ProgrammeFiltres:
+    """Filtres compilés d'une config, évaluables en pandas ou en SQL."""
+
+    filtres: Tuple[FiltreCompile, ...]
+    seuil: Optional[float] = None
+
+
+def compiler_condition(cond: Any) -> Noeud:
+    """Dict de condition (cf. docstring du module) -> arbre Noeud. ValueError si mal formé."""
+    if not isinstance(cond, dict):
+        raise ValueError(f"Condition invalide (objet attendu) : {cond!r}")
+
+    if "et" in cond or "ou" in cond:
+        cle = "et" if "et" in cond else "ou"
+        enfants = cond[cle]
+        if not isinstance(enfants, list):
+            raise ValueError(f"'{cle}' doit contenir une liste de conditions")
+        noeuds = tuple(compiler_condition(e) for e in enfants)
+        return Et(noeuds) if cle == "et" else Ou(noeuds)
+
+    if "non" in cond:
+        return Non(compiler_condition(cond["non"]))
+
+    champ = cond.get("champ")
+    if not isinstance(champ, str) or not champ:
+        raise ValueError(f"Condition sans 'champ' : {cond!r}")
+
+    ops = [op for op in OPERATEURS_FILTRE if op in cond]
+    if not ops:
+        raise ValueError(f"Condition sans opérateur ({', '.join(OPERATEURS_FILTRE)}) : {cond!r}")
+
+    # min + max ensemble = intervalle
+    if set(ops) == {"min", "max"}:
+        return Et((Condition(champ, "min", float(cond["min"])), Condition(champ, "max", float(cond["max"]))))
+    if len(ops) > 1:
+        raise ValueError(f"Un seul opérateur par condition : {cond!r}")
+
+    op = ops[0]
+    valeur = cond[op]
+    if op == "contient":
+        mots = valeur if isinstance(valeur, list) else [valeur]
+        valeur = tuple(m for m in (_norm_txt(m) for m in mots) if m)
+    elif op == "egal":
+        valeur = tuple(valeur) if isinstance(valeur, list) else (valeur,)
+    elif op in ("min", "max"):
+        valeur = float(valeur)
+    elif op == "vide":
+        valeur = bool(valeur)
+    return Condition(champ, op, valeur)
+
+
+def compiler_filtres(config: Dict[str, Any]) -> ProgrammeFiltres:
+    """Compile filtres.* + custom_filters.filters + scoring.seuils.prospect_min."""
+    scoring = config.get("scoring", {}) or {}
+    points = scoring.get("points", {}) or {}
+    filtres: List[FiltreCompile] = []
+
+    for nom, (champ, mode, cle_points) in BLOCS_FILTRES.items():
+        bloc = (config.get("filtres", {}) or {}).get(nom)
+        if not isinstance(bloc, dict) or not bloc.get("actif", False):
+            continue
+        condition = compiler_condition({"champ": champ, "contient": bloc.get("mots_cles", [])})
+        filtres.append(FiltreCompile(nom, condition, mode, int(points.get(cle_points, 0))))
+
+    for i, f in enumerate((config.get("custom_filters", {}) or {}).get("filters", [])):
+        if not f.get("actif", True):
+            continue
+        action = f.get("action", "garder")
+        if action not in ACTIONS_FILTRE:
+            raise ValueError(f"Action de filtre inconnue : {action!r}")
+        filtres.append(
+            FiltreCompile(
+                id=f.get("id", f"custom_{i}"),
+                condition=compiler_condition(f.get("condition")),
+                action=None if action == "score" else action,
+                points=int(f.get("points", 0)),
+            )
+        )
+
+    seuil = (scoring.get("seuils", {}) or {}).get("prospect_min")
+    return ProgrammeFiltres(filtres=tuple(filtres), seuil=None if seuil is None else float(seuil))
+
+
+# -----------------------------
+# Évaluation pandas (colonnes)
+# -----------------------------
+
+def _masque_noeud(noeud: Noeud, cache: CacheMasques) -> pd.Series:
+    df = cache.df
+    if isinstance(noeud, Et):
+        m = pd.Series(True, index=df.index)
+        for e in noeud.enfants:
+            m &= _masque_noeud(e, cache)
+        return m
+    if isinstance(noeud, Ou):
+        m = pd.Series(False, index=df.index)
+        for e in noeud.enfants:
+            m |= _masque_noeud(e, cache)
+        return m
+    if isinstance(noeud, Non):
+        return ~_masque_noeud(noeud.enfant, cache)
+
+    # Champ absent du DataFrame = colonne vide (comme normaliser_colonnes)
+    if noeud.champ not in df.columns:
+        return pd.Series(noeud.operateur == "vide" and noeud.valeur, index=df.index)
+
+    if noeud.operateur == "contient":
+        rx = _regex_mots_cles(list(noeud.valeur))
+        if rx is None:
+            return pd.Series(False, index=df.index)
+        return cache.masque(noeud.champ, rx)
+
+    if noeud.operateur == "egal":
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in noeud.valeur):
+            return pd.to_numeric(df[noeud.champ], errors="coerce").isin(noeud.valeur)
+        return cache.norm(noeud.champ).isin([_norm_txt(v) for v in noeud.valeur])
+
+    if noeud.operateur in ("min", "max"):
+        num = pd.to_numeric(df[noeud.champ], errors="coerce")
+        return (num >= noeud.valeur) if noeud.operateur == "min" else (num <= noeud.valeur)
+
+    # vide
+    vide = cache.norm(noeud.champ) == ""
+    return vide if noeud.valeur else ~vide
+
+
+def evaluer_filtres(
+    df: pd.DataFrame,
+    programme: ProgrammeFiltres,
+    cache: Optional[CacheMasques] = None,
+) -> pd.DataFrame:
+    """
+    Évalue le programme sur df (colonnes logiques : poste, secteur, ...).
+
+    Retour (aligné sur df.index) :
+    - score_filtres : somme des points des filtres dont la condition est vraie
+    - garde_filtres : True si la ligne passe tous les filtres garder/exclure + le seuil
+    """
+    cache = cache if cache is not None and cache.df is df else CacheMasques(df)
+    score = pd.Series(0, index=df.index, dtype="int64")
+    garde = pd.Series(True, index=df.index)
+
+    for f in programme.filtres:
+        m = _masque_noeud(f.condition, cache)
+        if f.points:
+            score += m.astype("int64") * f.points
+        if f.action == "garder":
+            garde &= m
+        elif f.action == "exclure":
+            garde &= ~m
+
+    if programme.seuil is not None:
+        garde &= score >= programme.seuil
+
+    return pd.DataFrame({"score_filtres": score, "garde_filtres": garde}, index=df.index)
+
+
+def filtrer_dataframe(df: pd.DataFrame, programme: ProgrammeFiltres) -> pd.DataFrame:
+    """Lignes gardées + colonne score_filtres."""
+    res = evaluer_filtres(df, programme)
+    return df.loc[res["garde_filtres"]].assign(score_filtres=res.loc[res["garde_filtres"], "score_filtres"])
+
+
+# -----------------------------
+# Traduction SQL
+# -----------------------------
+
+@dataclass(frozen=True)
+class RequeteSQL:
+    """Fragments SQL + paramètres (dans l'ordre des placeholders)."""
+
+    where: str
+    where_params: Tuple[Any, ...]
+    score: str
+    score_params: Tuple[Any, ...]
+
+
+def _placeholder(dialecte: str) -> str:
+    if dialecte == "postgresql":
+        return "%s"  # paramstyle psycopg2
+    if dialecte == "sqlite":
+        return "?"
+    raise ValueError(f"Dialecte SQL inconnu : {dialecte} (postgresql ou sqlite)")
+
+
+def _colonne(champ: str, colonnes: Mapping[str, str]) -> str:
+    # Liste blanche : seuls les champs mappés deviennent des identifiants SQL
+    if champ not in colonnes:
+        raise ValueError(f"Champ '{champ}' sans colonne SQL (mapping : {sorted(colonnes)})")
+    return _identifiant(colonnes[champ])
+
+
+def _identifiant(nom: str) -> str:
+    return '"' + nom.replace('"', '""') + '"'
+
+
+def _expr_norm(col: str, dialecte: str) -> str:
+    """Même normalisation que _norm_txt côté base (minuscules, sans accents)."""
+    if dialecte == "postgresql":
+        # Fonction SQL créée par wdc_api.rules_sql.preparer_schema (unaccent + lower),
+        # même expression que les index trigram : les LIKE '%mot%' peuvent les utiliser
+        return f"public.wdc_norm({col}::text)"
+    # SQLite : fonction Python enregistrée par enregistrer_fonctions_sqlite()
+    return f"wdc_norm({col})"
+
+
+def _table(table: str) -> str:
+    """'public.prospects' -> '"public"."prospects"'."""
+    return ".".join(_identifiant(p) for p in table.split("."))
+
+
+def _echapper_like(mot: str) -> str:
+    return mot.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _sql_noeud(noeud: Noeud, dialecte: str, colonnes: Mapping[str, str]) -> Tuple[str, List[Any]]:
+    ph = _placeholder(dialecte)
+
+    if isinstance(noeud, (Et, Ou)):
+        if not noeud.enfants:
+            return ("1=1" if isinstance(noeud, Et) else "1=0"), []
+        parts, params = [], []
+        for e in noeud.enfants:
+            sql, p = _sql_noeud(e, dialecte, colonnes)
+            parts.append(f"({sql})")
+            params += p
+        return (" AND " if isinstance(noeud, Et) else " OR ").join(parts), params
+    if isinstance(noeud, Non):
+        sql, p = _sql_noeud(noeud.enfant, dialecte, colonnes)
+        return f"NOT ({sql})", p
+
+    # Champ sans colonne SQL = colonne vide, comme un champ absent du DataFrame côté pandas
+    if noeud.champ not in colonnes:
+        return ("1=1" if noeud.operateur == "vide" and noeud.valeur else "1=0"), []
+
+    col = _colonne(noeud.champ, colonnes)
+
+    if noeud.operateur == "contient":
+        if not noeud.valeur:
+            return "1=0", []
+        norm = _expr_norm(col, dialecte)
+        sql = " OR ".join(f"{norm} LIKE {ph} ESCAPE '\\'" for _ in noeud.valeur)
+        return sql, [f"%{_echapper_like(m)}%" for m in noeud.valeur]
+
+    if noeud.operateur == "egal":
+        phs = ", ".join(ph for _ in noeud.valeur)
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in noeud.valeur):
+            return f"{col} IN ({phs})", list(noeud.valeur)
+        return f"{_expr_norm(col, dialecte)} IN ({phs})", [_norm_txt(v) for v in noeud.valeur]
+
+    if noeud.operateur in ("min", "max"):
+        # NULL >= x est NULL -> faux dans un WHERE, comme NaN côté pandas
+        return f"{col} {'>=' if noeud.operateur == 'min' else '<='} {ph}", [noeud.valeur]
+
+    # vide : même test que pandas (texte normalisé vide : NULL, "", espaces seuls)
+    sql = f"{_expr_norm(col, dialecte)} = ''"
+    return (sql if noeud.valeur else f"NOT ({sql})"), []
+
+
+def vers_sql(
+    programme: ProgrammeFiltres,
+    dialecte: str = "postgresql",
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> RequeteSQL:
+    """
+    Traduit le programme en fragments SQL :
+    - score : somme de CASE WHEN <condition> THEN points ELSE 0 END
+    - where : filtres garder / exclure + seuil sur le score
+    """
+    score_parts: List[str] = []
+    score_params: List[Any] = []
+    where_parts: List[str] = []
+    where_params: List[Any] = []
+
+    for f in programme.filtres:
+        sql, params = _sql_noeud(f.condition, dialecte, colonnes)
+        if f.points:
+            score_parts.append(f"CASE WHEN {sql} THEN {int(f.points)} ELSE 0 END")
+            score_params += params
+        if f.action == "garder":
+            where_parts.append(f"({sql})")
+            where_params += params
+        elif f.action == "exclure":
+            where_parts.append(f"NOT ({sql})")
+            where_params += params
+
+    score_sql = " + ".join(score_parts) if score_parts else "0"
+    if programme.seuil is not None:
+        where_parts.append(f"({score_sql}) >= {_placeholder(dialecte)}")
+        where_params += score_params + [programme.seuil]
+
+    return RequeteSQL(
+        where=" AND ".join(where_parts) if where_parts else "1=1",
+        where_params=tuple(where_params),
+        score=score_sql,
+        score_params=tuple(score_params),
+    )
+
+
+def requete_selection(
+    programme: ProgrammeFiltres,
+    table: str = "prospects",
+    dialecte: str = "postgresql",
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> Tuple[str, Tuple[Any, ...]]:
+    """SELECT *, score_filtres FROM <table> WHERE ... -> (sql, params)."""
+    req = vers_sql(programme, dialecte, colonnes)
+    sql = f"SELECT *, ({req.score}) AS score_filtres FROM {_table(table)} WHERE {req.where}"
+    return sql, req.score_params + req.where_params
+
+
+def enregistrer_fonctions_sqlite(con: sqlite3.Connection) -> None:
+    """Enregistre wdc_norm() (équivalent SQLite de _norm_txt) sur une connexion."""
+    con.create_function("wdc_norm", 1, _norm_txt, deterministic=True)
+
+
+def filtrer_sqlite(
+    con: sqlite3.Connection,
+    programme: ProgrammeFiltres,
+    table: str = "prospects",
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> List[sqlite3.Row]:
+    """Exécute le programme directement dans SQLite (ex: prospects.db de tri_linkedin_plus)."""
+    enregistrer_fonctions_sqlite(con)
+    sql, params = requete_selection(programme, table, "sqlite", colonnes)
+    return con.execute(sql, params).fetchall()
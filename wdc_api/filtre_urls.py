@@ -0,0 +1,129 @@
+# wdc_api/filtre_urls.py
+# ======================
+# Filtre de Bloom (en mémoire) des URLs de public.prospects, pour POST /prospects/lookup.
+#
+# La plupart des URLs vérifiées par le CRM / l'extension navigateur sont NOUVELLES :
+# le filtre répond "absent à coup sûr" sans toucher à la base ; seules les URLs
+# "peut-être présentes" (présentes + ~TAUX_FAUX_POSITIFS des absentes) vont en SQL.
+#
+# - tableau de bits numpy, k positions par URL (double hachage sur un blake2b de 16 octets)
+# - dimensionné pour MARGE x le nombre d'URLs au taux de faux positifs visé
+# - reconstruit (SELECT url FROM public.prospects) :
+#   * quand la sync publie un nouveau snapshot (pointeur de wdc_api/snapshot.py modifié)
+#   * après une écriture hors sync dans ce processus (crud.create_prospect, re-scoring :
+#     snapshot.generation_ecritures() change, qu'un pointeur existe ou non)
+#   * au plus tard toutes les DUREE_VIE secondes (écritures hors sync)
+#   Pendant une reconstruction, le filtre périmé n'est PAS utilisé (il pourrait
+#   manquer des URLs ajoutées) : tout passe par la base, rien n'est jamais faux.
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from wdc_api.metrics import RECONSTRUCTIONS_FILTRE_URLS
+from wdc_api.snapshot import DOSSIER_SNAPSHOTS, POINTEUR, generation_ecritures
+
+logger = logging.getLogger("wdc_api.filtre_urls")
+
+# Taux de faux positifs visé
+TAUX_FAUX_POSITIFS = float(os.getenv("WDC_LOOKUP_BLOOM_FP", "0.01"))
+
+# Durée de vie max du filtre (secondes)
+DUREE_VIE = float(os.getenv("WDC_LOOKUP_BLOOM_TTL", "300"))
+
+# Marge de dimensionnement (URLs ajoutées entre deux reconstructions)
+MARGE = 1.5
+TAILLE_MIN = 1024
+
+
+class FiltreBloom:
+    """Ensemble probabiliste : `x in filtre` False = absent à coup sûr, True = peut-être présent."""
+
+    def __init__(self, capacite: int, taux_faux_positifs: float = TAUX_FAUX_POSITIFS):
+        capacite = max(1, capacite)
+        self.nb_bits = max(TAILLE_MIN, int(math.ceil(-capacite * math.log(taux_faux_positifs) / math.log(2) ** 2)))
+        self.nb_hachages = max(1, round(self.nb_bits / capacite * math.log(2)))
+        self._bits = np.zeros((self.nb_bits + 7) // 8, dtype=np.uint8)
+        self.nb_elements = 0
+
+    def _positions(self, valeur: str) -> list[int]:
+        d = hashlib.blake2b(valeur.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        return [(h1 + i * h2) % self.nb_bits for i in range(self.nb_hachages)]
+
+    def ajouter(self, valeur: str) -> None:
+        for p in self._positions(valeur):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.nb_elements += 1
+
+    def __contains__(self, valeur: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(valeur))
+
+
+def _signature_snapshot() -> tuple:
+    """Pointeur du snapshot (None si absent) + génération des écritures hors sync."""
+    try:
+        st = (DOSSIER_SNAPSHOTS / POINTEUR).stat()
+        pointeur: Optional[tuple] = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        pointeur = None
+    return (pointeur, generation_ecritures())
+
+
+class FiltreUrls:
+    """
+    Filtre de Bloom des URLs connues, reconstruit en tâche de fond.
+
+    lire_urls : fonction qui renvoie toutes les URLs de public.prospects (cf. crud.lister_urls)
+    """
+
+    def __init__(self, lire_urls: Callable[[], Iterable[str]]):
+        self.lire_urls = lire_urls
+        self._filtre: Optional[FiltreBloom] = None
+        self._signature: Optional[tuple] = None
+        self._construit_le = 0.0
+        self._verrou = threading.Lock()
+        self._en_cours = False
+
+    def _reconstruire(self) -> None:
+        try:
+            # Instant et signature AVANT la lecture : une URL insérée pendant la lecture
+            # sera vue à la prochaine reconstruction
+            debut, signature = time.monotonic(), _signature_snapshot()
+            urls = list(self.lire_urls())
+            filtre = FiltreBloom(int(len(urls) * MARGE) + TAILLE_MIN)
+            for url in urls:
+                filtre.ajouter(url)
+            with self._verrou:
+                self._filtre, self._signature, self._construit_le = filtre, signature, debut
+            RECONSTRUCTIONS_FILTRE_URLS.inc("ok")
+        except Exception:  # base indisponible : pas de filtre, les lookups passent par la base
+            RECONSTRUCTIONS_FILTRE_URLS.inc("erreur")
+            logger.exception("Reconstruction du filtre de Bloom des URLs impossible")
+        finally:
+            with self._verrou:
+                self._en_cours = False
+
+    def courant(self) -> Optional[FiltreBloom]:
+        """Le filtre s'il est à jour, sinon None (et reconstruction lancée en tâche de fond)."""
+        with self._verrou:
+            a_jour = (
+                self._filtre is not None
+                and self._signature == _signature_snapshot()
+                and time.monotonic() - self._construit_le < DUREE_VIE
+            )
+            if a_jour:
+                return self._filtre
+            if not self._en_cours:
+                self._en_cours = True
+                threading.Thread(target=self._reconstruire, daemon=True, name="filtre-urls").start()
+            return None
@@ -0,0 +1,355 @@
+# wdc_api/gazetteer.py
+# ====================
+# Registre local d'entreprises (dump type SIRENE) pour trouver l'entreprise et le
+# vrai secteur (code NAF) d'un contact à partir de son titre ("Gérant chez X").
+#
+#   python -m wdc_api.cli gazetteer build StockUniteLegale_utf8.csv   # une fois par mise à jour du dump
+#   python -m wdc_api.cli gazetteer match linkedin_propre_v1.csv      # à chaque run, sans réseau
+#
+# Charger un registre de plusieurs Go dans pandas à chaque run n'est pas viable :
+# - build : le CSV est lu par morceaux, les noms normalisés sont triés (tri externe :
+#   morceaux triés sur disque puis fusion), et écrits dans UN fichier index :
+#     en-tête | offsets (uint64, un par entrée) | entrées "cle\x1fsiren\x1fnaf\x1fnom\n"
+# - match : l'index est ouvert en mmap (chargement instantané, rien en RAM hors pages
+#   lues par l'OS) et chaque nom est cherché par dichotomie (~25 comparaisons pour
+#   30 millions d'entrées), une fois par titre distinct
+#
+# Une clé = nom normalisé (minuscules, sans accents ni ponctuation ni forme juridique).
+# Pour une même clé, l'entreprise active (etat "A") gagne, puis le plus petit SIREN.
+
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from wdc_api.classification import COLONNES_CONTACT, find_col
+from wdc_api.csv_reader import colonnes_candidates, detecter_format, lire_csv
+
+# Fichier index par défaut
+CHEMIN_INDEX = os.getenv("WDC_GAZETTEER_INDEX", "registre_entreprises.idx")
+
+# Entrées triées en mémoire avant d'écrire un morceau sur disque (tri externe)
+TAILLE_MORCEAU = int(os.getenv("WDC_GAZETTEER_CHUNK", "1000000"))
+
+MAGIC = b"WDCGAZ01"
+_ENTETE = struct.Struct("<8sQ")  # magic, nombre d'entrées
+_SEP = b"\x1f"
+
+# Colonnes du registre -> mots-clés (find_col) ; noms SIRENE en premier
+COLONNES_REGISTRE: dict[str, list[str]] = {
+    "nom": ["denominationunitelegale", "denomination", "raison sociale", "raison_sociale", "nom", "name"],
+    "sigle": ["sigleunitelegale", "sigle"],
+    "naf": ["activiteprincipaleunitelegale", "activiteprincipale", "naf", "ape"],
+    "siren": ["siren", "siret"],
+    "etat": ["etatadministratifunitelegale", "etatadministratif"],
+}
+
+# Formes juridiques ignorées dans les noms ("ACME SAS" = "Acme")
+FORMES_JURIDIQUES = {
+    "sa", "sas", "sasu", "sarl", "eurl", "sci", "snc", "scop", "sca", "scs",
+    "selarl", "selas", "sel", "ei", "eirl", "gie", "scm", "scp",
+}
+
+# Clé trop courte = trop ambiguë ("la", "ab"...)
+LONGUEUR_MIN_CLE = 3
+
+# Sections NAF rév. 2 : (première division, dernière division, libellé)
+SECTIONS_NAF: list[tuple[int, int, str]] = [
+    (1, 3, "Agriculture, sylviculture et pêche"),
+    (5, 9, "Industries extractives"),
+    (10, 33, "Industrie manufacturière"),
+    (35, 35, "Énergie"),
+    (36, 39, "Eau, assainissement, déchets"),
+    (41, 43, "Construction"),
+    (45, 47, "Commerce"),
+    (49, 53, "Transports et entreposage"),
+    (55, 56, "Hébergement et restauration"),
+    (58, 63, "Information et communication"),
+    (64, 66, "Finance et assurance"),
+    (68, 68, "Immobilier"),
+    (69, 75, "Activités spécialisées, scientifiques et techniques"),
+    (77, 82, "Services administratifs et de soutien"),
+    (84, 84, "Administration publique"),
+    (85, 85, "Enseignement"),
+    (86, 88, "Santé humaine et action sociale"),
+    (90, 93, "Arts, spectacles et activités récréatives"),
+    (94, 96, "Autres activités de services"),
+    (97, 98, "Ménages employeurs"),
+    (99, 99, "Organisations extraterritoriales"),
+]
+
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# "Gérant chez X", "CEO at X", "Fondateur @ X" : X = reste du titre
+# ("Directeur de la communication" : pas d'entreprise, "de" n'est volontairement pas pris)
+_RE_ENTREPRISE_TITRE = re.compile(r"(?:\bchez\b|\bat\b|@)\s*(.+)$", re.IGNORECASE)
+
+# Fin du nom d'entreprise dans un titre : "X | Conseil", "X - Paris", "X, expert..."
+_RE_FIN_ENTREPRISE = re.compile(r"\s*(?:[|•·,;(]|\s[-–—]\s)")
+
+
+@dataclass(frozen=True)
+class Entreprise:
+    """Entrée du registre trouvée pour un nom."""
+
+    siren: str
+    naf: str
+    nom: str
+
+    @property
+    def secteur(self) -> str:
+        return secteur_naf(self.naf)
+
+
+# -----------------------------
+# Normalisation
+# -----------------------------
+
+def normaliser_nom_entreprise(nom: str) -> str:
+    """ "ACME Conseil S.A.S." -> "acme conseil" (clé de l'index)."""
+    if not isinstance(nom, str):
+        return ""
+    texte = unicodedata.normalize("NFKD", nom).encode("ascii", "ignore").decode("ascii").lower()
+    texte = texte.replace("&", " et ").replace(".", "")
+    mots = [m for m in _RE_NON_ALNUM.split(texte) if m and m not in FORMES_JURIDIQUES]
+    return " ".join(mots)
+
+
+def secteur_naf(naf: str) -> str:
+    """ "62.01Z" -> "Information et communication" ("" si code inconnu)."""
+    chiffres = "".join(c for c in str(naf or "")[:3] if c.isdigit())[:2]
+    if len(chiffres) != 2:
+        return ""
+    division = int(chiffres)
+    for debut, fin, libelle in SECTIONS_NAF:
+        if debut <= division <= fin:
+            return libelle
+    return ""
+
+
+def extraire_entreprise(titre: str) -> str:
+    """ "Gérant chez Boulangerie Martin | Artisan" -> "Boulangerie Martin" ("" si aucun)."""
+    if not isinstance(titre, str):
+        return ""
+    m = _RE_ENTREPRISE_TITRE.search(titre)
+    if not m:
+        return ""
+    return _RE_FIN_ENTREPRISE.split(m.group(1), maxsplit=1)[0].strip()
+
+
+def cles_candidates(titre: str) -> list[str]:
+    """Clés à essayer pour un titre, de la plus longue à la plus courte ("acme conseil paris", "acme conseil", "acme")."""
+    mots = normaliser_nom_entreprise(extraire_entreprise(titre)).split()
+    cles = [" ".join(mots[:n]) for n in range(len(mots), 0, -1)]
+    return [c for c in cles if len(c) >= LONGUEUR_MIN_CLE]
+
+
+# -----------------------------
+# Construction de l'index
+# -----------------------------
+
+def _nettoyer_champ(valeur: str) -> bytes:
+    return str(valeur or "").replace("\x1f", " ").replace("\n", " ").replace("\r", " ").strip().encode("utf-8")
+
+
+def _entrees_registre(registre: Path) -> Iterator[bytes]:
+    """Lignes "cle\x1frang\x1fsiren\x1fnaf\x1fnom\n" (non triées) lues par morceaux."""
+    fmt = detecter_format(registre)
+    trouvees = colonnes_candidates(fmt.colonnes, COLONNES_REGISTRE)
+    if not trouvees["nom"] or not trouvees["naf"]:
+        raise ValueError(f"{registre} : colonnes nom / NAF introuvables (colonnes : {list(fmt.colonnes)})")
+
+    usecols = [c for c in trouvees.values() if c]
+    for morceau in lire_csv(registre, usecols=usecols, fmt=fmt, keep_default_na=False, chunksize=200_000):
+        morceau.columns = [str(c).strip() for c in morceau.columns]
+        colonne = {logique: (morceau[c] if c else pd.Series("", index=morceau.index)) for logique, c in trouvees.items()}
+        # rang 0 = active : trié avant les entreprises cessées pour une même clé
+        rangs = np.where(colonne["etat"].str.upper().eq("C"), "1", "0")
+        for nom, sigle, naf, siren, rang in zip(colonne["nom"], colonne["sigle"], colonne["naf"], colonne["siren"], rangs):
+            suite = _SEP.join((b"", rang.encode(), _nettoyer_champ(siren), _nettoyer_champ(naf), _nettoyer_champ(nom))) + b"\n"
+            for source in (nom, sigle):
+                cle = normaliser_nom_entreprise(source)
+                if len(cle) >= LONGUEUR_MIN_CLE:
+                    yield cle.encode("ascii") + suite
+
+
+def _ecrire_morceau(lignes: list[bytes], dossier: str) -> str:
+    lignes.sort()
+    with tempfile.NamedTemporaryFile("wb", dir=dossier, suffix=".run", delete=False) as f:
+        f.writelines(lignes)
+        return f.name
+
+
+def construire_index(registre: str | Path, sortie: str | Path = CHEMIN_INDEX) -> int:
+    """
+    Construit l'index trié depuis un CSV de registre (tri externe, mémoire bornée).
+    Retour : nombre de clés distinctes indexées.
+    """
+    registre, sortie = Path(registre), Path(sortie)
+    if not registre.exists():
+        raise FileNotFoundError(f"Registre introuvable : {registre}")
+
+    with tempfile.TemporaryDirectory(dir=sortie.parent if str(sortie.parent) else None) as dossier:
+        # 1) Morceaux triés sur disque
+        morceaux: list[str] = []
+        lignes: list[bytes] = []
+        for ligne in _entrees_registre(registre):
+            lignes.append(ligne)
+            if len(lignes) >= TAILLE_MORCEAU:
+                morceaux.append(_ecrire_morceau(lignes, dossier))
+                lignes = []
+        if lignes:
+            morceaux.append(_ecrire_morceau(lignes, dossier))
+
+        # 2) Fusion : une entrée par clé (la mieux classée), offsets à part
+        chemin_donnees = os.path.join(dossier, "donnees")
+        chemin_offsets = os.path.join(dossier, "offsets")
+        fichiers = [open(m, "rb") for m in morceaux]
+        nb = 0
+        try:
+            with open(chemin_donnees, "wb") as donnees, open(chemin_offsets, "wb") as offsets:
+                position = 0
+                precedente = None
+                for ligne in heapq.merge(*fichiers):
+                    cle, _, reste = ligne.partition(_SEP)
+                    if cle == precedente:
+                        continue
+                    precedente = cle
+                    entree = cle + _SEP + reste.partition(_SEP)[2]  # sans le rang
+                    offsets.write(struct.pack("<Q", position))
+                    donnees.write(entree)
+                    position += len(entree)
+                    nb += 1
+        finally:
+            for f in fichiers:
+                f.close()
+
+        # 3) Fichier final (écriture atomique)
+        temp = sortie.with_name(sortie.name + ".part")
+        with open(temp, "wb") as f:
+            f.write(_ENTETE.pack(MAGIC, nb))
+            for chemin in (chemin_offsets, chemin_donnees):
+                with open(chemin, "rb") as source:
+                    while bloc := source.read(1024 * 1024):
+                        f.write(bloc)
+        os.replace(temp, sortie)
+    return nb
+
+
+# -----------------------------
+# Recherche (mmap)
+# -----------------------------
+
+class Gazetteer:
+    """Index ouvert en mmap : rien n'est chargé en mémoire, les pages sont lues à la demande."""
+
+    def __init__(self, chemin: str | Path = CHEMIN_INDEX):
+        self.chemin = Path(chemin)
+        if not self.chemin.exists():
+            raise FileNotFoundError(
+                f"Index du registre introuvable : {self.chemin} (python -m wdc_api.cli gazetteer build <registre.csv>)"
+            )
+        self._fichier = open(self.chemin, "rb")
+        self._mm = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.nb = _ENTETE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.fermer()
+            raise ValueError(f"{self.chemin} n'est pas un index de registre (en-tête {magic!r})")
+        # Vue zéro-copie sur les offsets
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=self.nb, offset=_ENTETE.size)
+        self._debut_donnees = _ENTETE.size + 8 * self.nb
+
+    def __len__(self) -> int:
+        return self.nb
+
+    def fermer(self) -> None:
+        if hasattr(self, "_offsets"):
+            del self._offsets  # libère la vue avant de fermer le mmap
+        self._mm.close()
+        self._fichier.close()
+
+    def __enter__(self) -> "Gazetteer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fermer()
+
+    def _cle(self, i: int) -> tuple[bytes, int]:
+        debut = self._debut_donnees + int(self._offsets[i])
+        fin = self._mm.find(_SEP, debut)
+        return self._mm[debut:fin], debut
+
+    def chercher(self, cle: str) -> Entreprise | None:
+        """Entreprise dont la clé normalisée vaut exactement `cle` (dichotomie)."""
+        cible = cle.encode("ascii", "ignore")
+        bas, haut = 0, self.nb
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if self._cle(milieu)[0] < cible:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        if bas == self.nb:
+            return None
+        trouvee, debut = self._cle(bas)
+        if trouvee != cible:
+            return None
+        fin = self._mm.find(b"\n", debut)
+        _, siren, naf, nom = self._mm[debut:fin].decode("utf-8").split("\x1f")
+        return Entreprise(siren=siren, naf=naf, nom=nom)
+
+    def depuis_titre(self, titre: str) -> Entreprise | None:
+        """Entreprise citée dans un titre ("Gérant chez X"), clé la plus longue d'abord."""
+        for cle in cles_candidates(titre):
+            entreprise = self.chercher(cle)
+            if entreprise is not None:
+                return entreprise
+        return None
+
+
+def completer_entreprises(df: pd.DataFrame, gazetteer: Gazetteer) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Remplit entreprise / secteur (si vides) + naf / siren à partir du titre de chaque contact.
+    Chaque titre distinct n'est cherché qu'une fois.
+    """
+    titre_col = find_col(df, COLONNES_CONTACT["title"])
+    if not titre_col:
+        raise ValueError(f"Colonne titre introuvable (colonnes : {list(df.columns)})")
+
+    df = df.copy()
+    titres = df[titre_col].fillna("").astype(str)
+    trouvees = {t: gazetteer.depuis_titre(t) for t in titres.drop_duplicates()}
+    entreprises = titres.map(trouvees)
+
+    for colonne in ("entreprise", "secteur", "naf", "siren"):
+        if colonne not in df.columns:
+            df[colonne] = ""
+        df[colonne] = df[colonne].fillna("").astype(str)
+
+    valeurs = {
+        "entreprise": entreprises.map(lambda e: e.nom if e else ""),
+        "secteur": entreprises.map(lambda e: e.secteur if e else ""),
+        "naf": entreprises.map(lambda e: e.naf if e else ""),
+        "siren": entreprises.map(lambda e: e.siren if e else ""),
+    }
+    for colonne, serie in valeurs.items():
+        vide = df[colonne].str.strip().eq("")
+        df.loc[vide, colonne] = serie[vide]
+
+    stats = {
+        "lignes": len(df),
+        "titres_distincts": len(trouvees),
+        "trouvees": int(entreprises.notna().sum()),
+    }
+    return df, stats
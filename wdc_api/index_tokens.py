@@ -0,0 +1,376 @@
+# wdc_api/index_tokens.py
+# =======================
+# Index inversé (jeton normalisé -> lignes) sur le texte des contacts, pour répondre
+# en quelques millisecondes à "combien de lignes contiennent ces mots-clés" sans
+# parcourir le million de lignes (réglage interactif des règles, recherches, filtres).
+#
+#   python -m wdc_api.cli index build linkedin_propre_v1.csv          # une fois
+#   python -m wdc_api.cli index update linkedin_propre_v1.csv         # après ajout de lignes
+#   python -m wdc_api.cli index count linkedin_propre_v1.csv ceo fondateur
+#
+# Champs indexés (CHAMPS_INDEX) :
+# - poste    : colonne config["champs_csv"]["poste"] (Title)
+# - combined : "nom | poste | url" (même découpage que classification.classer_contacts)
+# Texte normalisé avec rules_engine._norm_txt (minuscules, sans accents), jetons = \w+.
+#
+# Même sémantique que les règles "contient_un_mot_cle" (vraie sous-chaîne) :
+# - mot-clé d'un seul jeton ("dev") : union des listes de TOUS les jetons du vocabulaire
+#   qui le contiennent ("dev", "developpeur", "devops"...) -> résultat exact, sans
+#   toucher aux lignes (le vocabulaire est cent fois plus petit que les données)
+# - mot-clé de plusieurs jetons ("head of") : intersection des listes (candidats),
+#   puis vérification de la sous-chaîne sur le texte normalisé des seuls candidats
+#
+# Persistance : un dossier à côté des données ("<csv>.idx/") avec meta.json et un
+# fichier .npz par segment. Ajouter des lignes écrit un NOUVEAU segment (rien n'est
+# réécrit) ; au-delà de MAX_SEGMENTS, les segments sont fusionnés en un seul.
+# Les numéros de ligne sont les positions dans le fichier de données (0 = 1re ligne).
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from wdc_api.csv_reader import lire_csv
+from wdc_api.rules_engine import RegleCompilee, _norm_txt, preparer_colonnes
+
+CHAMPS_INDEX = ("poste", "combined")
+
+# Au-delà, ajouter() fusionne tous les segments (lecture = un seul segment)
+MAX_SEGMENTS = int(os.getenv("WDC_INDEX_MAX_SEGMENTS", "8"))
+
+# Mots-clés dont le résultat est gardé en mémoire (vidé à chaque ajout)
+TAILLE_CACHE_REQUETES = 1024
+
+VERSION_FORMAT = 1
+FICHIER_META = "meta.json"
+
+_RE_JETON = re.compile(r"\w+")
+_SEP = "\n"  # absent du texte normalisé (_norm_txt compacte les espaces)
+
+
+def chemin_index(donnees: str | Path) -> Path:
+    """Dossier de l'index d'un fichier de données : "x.csv" -> "x.csv.idx"."""
+    donnees = Path(donnees)
+    return donnees.with_name(donnees.name + ".idx")
+
+
+def textes_a_indexer(df: pd.DataFrame, champs_csv: Mapping[str, Optional[str]]) -> dict[str, list[str]]:
+    """Texte normalisé (_norm_txt) de chaque champ de CHAMPS_INDEX, une valeur par ligne de df."""
+    colonnes = preparer_colonnes(df, champs_csv)
+    vide = pd.Series("", index=df.index)
+    poste = colonnes.get("poste", vide).fillna("").astype(str)
+    nom = colonnes.get("nom", vide).fillna("").astype(str)
+    url = colonnes.get("url", vide).fillna("").astype(str)
+    combined = nom + " | " + poste + " | " + url
+    # Les postes se répètent beaucoup : normalisés une fois par valeur distincte
+    postes_norm = {v: _norm_txt(v) for v in poste.unique()}
+    return {
+        "poste": [postes_norm[v] for v in poste.tolist()],
+        "combined": [_norm_txt(v) for v in combined.tolist()],
+    }
+
+
+# -----------------------------
+# Segment (une tranche de lignes)
+# -----------------------------
+
+class _Champ:
+    """
+    Index d'un champ : vocabulaire trié + listes de lignes (uint32, croissantes).
+
+    vocab[i] a pour lignes ids[debuts[i]:debuts[i + 1]].
+    _blob = "\\n" + "\\n".join(vocab) + "\\n" : recherche de sous-chaîne dans tout le
+    vocabulaire en un seul passage (re, en C), _positions[i] = début de vocab[i] dans _blob.
+    """
+
+    def __init__(self, vocab: list[str], debuts: np.ndarray, ids: np.ndarray, textes: list[str]):
+        self.vocab = vocab
+        self.debuts = debuts
+        self.ids = ids
+        self.textes = textes
+        self._blob = _SEP + _SEP.join(vocab) + _SEP
+        longueurs = np.fromiter((len(j) + 1 for j in vocab), dtype=np.int64, count=len(vocab))
+        self._positions = np.concatenate(([1], 1 + np.cumsum(longueurs)[:-1])) if vocab else np.zeros(0, np.int64)
+
+    @classmethod
+    def construire(cls, textes: list[str], premier_id: int) -> "_Champ":
+        vocab_ids: dict[str, int] = {}
+        jetons: list[int] = []
+        lignes: list[int] = []
+        for i, texte in enumerate(textes, start=premier_id):
+            for jeton in set(_RE_JETON.findall(texte)):
+                jetons.append(vocab_ids.setdefault(jeton, len(vocab_ids)))
+                lignes.append(i)
+        return cls._depuis_paires(list(vocab_ids), np.array(jetons, np.int64), np.array(lignes, np.uint32), textes)
+
+    @classmethod
+    def _depuis_paires(cls, vocab: list[str], jetons: np.ndarray, lignes: np.ndarray, textes: list[str]) -> "_Champ":
+        """(jeton, ligne) en vrac -> vocabulaire trié + listes ; lignes déjà croissantes par jeton."""
+        ordre_vocab = sorted(range(len(vocab)), key=vocab.__getitem__)
+        rang = np.empty(len(vocab), np.int64)
+        rang[ordre_vocab] = np.arange(len(vocab))
+        jetons = rang[jetons] if len(jetons) else jetons
+        ordre = np.argsort(jetons, kind="stable")
+        debuts = np.zeros(len(vocab) + 1, np.int64)
+        np.cumsum(np.bincount(jetons, minlength=len(vocab)), out=debuts[1:])
+        return cls([vocab[i] for i in ordre_vocab], debuts, lignes[ordre], textes)
+
+    @classmethod
+    def fusionner(cls, champs: Sequence["_Champ"]) -> "_Champ":
+        """Segments dans l'ordre des lignes -> un seul index (les listes restent croissantes)."""
+        if len(champs) == 1:
+            return champs[0]
+        vocab_ids: dict[str, int] = {}
+        jetons, lignes, textes = [], [], []
+        for c in champs:
+            globaux = np.fromiter((vocab_ids.setdefault(j, len(vocab_ids)) for j in c.vocab), np.int64, len(c.vocab))
+            jetons.append(np.repeat(globaux, np.diff(c.debuts)))
+            lignes.append(c.ids)
+            textes.extend(c.textes)
+        return cls._depuis_paires(list(vocab_ids), np.concatenate(jetons), np.concatenate(lignes), textes)
+
+    def jetons_contenant(self, sous_chaine: str) -> np.ndarray:
+        """Index (dans vocab) des jetons qui contiennent sous_chaine."""
+        positions = [m.start() for m in re.finditer(re.escape(sous_chaine), self._blob)]
+        if not positions:
+            return np.zeros(0, np.int64)
+        return np.unique(np.searchsorted(self._positions, positions, side="right") - 1)
+
+    def lignes_jetons(self, index_jetons: np.ndarray) -> np.ndarray:
+        if len(index_jetons) == 1:
+            i = int(index_jetons[0])
+            return self.ids[self.debuts[i]:self.debuts[i + 1]]
+        morceaux = [self.ids[self.debuts[i]:self.debuts[i + 1]] for i in index_jetons]
+        return np.unique(np.concatenate(morceaux)) if morceaux else np.zeros(0, np.uint32)
+
+    # Persistance (.npz) : chaînes stockées en un bloc utf-8 + séparateurs
+    def tableaux(self, prefixe: str) -> dict[str, np.ndarray]:
+        return {
+            f"{prefixe}.vocab": np.frombuffer(_SEP.join(self.vocab).encode("utf-8"), np.uint8),
+            f"{prefixe}.debuts": self.debuts,
+            f"{prefixe}.ids": self.ids,
+            f"{prefixe}.textes": np.frombuffer(_SEP.join(self.textes).encode("utf-8"), np.uint8),
+        }
+
+    @classmethod
+    def depuis_tableaux(cls, npz: Any, prefixe: str, nb_lignes: int) -> "_Champ":
+        vocab = bytes(npz[f"{prefixe}.vocab"]).decode("utf-8")
+        textes = bytes(npz[f"{prefixe}.textes"]).decode("utf-8")
+        return cls(
+            vocab.split(_SEP) if vocab else [],
+            npz[f"{prefixe}.debuts"],
+            npz[f"{prefixe}.ids"],
+            textes.split(_SEP) if nb_lignes else [],
+        )
+
+
+# -----------------------------
+# Index persistant
+# -----------------------------
+
+class IndexTokens:
+    """
+    Usage :
+        index = IndexTokens.ouvrir("linkedin_propre_v1.csv.idx")
+        index.compter("poste", ["ceo", "fondateur"])         # lignes contenant l'un des mots
+        index.lignes("combined", ["data", "paris"], tous=True)
+        index.masque_regle(regle)                            # = masque de la règle (numpy)
+        index.ajouter(textes_a_indexer(nouvelles_lignes, champs_csv))
+    """
+
+    def __init__(self, dossier: str | Path):
+        self.dossier = Path(dossier)
+        self.nb_lignes = 0
+        self.segments: list[dict[str, Any]] = []  # [{"fichier": ..., "debut": ..., "lignes": ...}]
+        self._champs: dict[str, _Champ] = {}
+        self._cache: dict[tuple[str, str], np.ndarray] = {}
+
+    # -----------------------------
+    # Ouverture / écriture
+    # -----------------------------
+
+    @classmethod
+    def ouvrir(cls, dossier: str | Path) -> "IndexTokens":
+        index = cls(dossier)
+        meta_chemin = index.dossier / FICHIER_META
+        if not meta_chemin.exists():
+            raise FileNotFoundError(f"Index introuvable : {index.dossier} (lancer d'abord : index build)")
+        meta = json.loads(meta_chemin.read_text(encoding="utf-8"))
+        if meta.get("version") != VERSION_FORMAT:
+            raise ValueError(f"{index.dossier} : format d'index {meta.get('version')} non supporté (reconstruire)")
+        index.nb_lignes = int(meta["lignes"])
+        index.segments = list(meta["segments"])
+        par_champ: dict[str, list[_Champ]] = {c: [] for c in CHAMPS_INDEX}
+        for segment in index.segments:
+            with np.load(index.dossier / segment["fichier"]) as npz:
+                for champ in CHAMPS_INDEX:
+                    par_champ[champ].append(_Champ.depuis_tableaux(npz, champ, segment["lignes"]))
+        index._champs = {c: _Champ.fusionner(s) for c, s in par_champ.items() if s}
+        return index
+
+    @classmethod
+    def creer(cls, dossier: str | Path) -> "IndexTokens":
+        """Index vide (écrase un index existant au premier ajout)."""
+        index = cls(dossier)
+        index.dossier.mkdir(parents=True, exist_ok=True)
+        for ancien in index.dossier.glob("segment-*.npz"):
+            ancien.unlink()
+        index._ecrire_meta()
+        return index
+
+    def _ecrire_meta(self) -> None:
+        meta = {"version": VERSION_FORMAT, "lignes": self.nb_lignes, "champs": list(CHAMPS_INDEX), "segments": self.segments}
+        temp = self.dossier / (FICHIER_META + ".part")
+        temp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        temp.replace(self.dossier / FICHIER_META)
+
+    def _ecrire_segment(self, champs: Mapping[str, _Champ], debut: int, nb: int) -> dict[str, Any]:
+        numero = max((int(s["fichier"][8:-4]) for s in self.segments), default=-1) + 1
+        fichier = f"segment-{numero:05d}.npz"
+        tableaux: dict[str, np.ndarray] = {}
+        for champ, index_champ in champs.items():
+            tableaux.update(index_champ.tableaux(champ))
+        with open(self.dossier / (fichier + ".part"), "wb") as f:
+            np.savez(f, **tableaux)
+        (self.dossier / (fichier + ".part")).replace(self.dossier / fichier)
+        return {"fichier": fichier, "debut": debut, "lignes": nb}
+
+    def ajouter(self, textes: Mapping[str, Sequence[str]]) -> int:
+        """
+        Indexe de nouvelles lignes (à la suite des précédentes) dans un nouveau segment.
+        textes : {champ: textes normalisés} (cf. textes_a_indexer). Retourne le nombre de lignes ajoutées.
+        """
+        manquants = [c for c in CHAMPS_INDEX if c not in textes]
+        if manquants:
+            raise ValueError(f"Champs manquants pour l'index : {manquants}")
+        nb = len(textes[CHAMPS_INDEX[0]])
+        if any(len(textes[c]) != nb for c in CHAMPS_INDEX):
+            raise ValueError("Tous les champs doivent avoir le même nombre de lignes")
+        if nb == 0:
+            return 0
+
+        nouveaux = {c: _Champ.construire(list(textes[c]), self.nb_lignes) for c in CHAMPS_INDEX}
+        self.segments.append(self._ecrire_segment(nouveaux, self.nb_lignes, nb))
+        self._champs = {
+            c: _Champ.fusionner([self._champs[c], nouveaux[c]]) if c in self._champs else nouveaux[c]
+            for c in CHAMPS_INDEX
+        }
+        self.nb_lignes += nb
+        self._cache.clear()
+
+        if len(self.segments) > MAX_SEGMENTS:
+            self.compacter()
+        else:
+            self._ecrire_meta()
+        return nb
+
+    def compacter(self) -> None:
+        """Réécrit tous les segments en un seul (l'index en mémoire est déjà fusionné)."""
+        anciens = [s["fichier"] for s in self.segments]
+        self.segments = [self._ecrire_segment(self._champs, 0, self.nb_lignes)]
+        self._ecrire_meta()
+        for fichier in anciens:
+            (self.dossier / fichier).unlink(missing_ok=True)
+
+    # -----------------------------
+    # Requêtes
+    # -----------------------------
+
+    def _champ(self, champ: str) -> _Champ | None:
+        if champ not in CHAMPS_INDEX:
+            raise ValueError(f"Champ non indexé : {champ} (possibles : {CHAMPS_INDEX})")
+        return self._champs.get(champ)
+
+    def lignes_mot_cle(self, champ: str, mot_cle: str) -> np.ndarray:
+        """Lignes (croissantes) dont le champ contient le mot-clé (sous-chaîne après _norm_txt)."""
+        index = self._champ(champ)
+        mot = _norm_txt(mot_cle)
+        if index is None:
+            return np.zeros(0, np.uint32)
+        cle = (champ, mot)
+        if cle in self._cache:
+            return self._cache[cle]
+
+        jetons = _RE_JETON.findall(mot)
+        if not mot:
+            resultat = np.zeros(0, np.uint32)
+        elif not jetons:  # que de la ponctuation : pas de jeton utilisable -> parcours des textes
+            resultat = np.array([i for i, t in enumerate(index.textes) if mot in t], np.uint32)
+        else:
+            resultat = None
+            for jeton in jetons:
+                lignes = index.lignes_jetons(index.jetons_contenant(jeton))
+                resultat = lignes if resultat is None else np.intersect1d(resultat, lignes, assume_unique=True)
+                if not len(resultat):
+                    break
+            if len(jetons) > 1 or jetons[0] != mot:  # candidats -> vérification de la sous-chaîne
+                resultat = np.array([i for i in resultat.tolist() if mot in index.textes[i]], np.uint32)
+
+        if len(self._cache) >= TAILLE_CACHE_REQUETES:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[cle] = resultat
+        return resultat
+
+    def masque(self, champ: str, mots_cles: Iterable[str], tous: bool = False) -> np.ndarray:
+        """
+        Masque booléen (nb_lignes), aligné sur les lignes du fichier indexé : lignes contenant
+        l'un des mots-clés (tous=True : tous les mots-clés). Union / intersection sur le masque,
+        sans tri des listes.
+        """
+        resultat: np.ndarray | None = None
+        for mot in mots_cles:
+            m = np.zeros(self.nb_lignes, dtype=bool)
+            m[self.lignes_mot_cle(champ, mot)] = True
+            if resultat is None:
+                resultat = m
+            elif tous:
+                resultat &= m
+            else:
+                resultat |= m
+        return resultat if resultat is not None else np.zeros(self.nb_lignes, dtype=bool)
+
+    def lignes(self, champ: str, mots_cles: Iterable[str], tous: bool = False) -> np.ndarray:
+        """Numéros des lignes (croissants) contenant l'un des mots-clés (tous=True : tous)."""
+        return np.flatnonzero(self.masque(champ, mots_cles, tous))
+
+    def compter(self, champ: str, mots_cles: Iterable[str], tous: bool = False) -> int:
+        return int(np.count_nonzero(self.masque(champ, mots_cles, tous)))
+
+    def masque_regle(self, regle: RegleCompilee) -> np.ndarray:
+        """Masque d'une règle "contient_un_mot_cle" (même résultat que rules_engine sur le fichier indexé)."""
+        if regle.type != "contient_un_mot_cle" or regle.champ is None:
+            raise ValueError(f"Règle {regle.id} : seules les règles contient_un_mot_cle sont servies par l'index")
+        return self.masque(regle.champ, regle.mots_cles)
+
+
+def mettre_a_jour_index(
+    donnees: str | Path,
+    champs_csv: Mapping[str, Optional[str]],
+    dossier: str | Path | None = None,
+    reconstruire: bool = False,
+) -> tuple[IndexTokens, int]:
+    """
+    Indexe les lignes du CSV pas encore indexées (lignes ajoutées en fin de fichier),
+    ou tout le fichier si l'index n'existe pas / reconstruire=True.
+    Retour : (index, lignes ajoutées).
+    """
+    dossier = Path(dossier) if dossier else chemin_index(donnees)
+    if reconstruire or not (dossier / FICHIER_META).exists():
+        index = IndexTokens.creer(dossier)
+    else:
+        index = IndexTokens.ouvrir(dossier)
+
+    df = lire_csv(donnees, keep_default_na=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    if len(df) < index.nb_lignes:
+        raise ValueError(
+            f"{donnees} : {len(df)} lignes pour {index.nb_lignes} indexées (fichier réécrit ?) -> index build"
+        )
+    nouvelles = df.iloc[index.nb_lignes:]
+    return index, index.ajouter(textes_a_indexer(nouvelles, champs_csv))
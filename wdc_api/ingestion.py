@@ -0,0 +1,178 @@
+# wdc_api/ingestion.py
+# ====================
+# Ingestion de PLUSIEURS exports LinkedIn (un par commercial) en un seul fichier.
+#
+#   python -m wdc_api.cli ingest exports/              # tous les *.csv du dossier
+#   python -m wdc_api.cli ingest "exports/*/Connections*.csv" -o connections.csv
+#
+# Principe :
+# - chaque export est lu dans un process séparé (pool), en parallèle
+# - format détecté par csv_reader (encodage, préambule "Notes:", séparateur), un seul parse
+# - seules les colonnes utiles sont lues (détection comme classification.find_col)
+# - chaque ligne est taguée avec son fichier source et son propriétaire (owner)
+# - fusion + dédoublonnage sur le slug LinkedIn (ou l'URL nettoyée si pas de slug),
+#   le premier fichier (ordre alphabétique) gagne
+#
+# Mémoire bornée :
+# - au plus NB_WORKERS * 2 fichiers lus / en attente en même temps
+# - le résultat fusionné est dédoublonné au fil de l'eau (jamais tous les exports en mémoire)
+
+from __future__ import annotations
+
+import glob
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from wdc_api.classification import COLONNES_CONTACT
+from wdc_api.csv_reader import colonnes_candidates, detecter_format, lire_csv
+
+# Nombre de process de lecture (par défaut : nb de CPU)
+NB_WORKERS = int(os.getenv("WDC_INGEST_WORKERS", str(os.cpu_count() or 2)))
+
+COLONNES_SORTIE = ["name", "title", "url", "linkedin_slug", "source_file", "owner"]
+
+# Nom de fichier d'un export brut : le propriétaire est alors le dossier parent
+_NOMS_EXPORT = {"connections", "connections_from_linkedin"}
+
+_RE_SLUG = re.compile(r"linkedin\.com/in/([^/]+)$")
+
+# URL d'un profil à partir de son slug
+PREFIXE_PROFIL = "https://www.linkedin.com/in/"
+
+
+def nettoyer_url(url: str) -> str:
+    """Même nettoyage que 02_enrichissement_minimal.nettoyer_url (trim, sans ?params, sans / final)."""
+    if url is None or (isinstance(url, float) and pd.isna(url)):
+        return ""
+    u = str(url).strip().split("?")[0].strip()
+    return u[:-1] if u.endswith("/") else u
+
+
+def url_canonique(valeur: str) -> str:
+    """
+    URL ou slug LinkedIn -> URL telle que stockée dans public.prospects (nettoyer_url) :
+    "jean-dupont-12345" -> "https://www.linkedin.com/in/jean-dupont-12345".
+    """
+    u = nettoyer_url(valeur)
+    if u and "/" not in u:
+        return PREFIXE_PROFIL + u
+    return u
+
+
+def extraire_slug_linkedin(url: str) -> str:
+    """https://www.linkedin.com/in/jean-dupont-12345 -> jean-dupont-12345 (sinon "")."""
+    m = _RE_SLUG.search(nettoyer_url(url))
+    return m.group(1) if m else ""
+
+
+def lister_exports(source: str) -> list[Path]:
+    """Dossier (tous ses *.csv), motif glob ou fichier -> liste triée de fichiers."""
+    chemin = Path(source)
+    if chemin.is_dir():
+        fichiers = sorted(chemin.glob("*.csv"))
+    elif chemin.is_file():
+        fichiers = [chemin]
+    else:
+        fichiers = sorted(Path(p) for p in glob.glob(source, recursive=True) if Path(p).is_file())
+    if not fichiers:
+        raise FileNotFoundError(f"Aucun export CSV trouvé pour : {source}")
+    return fichiers
+
+
+def proprietaire(chemin: Path) -> str:
+    """
+    Propriétaire d'un export :
+    - exports/alice.csv                -> alice
+    - exports/bob/Connections.csv      -> bob (nom d'export LinkedIn brut : dossier parent)
+    """
+    if chemin.stem.strip().lower() in _NOMS_EXPORT:
+        return chemin.parent.name
+    return chemin.stem
+
+
+def _cle(df: pd.DataFrame) -> pd.Series:
+    """Clé de dédoublonnage : slug LinkedIn, sinon URL nettoyée (minuscules)."""
+    return df["linkedin_slug"].where(df["linkedin_slug"] != "", df["url"].str.lower())
+
+
+def lire_export(chemin: str, owner: str) -> pd.DataFrame:
+    """
+    Lit UN export (exécuté dans un worker) -> colonnes COLONNES_SORTIE, dédoublonné.
+    Seules les colonnes détectées sont lues (usecols) : le reste ne passe jamais en mémoire.
+    """
+    p = Path(chemin)
+    fmt = detecter_format(p)
+    trouvees = colonnes_candidates(fmt.colonnes, COLONNES_CONTACT)
+    if not trouvees["url"]:
+        raise ValueError(f"{chemin} : colonne URL introuvable (colonnes : {list(fmt.colonnes)})")
+
+    brut = lire_csv(p, usecols=[c for c in trouvees.values() if c], fmt=fmt, keep_default_na=False)
+    brut.columns = [str(c).strip() for c in brut.columns]
+
+    df = pd.DataFrame(
+        {logique: (brut[c].str.strip() if c else "") for logique, c in trouvees.items()},
+        index=brut.index,
+    )
+    df["url"] = df["url"].map(nettoyer_url)
+    df["linkedin_slug"] = df["url"].map(extraire_slug_linkedin)
+    df["source_file"] = p.name
+    df["owner"] = owner
+
+    df = df.loc[df["url"] != ""]
+    return df.loc[~_cle(df).duplicated(keep="first"), COLONNES_SORTIE].reset_index(drop=True)
+
+
+def _fusionner(acc: pd.DataFrame | None, part: pd.DataFrame) -> pd.DataFrame:
+    if acc is None:
+        return part
+    fusion = pd.concat([acc, part], ignore_index=True)
+    return fusion.loc[~_cle(fusion).duplicated(keep="first")].reset_index(drop=True)
+
+
+def ingerer_exports(
+    source: str,
+    nb_workers: int = NB_WORKERS,
+    proprietaires: dict[str, str] | None = None,
+) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Lit tous les exports de `source` en parallèle et les fusionne.
+
+    proprietaires : {nom de fichier: owner} pour forcer le propriétaire d'un export.
+    Retour : (DataFrame COLONNES_SORTIE dédoublonné, stats {fichiers, lignes_exports, doublons, lignes})
+    """
+    fichiers = lister_exports(source)
+    proprietaires = proprietaires or {}
+    owners = [proprietaires.get(f.name, proprietaire(f)) for f in fichiers]
+
+    acc: pd.DataFrame | None = None
+    lignes_exports = 0
+    fenetre = max(1, nb_workers) * 2
+    en_cours: deque[Future] = deque()
+
+    with ProcessPoolExecutor(max_workers=max(1, nb_workers)) as executor:
+        for chemin, owner in zip(fichiers, owners):
+            en_cours.append(executor.submit(lire_export, str(chemin), owner))
+            if len(en_cours) < fenetre:
+                continue
+            # Fenêtre pleine : on fusionne le plus ancien (ordre des fichiers conservé)
+            part = en_cours.popleft().result()
+            lignes_exports += len(part)
+            acc = _fusionner(acc, part)
+        while en_cours:
+            part = en_cours.popleft().result()
+            lignes_exports += len(part)
+            acc = _fusionner(acc, part)
+
+    df = acc if acc is not None else pd.DataFrame(columns=COLONNES_SORTIE)
+    stats = {
+        "fichiers": len(fichiers),
+        "lignes_exports": lignes_exports,
+        "doublons": lignes_exports - len(df),
+        "lignes": len(df),
+    }
+    return df, stats
@@ -0,0 +1,337 @@
+# wdc_api/jobs.py
+# ===============
+# File de jobs "en process" pour lancer le pipeline (classification + scoring)
+# sur de gros exports LinkedIn uploadés via l'API (routes /jobs).
+#
+# Principe :
+# - l'upload est enregistré sur disque : <WDC_JOBS_DIR>/<job_id>/entree.csv
+# - l'état des jobs est stocké dans SQLite (<WDC_JOBS_DIR>/jobs.db) :
+#   il survit à un redémarrage (les jobs non terminés sont relancés)
+# - N threads workers (concurrence bornée) traitent les jobs PAR MORCEAUX,
+#   en tourniquet : un worker prend un job, traite UN morceau, puis remet le job
+#   en fin de file -> un énorme upload ne bloque pas les petits
+# - le calcul d'un morceau part dans le pool de process du scoring (vrai parallélisme CPU)
+# - le résultat est écrit au fil de l'eau dans resultat.csv (renommé à la fin), puis
+#   resultat.xlsx (prospects recommandés) est construit avant de passer le job à "termine"
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+import pandas as pd
+
+from wdc_api import scoring
+from wdc_api.csv_reader import detecter_format, lire_csv
+from wdc_api.export_xlsx import csv_vers_xlsx
+
+DOSSIER_JOBS = os.getenv("WDC_JOBS_DIR", "jobs")
+NB_WORKERS_JOBS = int(os.getenv("WDC_JOBS_WORKERS", "2"))
+TAILLE_MORCEAU_JOBS = int(os.getenv("WDC_JOBS_CHUNK", "5000"))
+
+# Statuts possibles d'un job
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+TERMINE = "termine"
+ERREUR = "erreur"
+
+logger = logging.getLogger("wdc_api.jobs")
+
+COLONNES_RESULTAT = [
+    "name", "title", "url", "score", "garde", "segment",
+    "decision_maker", "sector", "excluded", "recommended", "raisons",
+]
+
+
+def _maintenant() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def compter_lignes_csv(chemin: Path) -> int:
+    """Nombre de lignes de données d'un CSV (gère les champs multilignes entre guillemets)."""
+    fmt = detecter_format(chemin)
+    with open(chemin, "r", encoding=fmt.encoding, newline="") as f:
+        lignes = csv.reader(f, delimiter=fmt.sep, quotechar=fmt.quotechar)
+        return max(0, sum(1 for _ in lignes) - 1 - fmt.lignes_preambule)
+
+
+class _JobActif:
+    """État en mémoire d'un job en cours de traitement (lecteur par morceaux)."""
+
+    def __init__(self, job_id: str, dossier: Path):
+        self.job_id = job_id
+        self.dossier = dossier
+        # TextFileReader pandas (fichier entree.csv ouvert) : fermé par fermer()
+        self.lecteur: Any = None
+        self.lignes_traitees = 0
+        self.entete_ecrite = False
+
+    @property
+    def chemin_entree(self) -> Path:
+        return self.dossier / "entree.csv"
+
+    @property
+    def chemin_partiel(self) -> Path:
+        return self.dossier / "resultat.csv.part"
+
+    def fermer(self) -> None:
+        """Ferme le lecteur CSV (job terminé, en erreur ou abandonné à l'arrêt)."""
+        if self.lecteur is not None:
+            self.lecteur.close()
+            self.lecteur = None
+
+
+class FileDeJobs:
+    """
+    File de jobs + pool de threads workers.
+
+    Usage (cf. routers/jobs.py) :
+        file = get_file_jobs()
+        job_id = file.soumettre("export.csv", fichier)
+        file.statut(job_id)
+    """
+
+    def __init__(
+        self,
+        dossier: str = DOSSIER_JOBS,
+        nb_workers: int = NB_WORKERS_JOBS,
+        taille_morceau: int = TAILLE_MORCEAU_JOBS,
+    ):
+        self.dossier = Path(dossier)
+        self.nb_workers = max(1, nb_workers)
+        self.taille_morceau = max(1, taille_morceau)
+
+        self._file: deque[_JobActif] = deque()
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._arret = False
+
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    # -----------------------------
+    # SQLite (état persistant)
+    # -----------------------------
+
+    @contextmanager
+    def _connexion(self) -> Iterator[sqlite3.Connection]:
+        """Connexion le temps d'un bloc : commit (rollback si erreur) puis fermeture."""
+        con = sqlite3.connect(self.dossier / "jobs.db", timeout=30)
+        con.row_factory = sqlite3.Row
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _init_db(self) -> None:
+        with self._connexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id          TEXT PRIMARY KEY,
+                    fichier         TEXT,
+                    statut          TEXT NOT NULL,
+                    lignes_total    INTEGER,
+                    lignes_traitees INTEGER NOT NULL DEFAULT 0,
+                    erreur          TEXT,
+                    cree_le         TEXT NOT NULL,
+                    maj_le          TEXT NOT NULL
+                )
+                """
+            )
+
+    def _maj(self, job_id: str, **champs: Any) -> None:
+        champs["maj_le"] = _maintenant()
+        sets = ", ".join(f"{k} = ?" for k in champs)
+        with self._connexion() as con:
+            con.execute(f"UPDATE jobs SET {sets} WHERE job_id = ?", [*champs.values(), job_id])
+
+    # -----------------------------
+    # API publique
+    # -----------------------------
+
+    def soumettre(self, nom_fichier: str, source: BinaryIO) -> str:
+        """Enregistre l'upload sur disque, crée le job et le met en file. Retourne le job_id."""
+        job_id = uuid.uuid4().hex
+        dossier_job = self.dossier / job_id
+        dossier_job.mkdir(parents=True)
+
+        # Copie en streaming (pas de chargement complet en mémoire)
+        with open(dossier_job / "entree.csv", "wb") as f:
+            shutil.copyfileobj(source, f, length=1024 * 1024)
+
+        now = _maintenant()
+        with self._connexion() as con:
+            con.execute(
+                "INSERT INTO jobs (job_id, fichier, statut, cree_le, maj_le) VALUES (?, ?, ?, ?, ?)",
+                (job_id, nom_fichier, EN_ATTENTE, now, now),
+            )
+
+        self._mettre_en_file(_JobActif(job_id, dossier_job))
+        return job_id
+
+    def statut(self, job_id: str) -> dict[str, Any] | None:
+        """État d'un job (dict) ou None s'il n'existe pas."""
+        with self._connexion() as con:
+            row = con.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        total = job["lignes_total"]
+        job["progression"] = round(job["lignes_traitees"] / total, 4) if total else (1.0 if job["statut"] == TERMINE else 0.0)
+        return job
+
+    def chemin_resultat(self, job_id: str) -> Path:
+        return self.dossier / job_id / "resultat.csv"
+
+    def chemin_xlsx(self, job_id: str) -> Path:
+        return self.dossier / job_id / "resultat.xlsx"
+
+    def construire_xlsx(self, job_id: str) -> Path:
+        """
+        Construit resultat.xlsx depuis resultat.csv (fait par le worker à la fin du job).
+        Fichier temporaire propre à chaque appel puis renommage atomique : deux
+        constructions concurrentes ne s'écrasent jamais à moitié.
+        """
+        chemin = self.chemin_xlsx(job_id)
+        with tempfile.NamedTemporaryFile(dir=chemin.parent, prefix="resultat.", suffix=".xlsx.part", delete=False) as f:
+            temp = Path(f.name)
+        try:
+            csv_vers_xlsx(self.chemin_resultat(job_id), temp)
+            os.replace(temp, chemin)
+        finally:
+            temp.unlink(missing_ok=True)
+        return chemin
+
+    def demarrer(self) -> None:
+        """Relance les jobs interrompus (redémarrage) puis démarre les workers."""
+        if self._threads:
+            return
+        self._arret = False
+
+        with self._connexion() as con:
+            a_relancer = con.execute(
+                "SELECT job_id FROM jobs WHERE statut IN (?, ?) ORDER BY cree_le",
+                (EN_ATTENTE, EN_COURS),
+            ).fetchall()
+        for row in a_relancer:
+            self._maj(row["job_id"], statut=EN_ATTENTE, lignes_traitees=0)
+            self._mettre_en_file(_JobActif(row["job_id"], self.dossier / row["job_id"]))
+
+        for i in range(self.nb_workers):
+            t = threading.Thread(target=self._boucle_worker, name=f"wdc-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def arreter(self) -> None:
+        """Arrête les workers (les jobs en cours seront relancés au prochain démarrage)."""
+        with self._condition:
+            self._arret = True
+            self._condition.notify_all()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+        # Jobs restés en file : relancés au prochain démarrage, leurs fichiers sont fermés
+        with self._condition:
+            while self._file:
+                self._file.popleft().fermer()
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+
+    def _mettre_en_file(self, job: _JobActif) -> None:
+        with self._condition:
+            self._file.append(job)
+            self._condition.notify()
+
+    def _boucle_worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._file and not self._arret:
+                    self._condition.wait()
+                if self._arret:
+                    return
+                job = self._file.popleft()
+
+            try:
+                fini = self._traiter_morceau(job)
+            except Exception as erreur:  # un job en erreur ne doit pas tuer le worker
+                job.fermer()
+                self._maj(job.job_id, statut=ERREUR, erreur=str(erreur))
+                continue
+
+            if not fini:
+                # Tourniquet : le job repasse derrière les autres
+                self._mettre_en_file(job)
+
+    def _traiter_morceau(self, job: _JobActif) -> bool:
+        """Traite le morceau suivant du job. Retourne True quand le job est terminé."""
+        if job.lecteur is None:
+            self._maj(job.job_id, statut=EN_COURS, lignes_total=compter_lignes_csv(job.chemin_entree))
+            job.lecteur = lire_csv(job.chemin_entree, keep_default_na=False, chunksize=self.taille_morceau)
+
+        morceau = next(job.lecteur, None)
+        if morceau is None:
+            job.fermer()
+            if not job.entete_ecrite:
+                pd.DataFrame(columns=COLONNES_RESULTAT).to_csv(job.chemin_partiel, index=False, encoding="utf-8-sig")
+            os.replace(job.chemin_partiel, self.chemin_resultat(job.job_id))
+            try:
+                self.construire_xlsx(job.job_id)
+            except Exception:  # le CSV reste disponible ; l'Excel sera reconstruit à la demande
+                logger.exception("Export Excel du job %s impossible", job.job_id)
+            self._maj(job.job_id, statut=TERMINE, lignes_traitees=job.lignes_traitees)
+            return True
+
+        # Calcul dans le pool de process du scoring (classification + règles)
+        records = morceau.to_dict(orient="records")
+        resultats = scoring.get_pool().submit(scoring.scorer_records, records, scoring.CHEMIN_CONFIG).result()
+
+        out = pd.DataFrame(resultats, columns=COLONNES_RESULTAT)
+        out["raisons"] = out["raisons"].apply(lambda r: ";".join(r or []))
+        out.to_csv(
+            job.chemin_partiel,
+            mode="a" if job.entete_ecrite else "w",
+            header=not job.entete_ecrite,
+            index=False,
+            encoding="utf-8-sig" if not job.entete_ecrite else "utf-8",
+        )
+        job.entete_ecrite = True
+
+        job.lignes_traitees += len(morceau)
+        self._maj(job.job_id, lignes_traitees=job.lignes_traitees)
+        return False
+
+
+_file_jobs: FileDeJobs | None = None
+
+
+def get_file_jobs() -> FileDeJobs:
+    """File de jobs partagée par l'API (créée et démarrée au premier appel)."""
+    global _file_jobs
+    if _file_jobs is None:
+        _file_jobs = FileDeJobs()
+        _file_jobs.demarrer()
+    return _file_jobs
+
+
+def arreter_file_jobs() -> None:
+    """Arrête la file de jobs (appelé à l'arrêt de l'API)."""
+    global _file_jobs
+    if _file_jobs is not None:
+        _file_jobs.arreter()
+        _file_jobs = None
@@ -2,12 +2,61 @@
 # ===============
 # Point d'entrée FastAPI : crée l'app et branche les routes.
 
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from wdc_api.apercu import prechauffer as prechauffer_apercu
+from wdc_api.database import engine
+from wdc_api.jobs import arreter_file_jobs, get_file_jobs
+from wdc_api.metrics import MiddlewareMetriques, instrumenter_engine
+from wdc_api.routers.jobs import router as jobs_router
+from wdc_api.routers.metrics import router as metrics_router
 from wdc_api.routers.prospects import router as prospects_router
+from wdc_api.routers.regles import router as regles_router
+from wdc_api.routers.scoring import router as scoring_router
+from wdc_api.rules_sql import migrer_colonnes
+from wdc_api.scoring import arreter_pool
+
+logger = logging.getLogger("wdc_api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage / arrêt de l'API (ressources partagées entre requêtes)."""
+    # Colonnes score / garde / raisons / segment lues par les routes /prospects
+    try:
+        migrer_colonnes(engine)
+    except Exception:  # base indisponible au démarrage : l'API démarre quand même
+        logger.exception("Migration des colonnes de public.prospects impossible")
+    # Relance les jobs interrompus par un redémarrage
+    get_file_jobs()
+    # Ensemble de travail de POST /regles/apercu chargé en mémoire dès le démarrage
+    prechauffer_apercu()
+    yield
+    # Arrêt propre des workers (jobs d'abord : ils utilisent le pool de scoring)
+    arreter_file_jobs()
+    arreter_pool()
+
 
-app = FastAPI(title="WDC Prospects API")
+app = FastAPI(title="WDC Prospects API", lifespan=lifespan)
+
+# Métriques : latence / taille / requêtes SQL par route (exposées sur /metrics)
+instrumenter_engine(engine)
+app.add_middleware(MiddlewareMetriques)
 
 # Branche les routes /prospects
 app.include_router(prospects_router)
 
+# Branche la route /score (scoring temps réel)
+app.include_router(scoring_router)
+
+# Branche la route /regles/apercu (aperçu d'une config candidate)
+app.include_router(regles_router)
+
+# Branche les routes /jobs (pipeline en tâche de fond)
+app.include_router(jobs_router)
+
+# Branche la route /metrics (format Prometheus)
+app.include_router(metrics_router)
@@ -0,0 +1,231 @@
+# wdc_api/matrice_regles.py
+# =========================
+# Matrice des correspondances (ligne x mot-clé) persistée, pour re-scorer
+# instantanément quand seuls les `points` / `min` d'une config changent.
+#
+# Réglage d'une config : on modifie surtout des poids et des seuils, rarement des
+# mots-clés. Or le matching (normalisation + regex sur chaque ligne) est la partie
+# coûteuse ; les poids ne servent qu'à une somme.
+#
+# - une colonne par couple (champ, regex) : les règles avec les mêmes mots-clés (autre
+#   règle, autre config) partagent la même colonne, comme dans CacheMasques
+# - colonnes stockées en bits (np.packbits : 1 bit par ligne, 125 Ko par règle pour
+#   1M de lignes) dans <CHEMIN_CACHE>/<empreinte des données>.npz
+# - une colonne absente (nouveaux mots-clés) est calculée puis ajoutée au fichier
+# - au plus MAX_COLONNES colonnes par matrice : les moins récemment utilisées sont retirées
+#   (les mots-clés viennent aussi des clients : POST /score, POST /regles/apercu)
+# - score / garde = produit matrice-vecteur (points) + seuils, sans regex
+#
+# Même résultat que rules_engine.evaluer_regles (score et garde) :
+#   matrice = MatriceCorrespondances.ouvrir(df)
+#   res = matrice.evaluer(jeu)                       # quelques ms
+#   appliquer_regles(df, config, matrice=matrice)     # idem, lignes gardées
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from wdc_api.rules_engine import CacheMasques, JeuDeRegles
+
+# Dossier des matrices (une par fichier de données)
+CHEMIN_CACHE = os.getenv("WDC_MATCH_CACHE", ".correspondances")
+
+# Nombre max de matrices gardées (les moins récemment utilisées sont supprimées)
+MAX_MATRICES = int(os.getenv("WDC_MATCH_CACHE_MAX", "20"))
+
+# Nombre max de colonnes par matrice (les moins récemment utilisées sont retirées)
+MAX_COLONNES = int(os.getenv("WDC_MATCH_MAX_COLUMNS", "256"))
+
+
+def empreinte_donnees(df: pd.DataFrame) -> str:
+    """Empreinte du contenu (colonnes + valeurs, ordre des lignes compris)."""
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    if len(df.columns):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(str(len(df)).encode())
+    return h.hexdigest()
+
+
+def cle_colonne(champ: str, rx: re.Pattern) -> str:
+    """Empreinte d'une colonne de la matrice : champ + regex des mots-clés."""
+    return hashlib.sha1(f"{champ}\x1f{rx.pattern}\x1f{rx.flags}".encode("utf-8")).hexdigest()[:24]
+
+
+class MatriceCorrespondances(CacheMasques):
+    """
+    CacheMasques dont les masques (champ, regex) sont persistés en bits.
+
+    - masque(champ, rx) : lu dans la matrice, sinon calculé (normalisation + regex) et ajouté
+    - evaluer(jeu)      : score / garde de evaluer_regles par produit matrice-vecteur
+    - enregistrer()     : écrit les nouvelles colonnes (appelé par evaluer())
+
+    self._bits est ordonné du moins au plus récemment utilisé (éviction au-delà de MAX_COLONNES).
+    """
+
+    def __init__(self, df: pd.DataFrame, dossier: str | Path | None = CHEMIN_CACHE, empreinte: Optional[str] = None):
+        super().__init__(df)
+        self.dossier = Path(dossier) if dossier else None
+        self.empreinte = empreinte or empreinte_donnees(df)
+        self.nb_lignes = len(df)
+        self._bits: Dict[str, np.ndarray] = {}  # ordre = utilisation (la plus récente en dernier)
+        self._nouvelles = False
+        # Matrice dépliée (float32, une ligne par colonne) par ensemble de colonnes :
+        # gardée tant que les mots-clés ne changent pas
+        self._depliees: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    @property
+    def chemin(self) -> Optional[Path]:
+        return self.dossier / f"{self.empreinte}.npz" if self.dossier else None
+
+    @classmethod
+    def ouvrir(cls, df: pd.DataFrame, dossier: str | Path | None = CHEMIN_CACHE) -> "MatriceCorrespondances":
+        """Matrice de df, avec les colonnes déjà calculées lors d'une session précédente."""
+        matrice = cls(df, dossier)
+        chemin = matrice.chemin
+        if chemin is not None and chemin.exists():
+            with np.load(chemin) as npz:
+                if int(npz["nb_lignes"]) == matrice.nb_lignes:
+                    matrice._bits = {k: npz[k] for k in npz.files if k != "nb_lignes"}
+            os.utime(chemin)  # "récemment utilisée" (éviction)
+        return matrice
+
+    # -----------------------------
+    # Colonnes
+    # -----------------------------
+
+    def _toucher(self, cle: str) -> None:
+        # Colonne utilisée : passe en dernière position (la plus récente)
+        self._bits[cle] = self._bits.pop(cle)
+
+    def masque(self, champ: str, rx: re.Pattern) -> pd.Series:
+        cle = cle_colonne(champ, rx)
+        bits = self._bits.get(cle)
+        if bits is not None:
+            self._toucher(cle)
+        else:
+            m = super().masque(champ, rx)
+            self._bits[cle] = np.packbits(m.to_numpy(dtype=bool))
+            self._nouvelles = True
+            return m
+        return pd.Series(np.unpackbits(bits, count=self.nb_lignes).astype(bool), index=self.df.index)
+
+    def _depliee(self, cles: Tuple[str, ...]) -> np.ndarray:
+        """Colonnes `cles` dépliées : tableau (len(cles), nb_lignes) de 0.0 / 1.0."""
+        if cles not in self._depliees:
+            m = np.zeros((len(cles), self.nb_lignes), dtype=np.float32)
+            for i, cle in enumerate(cles):
+                m[i] = np.unpackbits(self._bits[cle], count=self.nb_lignes)
+            self._depliees = {cles: m}  # une seule à la fois : mémoire bornée
+        return self._depliees[cles]
+
+    def _evincer(self, garder: Iterable[str] = ()) -> None:
+        """Retire les colonnes les moins récemment utilisées au-delà de MAX_COLONNES (sauf `garder`)."""
+        garder = set(garder)
+        for cle in [c for c in self._bits if c not in garder][: max(0, len(self._bits) - MAX_COLONNES)]:
+            del self._bits[cle]
+
+    def enregistrer(self, garder: Iterable[str] = ()) -> None:
+        """Écrit la matrice si de nouvelles colonnes ont été calculées (`garder` : colonnes jamais évincées)."""
+        if not self._nouvelles:
+            return
+        self._evincer(garder)
+        if self.chemin is None:
+            return
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        temp = self.chemin.with_name(self.chemin.name + ".part")
+        with open(temp, "wb") as f:
+            np.savez(f, nb_lignes=np.int64(self.nb_lignes), **self._bits)
+        temp.replace(self.chemin)
+        self._nouvelles = False
+        # Éviction des matrices les moins récemment utilisées
+        anciennes = sorted(self.dossier.glob("*.npz"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for chemin in anciennes[MAX_MATRICES:]:
+            chemin.unlink(missing_ok=True)
+
+    # -----------------------------
+    # Évaluation
+    # -----------------------------
+
+    def evaluer(self, jeu: JeuDeRegles) -> pd.DataFrame:
+        """
+        Score et garde de evaluer_regles(df, jeu), sans regex si les colonnes sont connues.
+
+        - garde : aucune règle d'exclusion déclenchée ET chaque seuil atteint par le
+          score partiel (règles de score situées avant le seuil)
+        - score : base + matrice · points pour les lignes gardées ; une ligne retirée
+          (exclusion / seuil) ne compte que les règles de score situées avant son retrait
+        """
+        df = self.df
+        actives = [r for r in jeu.regles if r.actif]
+
+        # Colonnes utilisées par les règles de mots-clés (ignorées comme dans evaluer_regles)
+        colonnes: List[str] = []
+        regles_mots: Dict[int, int] = {}  # position de la règle -> ligne de la matrice
+        for pos, regle in enumerate(actives):
+            if regle.type != "contient_un_mot_cle" or regle.action not in ("exclure", "score"):
+                continue
+            if not regle.champ or regle.champ not in df.columns or regle.regex is None:
+                continue
+            cle = cle_colonne(regle.champ, regle.regex)
+            if cle in self._bits:
+                self._toucher(cle)
+            else:
+                self.masque(regle.champ, regle.regex)
+            if cle not in colonnes:
+                colonnes.append(cle)
+            regles_mots[pos] = colonnes.index(cle)
+        self.enregistrer(garder=colonnes)
+        m = self._depliee(tuple(colonnes))
+
+        if "score" in df.columns:
+            base = pd.to_numeric(df["score"], errors="coerce").fillna(0).astype(int).to_numpy()
+        else:
+            base = np.zeros(self.nb_lignes, dtype=int)
+
+        # Poids de chaque colonne (une colonne partagée par plusieurs règles : poids cumulés)
+        def _points(avant: int) -> np.ndarray:
+            p = np.zeros(len(colonnes), dtype=np.float32)
+            for pos, i in regles_mots.items():
+                if pos < avant and actives[pos].action == "score":
+                    p[i] += actives[pos].points
+            return p
+
+        # Position de la règle qui retire chaque ligne (len(actives) = gardée)
+        fin = len(actives)
+        retrait = np.full(self.nb_lignes, fin, dtype=np.int64)
+        for pos, regle in enumerate(actives):
+            if pos in regles_mots and regle.action == "exclure":
+                touche = (m[regles_mots[pos]] > 0) & (retrait == fin)
+            elif regle.type == "seuil" and regle.action == "garder":
+                if regle.champ_score == "score":
+                    valeurs = base + np.rint(_points(pos) @ m).astype(np.int64)
+                elif regle.champ_score in df.columns:
+                    valeurs = df[regle.champ_score].to_numpy()
+                else:
+                    continue
+                touche = ~(valeurs >= regle.min) & (retrait == fin)
+            else:
+                continue
+            retrait[touche] = pos
+
+        # Produit matrice-vecteur : score des lignes gardées
+        score = base + np.rint(_points(fin) @ m).astype(np.int64)
+
+        # Lignes retirées : seules les règles de score AVANT le retrait comptent
+        retirees = np.flatnonzero(retrait < fin)
+        if len(retirees):
+            partiel = np.zeros(len(retirees), dtype=np.float32)
+            for pos, i in regles_mots.items():
+                if actives[pos].action == "score" and actives[pos].points:
+                    avant = retrait[retirees] > pos
+                    partiel += actives[pos].points * (m[i, retirees] * avant)
+            score[retirees] = base[retirees] + np.rint(partiel).astype(np.int64)
+
+        return pd.DataFrame({"score": score, "garde": retrait == fin}, index=df.index)
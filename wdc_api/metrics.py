@@ -0,0 +1,288 @@
+# wdc_api/metrics.py
+# ==================
+# Métriques de l'API au format texte Prometheus (exposées sur GET /metrics).
+#
+# Ce qui est mesuré :
+# - latence des requêtes HTTP par route (histogramme) + requêtes en cours
+# - taille des réponses par route (histogramme)
+# - nombre de requêtes SQL par requête HTTP (histogramme : repère les N+1)
+# - durée des requêtes SQL + log optionnel des requêtes lentes (WDC_SLOW_QUERY_MS)
+# - attente pour obtenir une connexion du pool SQLAlchemy + état du pool
+#
+# Pas de dépendance externe : compteurs / histogrammes minimalistes, thread-safe
+# (les routes synchrones tournent dans le threadpool de Starlette).
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("wdc_api.sql")
+
+# Seuil (ms) au-delà duquel une requête SQL est loggée (désactivé si absent)
+SEUIL_REQUETE_LENTE_MS = float(os.getenv("WDC_SLOW_QUERY_MS", "0") or 0)
+
+BUCKETS_LATENCE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAILLE = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_REQUETES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_ATTENTE_POOL = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+# -----------------------------
+# Types de métriques
+# -----------------------------
+
+def _echapper(valeur: str) -> str:
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(noms: tuple[str, ...], valeurs: tuple[str, ...], extra: str = "") -> str:
+    parties = [f'{n}="{_echapper(v)}"' for n, v in zip(noms, valeurs)]
+    if extra:
+        parties.append(extra)
+    return "{" + ",".join(parties) + "}" if parties else ""
+
+
+class _Metrique:
+    type = ""
+
+    def __init__(self, nom: str, aide: str, labels: tuple[str, ...] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.noms_labels = labels
+        self._verrou = threading.Lock()
+
+    def entete(self) -> list[str]:
+        return [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type}"]
+
+
+class Compteur(_Metrique):
+    type = "counter"
+
+    def __init__(self, nom: str, aide: str, labels: tuple[str, ...] = ()):
+        super().__init__(nom, aide, labels)
+        self._valeurs: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, valeur: float = 1.0) -> None:
+        with self._verrou:
+            self._valeurs[labels] = self._valeurs.get(labels, 0.0) + valeur
+
+    def exposer(self) -> list[str]:
+        with self._verrou:
+            valeurs = dict(self._valeurs)
+        return self.entete() + [f"{self.nom}{_labels(self.noms_labels, k)} {v:g}" for k, v in valeurs.items()]
+
+
+class Jauge(_Metrique):
+    """Valeur instantanée ; `lecture` permet de la calculer au moment de l'exposition."""
+
+    type = "gauge"
+
+    def __init__(self, nom: str, aide: str, lecture: Callable[[], float] | None = None):
+        super().__init__(nom, aide)
+        self._valeur = 0.0
+        self.lecture = lecture
+
+    def ajouter(self, delta: float) -> None:
+        with self._verrou:
+            self._valeur += delta
+
+    def exposer(self) -> list[str]:
+        valeur = self.lecture() if self.lecture is not None else self._valeur
+        return self.entete() + [f"{self.nom} {valeur:g}"]
+
+
+class Histogramme(_Metrique):
+    type = "histogram"
+
+    def __init__(self, nom: str, aide: str, buckets: Iterable[float], labels: tuple[str, ...] = ()):
+        super().__init__(nom, aide, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compte par bucket..., +Inf], somme
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observer(self, valeur: float, *labels: str) -> None:
+        with self._verrou:
+            comptes, somme = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, borne in enumerate(self.buckets):
+                if valeur <= borne:
+                    comptes[i] += 1
+                    break
+            else:
+                comptes[-1] += 1
+            somme[0] += valeur
+
+    def exposer(self) -> list[str]:
+        with self._verrou:
+            series = {k: (list(c), s[0]) for k, (c, s) in self._series.items()}
+        lignes = self.entete()
+        for labels, (comptes, somme) in series.items():
+            cumul = 0
+            for borne, n in zip(self.buckets + (float("inf"),), comptes):
+                cumul += n
+                le = 'le="+Inf"' if borne == float("inf") else f'le="{borne:g}"'
+                lignes.append(f"{self.nom}_bucket{_labels(self.noms_labels, labels, le)} {cumul}")
+            lignes.append(f"{self.nom}_sum{_labels(self.noms_labels, labels)} {somme:g}")
+            lignes.append(f"{self.nom}_count{_labels(self.noms_labels, labels)} {cumul}")
+        return lignes
+
+
+_registre: list[_Metrique] = []
+
+
+def _enregistrer(metrique):
+    _registre.append(metrique)
+    return metrique
+
+
+def exposer() -> str:
+    """Toutes les métriques au format texte Prometheus (version 0.0.4)."""
+    lignes: list[str] = []
+    for m in _registre:
+        lignes += m.exposer()
+    return "\n".join(lignes) + "\n"
+
+
+# -----------------------------
+# Métriques HTTP
+# -----------------------------
+
+LATENCE_HTTP = _enregistrer(Histogramme(
+    "wdc_http_request_duration_seconds", "Durée des requêtes HTTP", BUCKETS_LATENCE,
+    ("method", "route", "status"),
+))
+EN_COURS_HTTP = _enregistrer(Jauge("wdc_http_requests_in_flight", "Requêtes HTTP en cours de traitement"))
+TAILLE_REPONSE = _enregistrer(Histogramme(
+    "wdc_http_response_size_bytes", "Taille des corps de réponse", BUCKETS_TAILLE, ("route",),
+))
+REQUETES_SQL_PAR_HTTP = _enregistrer(Histogramme(
+    "wdc_db_queries_per_request", "Nombre de requêtes SQL par requête HTTP", BUCKETS_REQUETES, ("route",),
+))
+
+# -----------------------------
+# Métriques base de données
+# -----------------------------
+
+DUREE_SQL = _enregistrer(Histogramme("wdc_db_query_duration_seconds", "Durée des requêtes SQL", BUCKETS_LATENCE))
+REQUETES_SQL_LENTES = _enregistrer(Compteur(
+    "wdc_db_slow_queries_total", "Requêtes SQL au-delà de WDC_SLOW_QUERY_MS",
+))
+ATTENTE_POOL = _enregistrer(Histogramme(
+    "wdc_db_pool_checkout_wait_seconds", "Attente pour obtenir une connexion du pool", BUCKETS_ATTENTE_POOL,
+))
+
+# -----------------------------
+# Métriques métier
+# -----------------------------
+
+URLS_LOOKUP = _enregistrer(Compteur(
+    "wdc_lookup_urls_total",
+    "URLs vérifiées par POST /prospects/lookup (filtre_absent = réglée par le filtre de Bloom, sans SQL)",
+    ("resultat",),
+))
+RECONSTRUCTIONS_FILTRE_URLS = _enregistrer(Compteur(
+    "wdc_lookup_bloom_rebuilds_total",
+    "Reconstructions du filtre de Bloom de POST /prospects/lookup (ok / erreur)",
+    ("resultat",),
+))
+
+# Compteur de requêtes SQL de la requête HTTP courante (liste mutable : visible
+# aussi depuis le threadpool, qui travaille sur une copie du contexte)
+_requetes_sql: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("wdc_requetes_sql", default=None)
+
+
+class PoolChronometre(QueuePool):
+    """QueuePool qui mesure le temps d'attente pour obtenir une connexion (checkout)."""
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            ATTENTE_POOL.observer(time.perf_counter() - debut)
+
+
+_engines_instrumentes: set[int] = set()
+
+
+def instrumenter_engine(engine) -> None:
+    """Branche le comptage / chronométrage des requêtes SQL et les jauges du pool sur un engine."""
+    if id(engine) in _engines_instrumentes:
+        return
+    _engines_instrumentes.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _avant(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("wdc_debuts", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _apres(conn, cursor, statement, parameters, context, executemany):
+        duree = time.perf_counter() - conn.info["wdc_debuts"].pop()
+        DUREE_SQL.observer(duree)
+        compteur = _requetes_sql.get()
+        if compteur is not None:
+            compteur[0] += 1
+        if SEUIL_REQUETE_LENTE_MS and duree * 1000 >= SEUIL_REQUETE_LENTE_MS:
+            REQUETES_SQL_LENTES.inc()
+            logger.warning("Requête SQL lente (%.1f ms) : %s", duree * 1000, " ".join(statement.split())[:500])
+
+    # Jauges lues à l'exposition (engine.pool : le pool peut être recréé par SQLAlchemy)
+    if isinstance(engine.pool, QueuePool):
+        for nom, aide, methode in (
+            ("wdc_db_pool_size", "Taille configurée du pool", "size"),
+            ("wdc_db_pool_checked_out", "Connexions empruntées", "checkedout"),
+            ("wdc_db_pool_checked_in", "Connexions disponibles dans le pool", "checkedin"),
+            ("wdc_db_pool_overflow", "Connexions ouvertes au-delà de la taille du pool", "overflow"),
+        ):
+            _enregistrer(Jauge(nom, aide, lambda methode=methode: getattr(engine.pool, methode)()))
+
+
+# -----------------------------
+# Middleware ASGI
+# -----------------------------
+
+class MiddlewareMetriques:
+    """
+    Middleware ASGI : latence, statut, taille de réponse et nombre de requêtes SQL par route.
+    La route est le motif FastAPI ("/jobs/{job_id}"), pas le chemin brut (cardinalité bornée).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        debut = time.perf_counter()
+        statut = [500]
+        taille = [0]
+        compteur = [0]
+        jeton = _requetes_sql.set(compteur)
+        EN_COURS_HTTP.ajouter(1)
+
+        async def envoyer(message):
+            if message["type"] == "http.response.start":
+                statut[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                taille[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            EN_COURS_HTTP.ajouter(-1)
+            _requetes_sql.reset(jeton)
+            route = scope.get("route")
+            nom_route = getattr(route, "path", None) or "<non_routee>"
+            LATENCE_HTTP.observer(time.perf_counter() - debut, scope.get("method", ""), nom_route, str(statut[0]))
+            TAILLE_REPONSE.observer(taille[0], nom_route)
+            REQUETES_SQL_PAR_HTTP.observer(compteur[0], nom_route)
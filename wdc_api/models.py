@@ -1,5 +1,6 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import JSON, Boolean, Column, Integer, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -13,6 +14,7 @@ class Prospect(Base):
     name = Column(Text, nullable=True)                            # Nom du prospect
     title = Column(Text, nullable=True)                           # Poste ou titre
     sector = Column(Text, nullable=True)                          # Secteur d'activité
+    segment = Column(String, nullable=True)                       # 'business' / 'tech' (tri_linkedin_plus)
     url = Column(String, unique=True, nullable=False, index=True) # URL LinkedIn, clé unique
     email = Column(String, nullable=True)                         # Email (si disponible)
     phone = Column(String, nullable=True)                         # Téléphone (si disponible)
@@ -20,6 +22,15 @@ class Prospect(Base):
     city = Column(String, nullable=True)                          # Ville
     country = Column(String, nullable=True)                       # Pays
     source = Column(String, nullable=False, default="linkedin")   # Source des données (LinkedIn par défaut)
+    # Résultat des règles de la config, calculé dans PostgreSQL (cf. wdc_api/rules_sql.py)
+    # Colonnes ajoutées au démarrage de l'API si absentes (rules_sql.migrer_colonnes)
+    score = Column(Integer, nullable=True)                        # Score des règles
+    garde = Column(Boolean, nullable=True)                        # True si le prospect passe toutes les règles
+    raisons = Column(                                             # Règles déclenchées ("bonus_decisionnaire:+40")
+        JSON().with_variant(ARRAY(Text), "postgresql"),           # text[] en PostgreSQL, JSON ailleurs (SQLite)
+        nullable=True
+    )
+    regles_empreinte = Column(String(40), nullable=True)          # Empreinte de la config utilisée
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now()                                 # Timestamp de création (défini par le serveur)
@@ -0,0 +1,200 @@
+# wdc_api/patterns.py
+# ===================
+# Registre de jeux de motifs regex, partagé par :
+# - wdc_api/classification.py (exclusions, segment, décideur, secteur)
+# - wdc_api/rules_engine.py   (règles "contient_un_mot_cle" de la config)
+#
+# Principe :
+# - une liste de motifs est compilée UNE fois en un seul matcher combiné
+#   "(?P<m0>...)|(?P<m1>...)|..." : une seule recherche par texte au lieu d'une
+#   par motif, et le groupe nommé indique quel motif a déclenché
+# - le registre est mis en cache par (motifs, flags) : deux listes identiques
+#   (ex: mêmes mots-clés dans deux règles / deux configs) partagent le même objet
+# - on ne dépend plus du petit cache interne du module `re` (512 entrées),
+#   qu'on saturait avec 30+ motifs par ligne
+# - registre borné (MAX_JEUX, LRU) : il reçoit aussi les mots-clés envoyés par les
+#   clients (POST /score, POST /regles/apercu)
+# - un motif qu'on ne peut pas combiner (référence arrière "(a)\1", drapeaux globaux
+#   "(?i)" ...) : le jeu entier retombe sur les motifs compilés un par un
+
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# Nombre max de jeux de motifs gardés dans le registre (les moins récemment utilisés sont oubliés)
+MAX_JEUX = int(os.getenv("WDC_PATTERN_CACHE_MAX", "1024"))
+
+
+def _analyser(motif: str) -> tuple[str, bool]:
+    """
+    Parcourt le motif (échappements et classes de caractères compris) :
+    retour (motif aux groupes non capturants, True s'il contient une référence à un groupe).
+    Références : "\\1", "(?P=nom)", "(?(1)oui|non)".
+    """
+    sortie: list[str] = []
+    references = False
+    i, n = 0, len(motif)
+    dans_classe = False
+    while i < n:
+        c = motif[i]
+        if c == "\\":
+            suivant = motif[i + 1:i + 2]
+            if not dans_classe and suivant and suivant in "123456789":
+                references = True
+            sortie.append(motif[i:i + 2])
+            i += 2
+            continue
+        if dans_classe:
+            if c == "]":
+                dans_classe = False
+            sortie.append(c)
+            i += 1
+            continue
+        if c == "[":
+            # "]" juste après "[" ou "[^" : littéral
+            debut = i + 1 + (motif[i + 1:i + 2] == "^")
+            fin = debut + (motif[debut:debut + 1] == "]")
+            sortie.append(motif[i:fin])
+            dans_classe = True
+            i = fin
+            continue
+        if c == "(":
+            if motif.startswith("(?P<", i):
+                fin = motif.find(">", i)
+                if fin != -1:
+                    sortie.append("(?:")
+                    i = fin + 1
+                    continue
+            elif motif.startswith("(?P=", i) or motif.startswith("(?(", i):
+                references = True
+            elif not motif.startswith("(?", i):
+                sortie.append("(?:")
+                i += 1
+                continue
+        sortie.append(c)
+        i += 1
+    return "".join(sortie), references
+
+
+def sans_captures(motif: str) -> str:
+    """
+    Rend tous les groupes d'un motif non capturants : "(a|b)" -> "(?:a|b)", "(?P<x>a)" -> "(?:a)".
+    Évite l'avertissement pandas "has match groups" avec Series.str.contains.
+    Les "(" des classes de caractères ("[(]") et échappées ("\\(") sont laissées telles quelles.
+
+    ValueError si le motif référence un de ses groupes ("(a)\\1") : impossible sans captures.
+    """
+    texte, references = _analyser(motif)
+    if references:
+        raise ValueError(f"Motif avec référence à un groupe, non combinable : {motif!r}")
+    return texte
+
+
+def _combinable(motif: str, flags: int) -> Optional[str]:
+    """Le motif sans captures s'il peut entrer dans une alternative combinée, sinon None."""
+    texte, references = _analyser(motif)
+    if references:
+        return None
+    try:
+        # Ex: "(?i)ceo" -> drapeaux globaux refusés ailleurs qu'en tête du motif combiné
+        re.compile(f"(?:{texte})", flags)
+    except re.error:
+        return None
+    return texte
+
+
+class JeuDeMotifs:
+    """
+    Liste ordonnée de motifs compilée en un seul matcher.
+
+    - regex        : motifs combinés, un groupe nommé m<i> par motif
+    - regex_simple : même alternative sans aucun groupe capturant (pour pandas)
+    - combine      : False si un motif ne peut pas être combiné (référence à un groupe,
+                     drapeaux globaux "(?i)" ...) : regex / regex_simple valent alors None
+                     et les recherches passent par les motifs compilés un par un
+
+    re.error si un motif est invalide (compilé seul).
+    """
+
+    __slots__ = ("motifs", "flags", "regex", "regex_simple", "combine", "_individuels")
+
+    def __init__(self, motifs: tuple[str, ...], flags: int = 0):
+        if not motifs:
+            raise ValueError("Un jeu de motifs doit contenir au moins un motif")
+        self.motifs = motifs
+        self.flags = flags
+        # Compilés un par un : premier() (priorité stricte) et repli si non combinable
+        self._individuels = tuple(re.compile(m, flags) for m in motifs)
+        simples = [_combinable(m, flags) for m in motifs]
+        self.combine = all(t is not None for t in simples)
+        if self.combine:
+            self.regex = re.compile("|".join(f"(?P<m{i}>{t})" for i, t in enumerate(simples)), flags)
+            self.regex_simple = re.compile("|".join(f"(?:{t})" for t in simples), flags)
+        else:
+            self.regex = None
+            self.regex_simple = None
+
+    def __len__(self) -> int:
+        return len(self.motifs)
+
+    def __repr__(self) -> str:
+        return f"JeuDeMotifs({len(self.motifs)} motifs)"
+
+    def _index_match(self, m: re.Match) -> int:
+        for nom, valeur in m.groupdict().items():
+            if valeur is not None:
+                return int(nom[1:])
+        raise AssertionError("match sans groupe nommé")  # impossible par construction
+
+    def cherche(self, texte: str) -> bool:
+        """True si au moins un motif est présent dans le texte."""
+        if not self.combine:
+            return any(rx.search(texte) for rx in self._individuels)
+        return self.regex_simple.search(texte) is not None
+
+    def motif_declenche(self, texte: str) -> str | None:
+        """Le motif qui a matché (le plus à gauche dans le texte), ou None."""
+        if not self.combine:
+            debuts = [(m.start(), i) for i, rx in enumerate(self._individuels) if (m := rx.search(texte))]
+            return self.motifs[min(debuts)[1]] if debuts else None
+        m = self.regex.search(texte)
+        return None if m is None else self.motifs[self._index_match(m)]
+
+    def premier(self, texte: str) -> int | None:
+        """
+        Index du PREMIER motif de la liste (ordre de priorité) présent dans le texte.
+
+        Une recherche combinée trouve un candidat i ; seuls les motifs plus prioritaires
+        (index < i) sont ensuite vérifiés un par un.
+        """
+        if not self.combine:
+            return next((j for j, rx in enumerate(self._individuels) if rx.search(texte)), None)
+        m = self.regex.search(texte)
+        if m is None:
+            return None
+        i = self._index_match(m)
+        for j in range(i):
+            if self._individuels[j].search(texte):
+                return j
+        return i
+
+
+@lru_cache(maxsize=MAX_JEUX)
+def _compiler(motifs: tuple[str, ...], flags: int) -> JeuDeMotifs:
+    return JeuDeMotifs(motifs, flags)
+
+
+def compiler_motifs(motifs: Iterable[str], flags: int = 0) -> JeuDeMotifs:
+    """
+    Retourne le JeuDeMotifs (compilé une seule fois) pour cette liste de motifs.
+    Deux appels avec les mêmes motifs + flags renvoient le même objet.
+    """
+    return _compiler(tuple(motifs), int(flags))
+
+
+def infos_cache():
+    """Statistiques du registre (hits / misses / taille), utile en debug."""
+    return _compiler.cache_info()
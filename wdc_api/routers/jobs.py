@@ -0,0 +1,106 @@
+# wdc_api/routers/jobs.py
+# =======================
+# Rôle :
+# - Lancer le pipeline (classification + scoring) sur un export LinkedIn uploadé,
+#   en tâche de fond, sans SSH ni lancement manuel des scripts
+# - Suivre la progression d'un job et télécharger son résultat
+#
+# Routes :
+# - POST /jobs                   : upload CSV -> job_id (202)
+# - GET  /jobs/{job_id}          : statut + progression
+# - GET  /jobs/{job_id}/resultat : CSV résultat (quand statut = termine)
+# - GET  /jobs/{job_id}/resultat.xlsx : prospects recommandés en Excel (une feuille par segment)
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from wdc_api import schemas
+from wdc_api.jobs import TERMINE, get_file_jobs
+from wdc_api.security import require_api_key
+
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    dependencies=[Depends(require_api_key)]  # 🔐 Protection globale par clé API
+)
+
+
+def _statut_ou_404(job_id: str) -> dict:
+    job = get_file_jobs().statut(job_id)
+    if job is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Job introuvable : {job_id}")
+    return job
+
+
+@router.post(
+    "",  # Chemin final => /jobs
+    response_model=schemas.JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_job(fichier: UploadFile = File(...)):
+    """
+    Endpoint : POST /jobs
+
+    - Enregistre l'export LinkedIn (CSV) sur disque
+    - Crée un job traité en arrière-plan par les workers
+    - Retourne immédiatement le job (statut en_attente)
+    """
+    file_jobs = get_file_jobs()
+    # Copie disque dans un thread : ne bloque pas la boucle asyncio
+    job_id = await run_in_threadpool(file_jobs.soumettre, fichier.filename or "export.csv", fichier.file)
+    return file_jobs.statut(job_id)
+
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: str):
+    """
+    Endpoint : GET /jobs/{job_id}
+    Retourne le statut et la progression (lignes traitées / total).
+    """
+    return _statut_ou_404(job_id)
+
+
+@router.get("/{job_id}/resultat")
+def download_job_result(job_id: str):
+    """
+    Endpoint : GET /jobs/{job_id}/resultat
+    Télécharge le CSV résultat (409 tant que le job n'est pas terminé).
+    """
+    job = _statut_ou_404(job_id)
+    if job["statut"] != TERMINE:
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Job pas encore terminé (statut : {job['statut']}).")
+
+    return FileResponse(
+        get_file_jobs().chemin_resultat(job_id),
+        media_type="text/csv",
+        filename=f"resultat_{job_id}.csv",
+    )
+
+
+@router.get("/{job_id}/resultat.xlsx")
+def download_job_result_xlsx(job_id: str):
+    """
+    Endpoint : GET /jobs/{job_id}/resultat.xlsx
+    Prospects recommandés du job en Excel (feuille "recommandes" + une feuille par segment).
+
+    - le classeur est construit par le worker à la fin du job (mode write_only, CSV lu
+      par morceaux : mémoire constante même pour 100k+ lignes) ; reconstruit ici
+      seulement s'il manque (job terminé avant l'export Excel, échec de l'export)
+    - il est envoyé par morceaux (FileResponse), jamais chargé entier en mémoire
+    """
+    job = _statut_ou_404(job_id)
+    if job["statut"] != TERMINE:
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Job pas encore terminé (statut : {job['statut']}).")
+
+    file_jobs = get_file_jobs()
+    chemin_xlsx = file_jobs.chemin_xlsx(job_id)
+    if not chemin_xlsx.exists():
+        chemin_xlsx = file_jobs.construire_xlsx(job_id)
+
+    return FileResponse(
+        chemin_xlsx,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=f"prospects_{job_id}.xlsx",
+    )
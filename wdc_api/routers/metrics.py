@@ -0,0 +1,28 @@
+# wdc_api/routers/metrics.py
+# ==========================
+# Route GET /metrics : métriques de l'API au format texte Prometheus
+# (cf. wdc_api/metrics.py). Protégée par la clé API comme les autres routes :
+# côté Prometheus, envoyer le header X-API-Key dans la config de scrape.
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from wdc_api import metrics
+from wdc_api.security import require_api_key
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(require_api_key)]  # 🔐 Protection globale par clé API
+)
+
+
+@router.get("", response_class=PlainTextResponse)
+def exposer_metriques():
+    """
+    Endpoint : GET /metrics
+
+    Latence / taille des réponses / requêtes SQL par route, requêtes en cours,
+    attente et état du pool de connexions PostgreSQL.
+    """
+    return PlainTextResponse(metrics.exposer(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -5,12 +5,20 @@
 # - Protéger TOUTES ces routes avec une clé API (header x-api-key)
 # - Appeler la couche CRUD pour récupérer les données en base PostgreSQL
 
-from fastapi import APIRouter, Depends  # APIRouter = regroupe des routes / Depends = injection de dépendances
+import os
+from itertools import groupby
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status  # APIRouter = regroupe des routes / Depends = injection de dépendances
 from sqlalchemy.orm import Session      # Type de session SQLAlchemy (connexion DB côté Python)
 
-from wdc_api.database import get_db            # Donne une session DB par requête et la ferme proprement
+from wdc_api.database import SessionLocal, get_db  # Donne une session DB par requête et la ferme proprement
 from wdc_api import crud, schemas              # crud = logique DB / schemas = format des réponses API
+from wdc_api.filtre_urls import FiltreUrls     # Filtre de Bloom des URLs connues (POST /prospects/lookup)
+from wdc_api.ingestion import url_canonique    # Même nettoyage d'URL que le pipeline
+from wdc_api.metrics import URLS_LOOKUP
 from wdc_api.security import require_api_key   # Dépendance de sécurité : vérifie la clé API
+from wdc_api.snapshot import snapshot_courant  # Réponse JSON pré-calculée (reconstruite par la sync)
 
 
 # Création du "router" prospects :
@@ -23,12 +31,28 @@ router = APIRouter(
     dependencies=[Depends(require_api_key)]  # 🔐 Protection globale par clé API
 )
 
+# Nombre max d'URLs par appel à POST /prospects/lookup
+MAX_LOOKUP = int(os.getenv("WDC_LOOKUP_MAX", "10000"))
+
+
+def _lire_urls() -> list[str]:
+    """URLs connues, lues avec une session dédiée (reconstruction du filtre en tâche de fond)."""
+    db = SessionLocal()
+    try:
+        return crud.lister_urls(db)
+    finally:
+        db.close()
+
+
+# Filtre de Bloom partagé par toutes les requêtes (reconstruit après chaque sync)
+_filtre_urls = FiltreUrls(_lire_urls)
+
 
 @router.get(
     "/",  # Chemin final => /prospects/
     response_model=list[schemas.ProspectOut]  # Format de sortie (liste de prospects)
 )
-def list_prospects(db: Session = Depends(get_db)):
+def list_prospects(request: Request, db: Session = Depends(get_db)):
     """
     Endpoint : GET /prospects/
 
@@ -41,7 +65,94 @@ def list_prospects(db: Session = Depends(get_db)):
 
     Base de données :
     - db est une session SQLAlchemy fournie automatiquement par get_db()
+
+    Performance :
+    - si un snapshot existe (cf. wdc_api/snapshot.py), on renvoie directement le JSON
+      pré-calculé (compressé br/gzip selon Accept-Encoding), sans ORM ni Pydantic
+    - ETag = version du snapshot : un client à jour reçoit un 304 sans corps
+    - sinon (pas encore de snapshot) : lecture classique via la couche CRUD
     """
+    snap = snapshot_courant()
+    if snap is not None:
+        entetes = {"ETag": snap.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == snap.etag:
+            return Response(status_code=304, headers=entetes)
+        encodage, corps = snap.choisir(request.headers.get("accept-encoding", ""))
+        if encodage != "identity":
+            entetes["Content-Encoding"] = encodage
+        return Response(content=corps, media_type="application/json", headers=entetes)
+
     # Appel à la couche CRUD qui interroge la table prospects et renvoie les lignes
     return crud.get_prospects(db)
 
+
+@router.get(
+    "/top",  # Chemin final => /prospects/top
+    response_model=list[schemas.GroupeTop]
+)
+def top_prospects(
+    segment: Optional[str] = None,
+    sector: Optional[str] = None,
+    k: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Endpoint : GET /prospects/top?segment=&sector=&k=
+
+    Les k meilleurs prospects (score décroissant) de chaque groupe (segment, secteur).
+    - segment / sector (optionnels) : un seul segment / secteur
+    - PostgreSQL : un parcours d'index limité à k lignes par groupe (cf. crud.get_top_prospects)
+    """
+    lignes = crud.get_top_prospects(db, k, segment=segment, sector=sector)
+    groupes = groupby(lignes, key=lambda l: (l["segment"] or "", l["sector"] or ""))
+    return [
+        {"segment": seg or None, "sector": sec or None, "prospects": list(prospects)}
+        for (seg, sec), prospects in groupes
+    ]
+
+
+@router.post(
+    "/lookup",  # Chemin final => /prospects/lookup
+    response_model=schemas.LookupOut
+)
+def lookup_prospects(demande: schemas.LookupIn, db: Session = Depends(get_db)):
+    """
+    Endpoint : POST /prospects/lookup
+
+    Objectif :
+    - Dire, pour chaque URL (ou slug) LinkedIn, si le contact est déjà dans public.prospects
+      (id + score), sans télécharger toute la liste (CRM, extension navigateur)
+
+    Performance :
+    - URLs canonisées comme dans le pipeline (ingestion.url_canonique), dédoublonnées
+    - filtre de Bloom en mémoire : une URL absente du filtre est absente de la base,
+      réponse sans SQL (si toutes les URLs sont dans ce cas : aucune requête)
+    - les autres : UNE requête WHERE url = ANY(...) sur l'index unique
+    """
+    if len(demande.urls) > MAX_LOOKUP:
+        raise HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            f"{len(demande.urls)} URLs : maximum {MAX_LOOKUP} par appel",
+        )
+
+    canoniques = [url_canonique(v) for v in demande.urls]
+    distinctes = {u for u in canoniques if u}
+    filtre = _filtre_urls.courant()
+    a_chercher = [u for u in distinctes if filtre is None or u in filtre]
+    trouves = {ligne["url"]: ligne for ligne in crud.lookup_prospects(db, a_chercher)}
+
+    URLS_LOOKUP.inc("filtre_absent", valeur=len(distinctes) - len(a_chercher))
+    URLS_LOOKUP.inc("trouve", valeur=len(trouves))
+    URLS_LOOKUP.inc("absent_sql", valeur=len(a_chercher) - len(trouves))
+
+    resultats = []
+    for entree, url in zip(demande.urls, canoniques):
+        ligne = trouves.get(url)
+        resultats.append({
+            "entree": entree,
+            "url": url,
+            "existe": ligne is not None,
+            "id": ligne["id"] if ligne is not None else None,
+            "score": ligne["score"] if ligne is not None else None,
+        })
+    return {"total": len(resultats), "trouves": sum(r["existe"] for r in resultats), "resultats": resultats}
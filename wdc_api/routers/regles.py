@@ -0,0 +1,51 @@
+# wdc_api/routers/regles.py
+# =========================
+# Rôle :
+# - Route POST /regles/apercu : aperçu d'une config de règles candidate pour l'éditeur
+#   de règles côté client (lignes gardées, distribution des scores, exemples)
+# - Réponse en moins d'une seconde : ensemble de travail gardé en mémoire, estimation
+#   sur échantillon stratifié si le budget de latence ne permet pas le calcul exact
+#   (cf. wdc_api/apercu.py)
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from wdc_api import apercu, schemas
+from wdc_api.security import require_api_key
+
+
+router = APIRouter(
+    prefix="/regles",
+    tags=["regles"],
+    dependencies=[Depends(require_api_key)]  # 🔐 Protection globale par clé API
+)
+
+
+@router.post(
+    "/apercu",  # Chemin final => /regles/apercu
+    response_model=schemas.ApercuOut,
+)
+async def apercu_regles(demande: schemas.ApercuIn):
+    """
+    Endpoint : POST /regles/apercu
+
+    Entrée : {"config": {...}, "budget_ms": 800, "complet": false, "exemples": 10}
+    - config incomplète : complétée par la config servie (WDC_CONFIG)
+    - mode "exact" si le calcul tient dans le budget (ex: seuls des points / seuils
+      ont changé), sinon "estimation" (échantillon stratifié + intervalle de confiance)
+    - complet=true : évaluation exacte sur tout l'ensemble, quel que soit le temps
+
+    Erreurs :
+    - 422 : config candidate invalide
+    - 503 : données d'aperçu absentes (WDC_PREVIEW_DATA)
+    """
+    if demande.budget_ms < 0 or demande.exemples < 0:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "budget_ms et exemples doivent être >= 0")
+    try:
+        return await run_in_threadpool(
+            apercu.apercu, demande.config, demande.budget_ms, demande.complet, demande.exemples
+        )
+    except FileNotFoundError as erreur:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, str(erreur))
+    except ValueError as erreur:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(erreur))
@@ -0,0 +1,102 @@
+# wdc_api/routers/scoring.py
+# ==========================
+# Rôle :
+# - Route POST /score : scorer un lot de contacts en temps réel (CRM, intégrations)
+# - Entrée : JSON {"contacts": [...]} OU fichier CSV (upload multipart / body text/csv)
+# - Sortie : score, segment, recommandé et raisons (règles déclenchées) par contact
+#
+# Le calcul (regex / pandas) ne tourne jamais dans la boucle asyncio :
+# - petit lot  -> thread du threadpool
+# - gros lot   -> découpé en morceaux, envoyés en parallèle dans le pool de process
+
+import asyncio
+from functools import partial
+
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from wdc_api import schemas, scoring
+from wdc_api.configs.loader import charger_regles
+from wdc_api.csv_reader import lire_csv
+from wdc_api.security import require_api_key
+
+
+router = APIRouter(
+    prefix="/score",
+    tags=["scoring"],
+    dependencies=[Depends(require_api_key)]  # 🔐 Protection globale par clé API
+)
+
+
+def _lire_csv(contenu: bytes) -> list[dict]:
+    """CSV (bytes) -> liste de dicts (toutes les valeurs en texte)."""
+    df = lire_csv(contenu, keep_default_na=False)
+    return df.to_dict(orient="records")
+
+
+async def _lire_contacts(request: Request) -> list[dict]:
+    """Lit le lot de contacts selon le Content-Type de la requête."""
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            fichiers = [v for v in form.values() if hasattr(v, "read")]
+            if not fichiers:
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, "Aucun fichier CSV dans le formulaire.")
+            contenu = await fichiers[0].read()
+            return await run_in_threadpool(_lire_csv, contenu)
+
+        if content_type.startswith("text/csv"):
+            return await run_in_threadpool(_lire_csv, await request.body())
+
+        return schemas.ScoreIn.model_validate_json(await request.body()).contacts
+
+    except (ValidationError, ValueError, pd.errors.ParserError) as erreur:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, f"Lot de contacts illisible : {erreur}")
+
+
+@router.post(
+    "",  # Chemin final => /score
+    response_model=schemas.ScoreOut,
+)
+async def score_contacts(request: Request):
+    """
+    Endpoint : POST /score
+
+    Objectif :
+    - Appliquer le moteur de règles (config en cache, rechargée si le fichier change)
+      + la classification business/tech à un lot de contacts
+
+    Entrée (au choix) :
+    - application/json      : {"contacts": [{"Name": ..., "Title": ..., "URL": ...}, ...]}
+    - multipart/form-data   : un fichier CSV (export LinkedIn)
+    - text/csv              : le CSV directement dans le body
+    """
+    contacts = await _lire_contacts(request)
+
+    # Config invalide -> erreur claire (plutôt qu'une 500 dans un worker)
+    try:
+        jeu = charger_regles(scoring.CHEMIN_CONFIG)
+    except (FileNotFoundError, ValueError) as erreur:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(erreur))
+
+    if len(contacts) <= scoring.TAILLE_MORCEAU:
+        resultats = await run_in_threadpool(scoring.scorer_records, contacts, scoring.CHEMIN_CONFIG)
+    else:
+        loop = asyncio.get_running_loop()
+        pool = scoring.get_pool()
+        morceaux = await asyncio.gather(*[
+            loop.run_in_executor(pool, partial(scoring.scorer_records, m, scoring.CHEMIN_CONFIG))
+            for m in scoring.decouper(contacts)
+        ])
+        resultats = [r for morceau in morceaux for r in morceau]
+
+    return {
+        "version_config": jeu.version,
+        "total": len(resultats),
+        "recommandes": sum(1 for r in resultats if r["recommended"]),
+        "resultats": resultats,
+    }
@@ -8,29 +8,46 @@ Fix inclus :
 - Matching insensible à la casse (CEO vs ceo)
 - Matching insensible aux accents (président vs president)
 - "contient" = vraie sous-chaîne (pas égalité stricte)
+
+Les règles sont compilées une fois (compiler_regles -> JeuDeRegles immuable) :
+les regex ne sont plus reconstruites à chaque application.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import hashlib
+import json
 import pandas as pd
 import re
 import unicodedata
 
+from wdc_api.patterns import compiler_motifs
+
+_RE_ESPACES = re.compile(r"\s+")
+
 
 def _norm_txt(v: Any) -> str:
     """Normalise un texte: str, minuscules, sans accents, espaces compactés."""
     if v is None or (isinstance(v, float) and pd.isna(v)):
         return ""
     s = str(v).strip().lower()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = re.sub(r"\s+", " ", s)
+    if not s.isascii():  # un texte ASCII n'a ni accent ni forme décomposable : inchangé
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = _RE_ESPACES.sub(" ", s)
     return s
 
 
 def _regex_mots_cles(mots_cles: List[str]) -> re.Pattern | None:
-    """Compile une regex OR à partir des mots-clés normalisés."""
+    """
+    Regex OR à partir des mots-clés normalisés.
+
+    Passe par le registre wdc_api.patterns : une même liste de mots-clés (autre règle,
+    autre config) réutilise la même regex compilée.
+    """
     cleaned = []
     for m in mots_cles or []:
         m2 = _norm_txt(m)
@@ -38,13 +55,256 @@ def _regex_mots_cles(mots_cles: List[str]) -> re.Pattern | None:
             cleaned.append(re.escape(m2))
     if not cleaned:
         return None
-    return re.compile("(" + "|".join(cleaned) + ")")
+    return compiler_motifs(cleaned).regex_simple
+
+
+@dataclass(frozen=True)
+class RegleCompilee:
+    """Une règle de config["regles"] prête à être appliquée (regex déjà compilée)."""
+
+    id: str
+    actif: bool
+    type: Optional[str]
+    action: Optional[str]
+    champ: Optional[str] = None
+    regex: Optional[re.Pattern] = None
+    mots_cles: Tuple[str, ...] = ()  # normalisés (_norm_txt), cf. wdc_api.index_tokens
+    points: int = 0
+    champ_score: str = "score"
+    min: float = 0.0
+
+
+@dataclass(frozen=True)
+class JeuDeRegles:
+    """Ensemble immuable de règles compilées + mapping des colonnes CSV."""
+
+    regles: Tuple[RegleCompilee, ...]
+    champs_csv: Mapping[str, Optional[str]]
+    version: str = ""
+    empreinte: str = ""
+
+
+def compiler_regles(config: Dict[str, Any]) -> JeuDeRegles:
+    """
+    Compile config["regles"] en JeuDeRegles.
+
+    Tolérant comme appliquer_regles : une règle mal formée est conservée telle quelle
+    (elle sera ignorée avec un [WARN] en debug). La validation stricte du schéma est
+    faite par wdc_api.configs.loader.
+    """
+    regles = config.get("regles", [])
+    if not isinstance(regles, list):
+        raise ValueError("Configuration invalide: 'regles' doit être une liste")
+
+    compilees = []
+    for regle in regles:
+        if not isinstance(regle, dict):
+            continue
+
+        rtype = regle.get("type")
+        regex = None
+        mots = ()
+        points = 0
+        min_val = 0.0
+
+        if rtype == "contient_un_mot_cle":
+            mots_cles = regle.get("mots_cles", [])
+            if not isinstance(mots_cles, list):
+                mots_cles = []
+            regex = _regex_mots_cles(mots_cles)
+            mots = tuple(m for m in (_norm_txt(m) for m in mots_cles) if m)
+            if regle.get("action") == "score":
+                points = int(regle.get("points", 0))
+
+        elif rtype == "seuil":
+            try:
+                min_val = float(regle.get("min", 0))
+            except Exception:
+                min_val = 0.0
+
+        compilees.append(
+            RegleCompilee(
+                id=regle.get("id", "regle_sans_id"),
+                actif=bool(regle.get("actif", False)),
+                type=rtype,
+                action=regle.get("action"),
+                champ=regle.get("champ"),
+                regex=regex,
+                mots_cles=mots,
+                points=points,
+                champ_score=regle.get("champ_score", "score"),
+                min=min_val,
+            )
+        )
+
+    # Empreinte stable du contenu (utile pour les caches construits sur un jeu de règles)
+    brut = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return JeuDeRegles(
+        regles=tuple(compilees),
+        champs_csv=MappingProxyType(dict(config.get("champs_csv") or {})),
+        version=str(config.get("version", "")),
+        empreinte=hashlib.sha1(brut.encode("utf-8")).hexdigest(),
+    )
+
+
+def _masque_contient(serie: pd.Series, rx: re.Pattern) -> pd.Series:
+    """NORMALISATION + contient(regex) sur une colonne."""
+    return serie.apply(_norm_txt).str.contains(rx, na=False)
+
+
+def preparer_colonnes(df: pd.DataFrame, champs_csv: Mapping[str, Optional[str]]) -> pd.DataFrame:
+    """
+    Ajoute les colonnes logiques (poste, url, ...) manquantes à partir de config["champs_csv"].
+
+    Contrairement à tri_csv_v1.normaliser_colonnes, une colonne logique déjà présente
+    est gardée telle quelle (ex: un client API qui envoie directement "poste").
+    La colonne réelle est cherchée sans tenir compte de la casse ("Title" / "title").
+    """
+    df2 = df.copy()
+    colonnes = {str(c).strip().lower(): c for c in df2.columns}
+    for logique, reelle in champs_csv.items():
+        if logique.startswith("_") or logique in df2.columns:
+            continue
+        src = colonnes.get(str(reelle).strip().lower()) if reelle else None
+        df2[logique] = df2[src].fillna("").astype(str) if src is not None else ""
+    return df2
+
+
+class CacheMasques:
+    """
+    Normalisation + résultats de matching d'UN DataFrame, partagés entre évaluations.
+
+    - chaque colonne n'est normalisée (_norm_txt) qu'une fois
+    - chaque couple (colonne, regex) n'est évalué qu'une fois : comme le registre
+      wdc_api.patterns renvoie la même regex pour les mêmes mots-clés, deux règles
+      (ou deux configs) avec le même jeu de mots-clés partagent le même masque
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._norm: Dict[str, pd.Series] = {}
+        self._masques: Dict[Tuple[str, re.Pattern], pd.Series] = {}
+
+    def norm(self, champ: str) -> pd.Series:
+        if champ not in self._norm:
+            self._norm[champ] = self.df[champ].apply(_norm_txt)
+        return self._norm[champ]
+
+    def masque(self, champ: str, rx: re.Pattern) -> pd.Series:
+        cle = (champ, rx)
+        if cle not in self._masques:
+            self._masques[cle] = self.norm(champ).str.contains(rx, na=False)
+        return self._masques[cle]
 
 
-def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = False) -> pd.DataFrame:
+def evaluer_regles(
+    df: pd.DataFrame,
+    config: Dict[str, Any] | JeuDeRegles,
+    cache: Optional[CacheMasques] = None,
+) -> pd.DataFrame:
+    """
+    Évalue config["regles"] SANS filtrer les lignes (pour l'API / l'explication).
+
+    Même sémantique que appliquer_regles (ordre des règles respecté, une ligne
+    exclue ne reçoit plus de points), mais on renvoie pour chaque ligne :
+    - score   : score final
+    - garde   : True si la ligne survit à toutes les règles
+    - raisons : liste des règles déclenchées ("bonus_decisionnaire:+40",
+                "exclusion_stage_alternance:exclu", "seuil_prospect:<30")
+
+    `cache` : CacheMasques partagé (cf. evaluer_multi_configs), sinon créé ici.
+
+    Retour: DataFrame aligné sur df.index.
+    """
+    jeu = config if isinstance(config, JeuDeRegles) else compiler_regles(config)
+    cache = cache if cache is not None and cache.df is df else CacheMasques(df)
+
+    if "score" in df.columns:
+        score = pd.to_numeric(df["score"], errors="coerce").fillna(0).astype(int)
+    else:
+        score = pd.Series(0, index=df.index, dtype=int)
+    garde = pd.Series(True, index=df.index)
+    raisons: List[List[str]] = [[] for _ in range(len(df))]
+
+    def _noter(mask: pd.Series, raison: str) -> None:
+        for pos in mask.to_numpy().nonzero()[0]:
+            raisons[pos].append(raison)
+
+    for regle in jeu.regles:
+        if not regle.actif:
+            continue
+
+        if regle.type == "contient_un_mot_cle":
+            if not regle.champ or regle.champ not in df.columns or regle.regex is None:
+                continue
+            mask = cache.masque(regle.champ, regle.regex) & garde
+
+            if regle.action == "exclure":
+                garde &= ~mask
+                _noter(mask, f"{regle.id}:exclu")
+            elif regle.action == "score":
+                score = score + mask.astype(int) * regle.points
+                _noter(mask, f"{regle.id}:{regle.points:+d}")
+
+        elif regle.type == "seuil" and regle.action == "garder":
+            if regle.champ_score == "score":
+                valeurs = score
+            elif regle.champ_score in df.columns:
+                valeurs = df[regle.champ_score]
+            else:
+                continue
+            echec = garde & ~(valeurs >= regle.min)
+            garde &= ~echec
+            _noter(echec, f"{regle.id}:<{regle.min:g}")
+
+    return pd.DataFrame({"score": score, "garde": garde, "raisons": raisons}, index=df.index)
+
+
+def evaluer_multi_configs(
+    df: pd.DataFrame,
+    configs: Mapping[str, Dict[str, Any] | JeuDeRegles],
+    matrice: Optional[CacheMasques] = None,
+) -> pd.DataFrame:
+    """
+    Évalue PLUSIEURS configs (A/B test de variantes) sur le même DataFrame en une passe.
+
+    Le DataFrame n'est lu et normalisé qu'une fois ; les mots-clés identiques d'une
+    config à l'autre ne sont matchés qu'une fois (CacheMasques).
+
+    configs : {nom: config dict ou JeuDeRegles}
+    matrice : wdc_api.matrice_regles.MatriceCorrespondances de df (correspondances
+              persistées, score par produit matrice-vecteur)
+    Retour : colonnes score_<nom> et garde_<nom> pour chaque config, alignées sur df.index.
+    """
+    matrice = matrice if matrice is not None and matrice.df is df else None
+    cache = CacheMasques(df)
+    colonnes: Dict[str, pd.Series] = {}
+    for nom, config in configs.items():
+        if matrice is not None:
+            res = matrice.evaluer(config if isinstance(config, JeuDeRegles) else compiler_regles(config))
+        else:
+            res = evaluer_regles(df, config, cache=cache)
+        colonnes[f"score_{nom}"] = res["score"]
+        colonnes[f"garde_{nom}"] = res["garde"]
+    return pd.DataFrame(colonnes, index=df.index)
+
+
+def appliquer_regles(
+    df: pd.DataFrame,
+    config: Dict[str, Any] | JeuDeRegles,
+    debug: bool = False,
+    matrice: Optional[CacheMasques] = None,
+) -> pd.DataFrame:
     """
     Applique config["regles"].
 
+    `config` peut être le dict brut ou un JeuDeRegles déjà compilé
+    (cf. wdc_api.configs.loader.charger_regles, à privilégier dans l'API).
+
+    `matrice` : wdc_api.matrice_regles.MatriceCorrespondances de df. Les correspondances
+    sont lues dans la matrice persistée et le score calculé par produit matrice-vecteur
+    (changer des points / seuils ne relance aucune regex). Ignorée en debug.
+
     Types:
     - contient_un_mot_cle:
         champ, mots_cles, action ("exclure" ou "score"), points
@@ -53,9 +313,13 @@ def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = Fal
 
     Retour: df filtré + colonne score mise à jour.
     """
-    regles = config.get("regles", [])
-    if not isinstance(regles, list):
-        raise ValueError("Configuration invalide: 'regles' doit être une liste")
+    jeu = config if isinstance(config, JeuDeRegles) else compiler_regles(config)
+
+    if matrice is not None and matrice.df is df and not debug:
+        res = matrice.evaluer(jeu)
+        df_work = df.copy()
+        df_work["score"] = res["score"].to_numpy()
+        return df_work.loc[res["garde"].to_numpy()].copy()
 
     df_work = df.copy()
 
@@ -69,44 +333,34 @@ def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = Fal
         print(f"Lignes départ : {len(df_work)}")
         print(f"Colonnes dispo: {list(df_work.columns)}")
 
-    for regle in regles:
-        if not isinstance(regle, dict):
-            continue
-
-        regle_id = regle.get("id", "regle_sans_id")
-        actif = bool(regle.get("actif", False))
-        if not actif:
+    for regle in jeu.regles:
+        regle_id = regle.id
+        if not regle.actif:
             if debug:
                 print(f"[SKIP] {regle_id} (actif=false)")
             continue
 
-        rtype = regle.get("type")
+        rtype = regle.type
 
         # -----------------------------
         # 1) contient_un_mot_cle
         # -----------------------------
         if rtype == "contient_un_mot_cle":
-            champ = regle.get("champ")
+            champ = regle.champ
             if not champ or champ not in df_work.columns:
                 if debug:
                     print(f"[WARN] {regle_id} champ introuvable: {champ}")
                 continue
 
-            mots_cles = regle.get("mots_cles", [])
-            if not isinstance(mots_cles, list):
-                mots_cles = []
-
-            rx = _regex_mots_cles(mots_cles)
+            rx = regle.regex
             if rx is None:
                 if debug:
                     print(f"[WARN] {regle_id} aucun mot-clé valide")
                 continue
 
-            # NORMALISATION + contient(regex)
-            serie_norm = df_work[champ].apply(_norm_txt)
-            mask = serie_norm.str.contains(rx, na=False)
+            mask = _masque_contient(df_work[champ], rx)
 
-            action = regle.get("action")
+            action = regle.action
 
             if action == "exclure":
                 avant = len(df_work)
@@ -116,7 +370,7 @@ def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = Fal
                     print(f"[OK] {regle_id} exclure -> {avant} -> {apres} (retirés: {avant - apres})")
 
             elif action == "score":
-                points = int(regle.get("points", 0))
+                points = regle.points
                 score_avant = int(df_work["score"].sum())
                 df_work.loc[mask, "score"] = df_work.loc[mask, "score"] + points
                 score_apres = int(df_work["score"].sum())
@@ -132,18 +386,15 @@ def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = Fal
         # 2) seuil
         # -----------------------------
         elif rtype == "seuil":
-            champ_score = regle.get("champ_score", "score")
+            champ_score = regle.champ_score
             if champ_score not in df_work.columns:
                 if debug:
                     print(f"[WARN] {regle_id} champ_score introuvable: {champ_score}")
                 continue
 
-            try:
-                min_val = float(regle.get("min", 0))
-            except Exception:
-                min_val = 0.0
+            min_val = regle.min
 
-            action = regle.get("action")
+            action = regle.action
             if action == "garder":
                 avant = len(df_work)
                 df_work = df_work.loc[df_work[champ_score] >= min_val].copy()
@@ -164,4 +415,3 @@ def appliquer_regles(df: pd.DataFrame, config: Dict[str, Any], debug: bool = Fal
         print("--- FIN DEBUG ---\n")
 
     return df_work
-
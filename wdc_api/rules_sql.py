@@ -0,0 +1,253 @@
+"""
+wdc_api/rules_sql.py
+
+Évaluation des règles (config["regles"]) DIRECTEMENT dans PostgreSQL.
+
+But : re-scorer toute la table public.prospects après un changement de règles,
+en une seule requête côté serveur (UPDATE ensembliste), sans export CSV ni
+aller-retour des lignes en Python.
+
+Traduction (même sémantique que rules_engine.evaluer_regles) :
+- chaque règle "contient_un_mot_cle" -> wdc_norm(colonne) ~ '<regex>' (calculé une fois par ligne)
+  la regex est celle du moteur pandas (registre wdc_api.patterns) : mêmes mots-clés, même résultat
+- "exclure" -> la ligne n'est plus gardée et ne reçoit plus de points
+- "score"   -> CASE WHEN ... THEN points ELSE 0 END (somme, dans l'ordre des règles)
+- "seuil"   -> garde si score >= min
+- raisons   -> tableau text[] des règles déclenchées ("bonus_decisionnaire:+40", ...)
+
+wdc_norm() = fonction SQL IMMUTABLE (unaccent + lower + espaces compactés), l'équivalent
+de _norm_txt. Elle permet des index trigram fonctionnels (pg_trgm) utilisés par les
+filtres ~ / LIKE sur une partie de la table (cf. filters_engine) ; le re-scoring complet,
+lui, lit toute la table de toute façon (un seul passage séquentiel).
+
+Le score de départ est 0 (pas le score déjà en base) : re-scorer deux fois donne le même résultat.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from wdc_api.filters_engine import COLONNES_PROSPECTS, _colonne, _identifiant, _table
+from wdc_api.rules_engine import JeuDeRegles, compiler_regles
+from wdc_api.snapshot import rafraichir_snapshot
+
+TABLE_PROSPECTS = "public.prospects"
+
+# Colonnes texte indexées (trigram sur wdc_norm) en plus de celles des règles
+COLONNES_INDEXEES = ("title", "sector")
+
+# Colonnes du modèle ajoutées après coup (résultat des règles, segment) : sans elles,
+# toute lecture ORM de models.Prospect échoue -> migrées dès le démarrage de l'API
+# (cf. migrer_colonnes) et par la sync, pas seulement par le re-scoring
+DDL_COLONNES = """
+    ALTER TABLE public.prospects
+        ADD COLUMN IF NOT EXISTS score integer,
+        ADD COLUMN IF NOT EXISTS garde boolean,
+        ADD COLUMN IF NOT EXISTS raisons text[],
+        ADD COLUMN IF NOT EXISTS regles_empreinte varchar(40),
+        ADD COLUMN IF NOT EXISTS segment text
+"""
+
+# Extensions + fonction de normalisation + colonnes de résultat (idempotent)
+DDL_SCHEMA = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() n'est pas IMMUTABLE : la forme à 2 arguments (dictionnaire explicite)
+    # dans une fonction IMMUTABLE permet de l'utiliser dans un index
+    """
+    CREATE OR REPLACE FUNCTION public.wdc_norm(texte text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT btrim(regexp_replace(
+            lower(public.unaccent('public.unaccent'::regdictionary, coalesce(texte, ''))),
+            '\\s+', ' ', 'g'))
+    $$
+    """,
+    DDL_COLONNES,
+    "CREATE INDEX IF NOT EXISTS ix_prospects_score_garde ON public.prospects (score DESC) WHERE garde",
+    # Top-K par (segment, secteur) : ORDER BY score DESC LIMIT k = parcours d'index (cf. crud.get_top_prospects)
+    """
+    CREATE INDEX IF NOT EXISTS ix_prospects_top_groupe ON public.prospects
+        ((coalesce(segment, '')), (coalesce(sector, '')), score DESC, id)
+        WHERE score IS NOT NULL
+    """,
+)
+
+
+@dataclass(frozen=True)
+class RequeteRegles:
+    """SELECT id, score, garde, raisons FROM <table> (+ paramètres psycopg2 %s)."""
+
+    sql: str
+    params: Tuple[Any, ...]
+
+
+def _litteral(texte: str) -> str:
+    # Littéral SQL sûr : quotes doublées, % doublé (la requête passe par psycopg2 avec paramètres)
+    return "'" + texte.replace("'", "''").replace("%", "%%") + "'"
+
+
+def traduire_regles(
+    config: Dict[str, Any] | JeuDeRegles,
+    table: str = TABLE_PROSPECTS,
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> RequeteRegles:
+    """
+    Traduit les règles en une requête SELECT id, score, garde, raisons.
+
+    Une règle dont le champ n'a pas de colonne SQL est ignorée, comme une règle dont
+    le champ est absent du DataFrame côté pandas.
+    """
+    jeu = config if isinstance(config, JeuDeRegles) else compiler_regles(config)
+
+    matches: List[str] = []  # colonnes booléennes r0, r1, ... du CTE
+    params: List[Any] = []
+    score = "0"
+    garde = "TRUE"
+    raisons: List[str] = []
+
+    for regle in jeu.regles:
+        if not regle.actif:
+            continue
+
+        if regle.type == "contient_un_mot_cle":
+            if not regle.champ or regle.champ not in colonnes or regle.regex is None:
+                continue
+            r = f"r{len(matches)}"
+            matches.append(f"(public.wdc_norm({_colonne(regle.champ, colonnes)}::text) ~ %s) AS {r}")
+            params.append(regle.regex.pattern)
+            touche = f"({garde} AND {r})"
+
+            if regle.action == "exclure":
+                raisons.append(f"CASE WHEN {touche} THEN {_litteral(f'{regle.id}:exclu')} END")
+                garde = f"({garde} AND NOT {r})"
+            elif regle.action == "score":
+                score = f"{score} + CASE WHEN {touche} THEN {int(regle.points)} ELSE 0 END"
+                raisons.append(f"CASE WHEN {touche} THEN {_litteral(f'{regle.id}:{regle.points:+d}')} END")
+
+        elif regle.type == "seuil" and regle.action == "garder":
+            if regle.champ_score == "score":
+                valeurs = f"({score})"
+            elif regle.champ_score in colonnes:
+                valeurs = _colonne(regle.champ_score, colonnes)
+            else:
+                continue
+            # NULL >= min -> échec, comme NaN côté pandas
+            ok = f"COALESCE({valeurs} >= {float(regle.min)!r}, FALSE)"
+            raisons.append(f"CASE WHEN {garde} AND NOT {ok} THEN {_litteral(f'{regle.id}:<{regle.min:g}')} END")
+            garde = f"({garde} AND {ok})"
+
+    cte = ", ".join(["id"] + matches)
+    tableau = f"array_remove(ARRAY[{', '.join(raisons)}]::text[], NULL)" if raisons else "ARRAY[]::text[]"
+    sql = (
+        f"WITH m AS (SELECT {cte} FROM {_table(table)}) "
+        f"SELECT id, ({score}) AS score, {garde} AS garde, {tableau} AS raisons FROM m"
+    )
+    return RequeteRegles(sql=sql, params=tuple(params))
+
+
+def requete_rescore(
+    config: Dict[str, Any] | JeuDeRegles,
+    table: str = TABLE_PROSPECTS,
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> RequeteRegles:
+    """
+    UPDATE ensembliste : score, garde, raisons, regles_empreinte pour toute la table.
+    Les lignes dont le résultat ne change pas ne sont pas réécrites.
+    """
+    jeu = config if isinstance(config, JeuDeRegles) else compiler_regles(config)
+    select = traduire_regles(jeu, table, colonnes)
+    sql = (
+        f"WITH s AS ({select.sql}) "
+        f"UPDATE {_table(table)} AS p "
+        f"SET score = s.score, garde = s.garde, raisons = s.raisons, regles_empreinte = %s "
+        f"FROM s WHERE p.id = s.id AND ("
+        f"p.score IS DISTINCT FROM s.score OR p.garde IS DISTINCT FROM s.garde "
+        f"OR p.raisons IS DISTINCT FROM s.raisons OR p.regles_empreinte IS DISTINCT FROM %s)"
+    )
+    return RequeteRegles(sql=sql, params=select.params + (jeu.empreinte, jeu.empreinte))
+
+
+def ddl_index(
+    config: Dict[str, Any] | JeuDeRegles,
+    table: str = TABLE_PROSPECTS,
+    colonnes: Mapping[str, str] = COLONNES_PROSPECTS,
+) -> List[str]:
+    """Index trigram fonctionnels (GIN sur wdc_norm(colonne)) pour les colonnes des règles."""
+    jeu = config if isinstance(config, JeuDeRegles) else compiler_regles(config)
+    cibles = list(COLONNES_INDEXEES)
+    for regle in jeu.regles:
+        if regle.type == "contient_un_mot_cle" and regle.champ in colonnes:
+            col = colonnes[regle.champ]
+            if col not in cibles:
+                cibles.append(col)
+
+    nom_table = table.split(".")[-1]
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{nom_table}_{col}_norm_trgm ON {_table(table)} "
+        f"USING gin (public.wdc_norm({_identifiant(col)}) gin_trgm_ops)"
+        for col in cibles
+    ]
+
+
+def migrer_colonnes(engine=None) -> None:
+    """
+    Ajoute les colonnes de models.Prospect absentes de la table (idempotent).
+
+    PostgreSQL : DDL_COLONNES. Autres bases (SQLite en local) : table créée si absente,
+    puis une colonne ajoutée par colonne du modèle manquante.
+    """
+    if engine is None:
+        from wdc_api.database import engine
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql(DDL_COLONNES)
+        return
+
+    from sqlalchemy import inspect
+
+    from wdc_api.models import Prospect
+
+    table = Prospect.__table__
+    table.create(engine, checkfirst=True)
+    existantes = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for col in table.columns:
+            if col.name not in existantes:
+                type_sql = col.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {type_sql}")
+
+
+def preparer_schema(engine=None, config: Optional[Dict[str, Any] | JeuDeRegles] = None) -> None:
+    """Crée (si besoin) extensions, wdc_norm(), colonnes score/garde/raisons et index."""
+    if engine is None:
+        from wdc_api.database import engine
+
+    instructions = list(DDL_SCHEMA)
+    if config is not None:
+        instructions += ddl_index(config)
+    with engine.begin() as conn:
+        for ddl in instructions:
+            conn.exec_driver_sql(ddl)
+
+
+def rescorer_base(chemin_config: Optional[str] = None, engine=None) -> int:
+    """
+    Re-score toute la table prospects avec les règles de la config (une seule requête).
+    Retour : nombre de lignes modifiées.
+    """
+    from wdc_api.configs.loader import CHEMIN_CONFIG_DEFAUT, charger_regles
+
+    if engine is None:
+        from wdc_api.database import engine
+
+    jeu = charger_regles(chemin_config or CHEMIN_CONFIG_DEFAUT)
+    preparer_schema(engine, jeu)
+    requete = requete_rescore(jeu)
+    with engine.begin() as conn:
+        nb = conn.exec_driver_sql(requete.sql, requete.params).rowcount
+    # Écriture hors sync : le snapshot de GET /prospects/ est reconstruit (ou retiré)
+    with engine.connect() as conn:
+        rafraichir_snapshot(conn)
+    return nb
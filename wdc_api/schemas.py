@@ -5,7 +5,7 @@
 # -> et ceux qu'elle renvoie (sortie)
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Optional
 
 class ProspectBase(BaseModel):
     """
@@ -33,3 +33,159 @@ class ProspectOut(ProspectBase):
         # IMPORTANT (Pydantic v2) :
         # Autorise Pydantic à lire les objets SQLAlchemy comme des dicts
         from_attributes = True
+
+
+class ProspectClasse(ProspectOut):
+    """
+    Prospect dans un classement (GET /prospects/top).
+    """
+    segment: Optional[str] = None
+    score: Optional[int] = None
+
+
+class GroupeTop(BaseModel):
+    """
+    Meilleurs prospects (par score) d'un groupe (segment, secteur).
+    """
+    segment: Optional[str] = None
+    sector: Optional[str] = None
+    prospects: list[ProspectClasse]
+
+
+class LookupIn(BaseModel):
+    """
+    Format attendu par POST /prospects/lookup :
+    URLs de profils LinkedIn OU slugs ("jean-dupont-12345"), mélangés si besoin.
+    """
+    urls: list[str]
+
+
+class LookupResultat(BaseModel):
+    """
+    Réponse pour UNE entrée (même ordre que la demande).
+    """
+    entree: str                 # valeur envoyée
+    url: str                    # URL canonique cherchée ("" si entrée vide)
+    existe: bool
+    id: Optional[int] = None
+    score: Optional[int] = None
+
+
+class LookupOut(BaseModel):
+    """
+    Réponse de POST /prospects/lookup.
+    """
+    total: int
+    trouves: int
+    resultats: list[LookupResultat]
+
+
+class ScoreIn(BaseModel):
+    """
+    Format attendu (JSON) par POST /score :
+    une liste de contacts, chaque contact = dict de colonnes
+    (ex: {"Name": ..., "Title": ..., "URL": ...} comme l'export LinkedIn).
+    """
+    contacts: list[dict[str, Any]]
+
+
+class ScoreContactOut(BaseModel):
+    """
+    Résultat du scoring pour UN contact.
+    """
+    name: str = ""
+    title: str = ""
+    url: str = ""
+    score: int
+    garde: bool                 # survit aux règles de la config (exclusions + seuil)
+    segment: str                # 'business' ou 'tech'
+    decision_maker: bool
+    sector: Optional[str] = None
+    excluded: bool              # exclu par les heuristiques (étudiant, RH, ...)
+    recommended: bool
+    raisons: list[str] = []     # règles déclenchées, ex: "bonus_decisionnaire:+40"
+
+
+class ScoreOut(BaseModel):
+    """
+    Réponse de POST /score.
+    """
+    version_config: str
+    total: int
+    recommandes: int
+    resultats: list[ScoreContactOut]
+
+
+class ApercuIn(BaseModel):
+    """
+    Format attendu par POST /regles/apercu.
+    config : config candidate (les clés absentes sont reprises de la config servie,
+             un éditeur peut n'envoyer que {"regles": [...]})
+    """
+    config: dict[str, Any]
+    budget_ms: int = 800        # latence visée : au-delà, estimation sur échantillon
+    complet: bool = False       # True : évaluation exacte sur tout l'ensemble, sans budget
+    exemples: int = 10          # nombre de lignes gardées renvoyées en exemple
+
+
+class ClasseScore(BaseModel):
+    de: float
+    a: float
+    lignes: int
+
+
+class DistributionScores(BaseModel):
+    """
+    Distribution des scores des lignes gardées (pondérée en mode estimation).
+    """
+    min: Optional[int] = None
+    max: Optional[int] = None
+    moyenne: Optional[float] = None
+    quantiles: dict[str, int] = {}      # p10, p25, p50, p75, p90
+    histogramme: list[ClasseScore] = []
+
+
+class StrateApercu(BaseModel):
+    strate: str                 # segment/decideur, ex: "business/decideur"
+    lignes: int
+    gardes: int
+
+
+class ExempleApercu(BaseModel):
+    nom: str = ""
+    poste: str = ""
+    url: str = ""
+    score: int
+    raisons: list[str] = []
+
+
+class ApercuOut(BaseModel):
+    """
+    Réponse de POST /regles/apercu.
+    """
+    mode: str                           # exact / estimation
+    version_config: str
+    lignes: int                         # taille de l'ensemble de travail
+    lignes_evaluees: int                # = lignes en mode exact, taille de l'échantillon sinon
+    gardes: int
+    gardes_intervalle: list[int]        # intervalle de confiance à 95 % (bornes égales si exact)
+    taux_garde: float
+    scores_gardes: DistributionScores
+    par_strate: list[StrateApercu]
+    exemples: list[ExempleApercu]
+    duree_ms: float
+
+
+class JobOut(BaseModel):
+    """
+    État d'un job de pipeline (routes /jobs).
+    """
+    job_id: str
+    fichier: Optional[str] = None
+    statut: str                          # en_attente / en_cours / termine / erreur
+    lignes_total: Optional[int] = None   # connu dès que le job démarre
+    lignes_traitees: int = 0
+    progression: float = 0.0             # 0.0 -> 1.0
+    erreur: Optional[str] = None
+    cree_le: str
+    maj_le: str
@@ -0,0 +1,108 @@
+# wdc_api/scoring.py
+# ==================
+# Scoring "à la demande" d'un lot de contacts (utilisé par la route POST /score).
+#
+# Combine :
+# - le moteur de règles (config JSON en cache, cf. configs/loader.charger_regles)
+#   -> score, garde, raisons (règles déclenchées)
+# - les heuristiques de classification (cf. classification.classer_contacts)
+#   -> segment, décideur, secteur, exclusion, recommandé
+#
+# Les gros lots sont découpés en morceaux et envoyés dans un pool de process :
+# le CPU (regex) ne bloque jamais la boucle asyncio de l'API.
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+
+from wdc_api.classification import classer_contacts
+from wdc_api.configs.loader import CHEMIN_CONFIG_DEFAUT, charger_regles, charger_signaux
+from wdc_api.rules_engine import evaluer_regles, preparer_colonnes
+
+# Fichier de config utilisé par l'API (hot reload si le fichier change)
+CHEMIN_CONFIG = os.getenv("WDC_CONFIG", CHEMIN_CONFIG_DEFAUT)
+
+# Nombre de contacts par morceau envoyé à un worker
+TAILLE_MORCEAU = int(os.getenv("WDC_SCORE_CHUNK", "2000"))
+
+# Nombre de process du pool (par défaut : nb de CPU)
+NB_WORKERS = int(os.getenv("WDC_SCORE_WORKERS", str(os.cpu_count() or 2)))
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def scorer_dataframe(df: pd.DataFrame, chemin_config: str = CHEMIN_CONFIG) -> pd.DataFrame:
+    """
+    Score un DataFrame de contacts (colonnes brutes LinkedIn ou colonnes logiques).
+
+    Retour : une ligne par contact, dans le même ordre, avec
+    name, title, url, score, garde, segment, decision_maker, sector, excluded,
+    recommended, raisons.
+    """
+    jeu = charger_regles(chemin_config)
+    signaux = charger_signaux(chemin_config)
+
+    df = df.reset_index(drop=True)
+    classes = classer_contacts(df, signaux)
+    regles = evaluer_regles(preparer_colonnes(df, jeu.champs_csv), jeu)
+
+    out = pd.DataFrame(
+        {
+            "name": classes["_name"].fillna("").str.strip(),
+            "title": classes["_title"].fillna("").str.strip(),
+            "url": classes["_url"].fillna("").str.strip(),
+            "score": regles["score"].astype(int),
+            "garde": regles["garde"].astype(bool),
+            "segment": classes["segment"],
+            "decision_maker": classes["decision_maker"].astype(bool),
+            "sector": classes["sector"],
+            "excluded": classes["excluded"].astype(bool),
+            # règles de la config déclenchées + signaux de classement ("signal:decision_maker")
+            "raisons": [
+                r + [f"signal:{sid}" for sid in signaux.decoder(m)]
+                for r, m in zip(regles["raisons"], classes["raisons"])
+            ],
+        }
+    )
+    # Recommandé = recommandé par la classification ET gardé par les règles de la config
+    out["recommended"] = classes["recommended"].astype(bool) & out["garde"]
+    return out
+
+
+def scorer_records(records: list[dict[str, Any]], chemin_config: str = CHEMIN_CONFIG) -> list[dict[str, Any]]:
+    """
+    Version "dicts in / dicts out" de scorer_dataframe.
+    C'est la fonction exécutée dans les workers (arguments et retour picklables).
+    """
+    if not records:
+        return []
+    out = scorer_dataframe(pd.DataFrame.from_records(records), chemin_config)
+    # sector peut valoir None : on garde None (JSON null) plutôt que NaN
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict(orient="records")
+
+
+def decouper(records: list[dict[str, Any]], taille: int = TAILLE_MORCEAU) -> list[list[dict[str, Any]]]:
+    """Découpe un lot en morceaux de `taille` contacts."""
+    taille = max(1, taille)
+    return [records[i:i + taille] for i in range(0, len(records), taille)]
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Pool de process partagé (créé au premier gros lot)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, NB_WORKERS))
+    return _pool
+
+
+def arreter_pool() -> None:
+    """Arrête le pool (appelé à l'arrêt de l'API)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,219 @@
+# wdc_api/snapshot.py
+# ===================
+# Snapshot "lecture seule" de la table prospects pour GET /prospects/.
+#
+# Les prospects changent une fois par jour (sync) mais sont lus très souvent :
+# au lieu de refaire à chaque requête SELECT -> objets ORM -> validation Pydantic
+# -> JSON, on pré-calcule la réponse JSON complète une fois, après chaque sync.
+#
+# - le JSON est construit DANS PostgreSQL (json_agg), sans ORM ni Pydantic
+#   (mêmes champs que schemas.ProspectOut : name, title, sector, url, id)
+# - il est écrit en clair + gzip (+ brotli si le module est installé)
+# - chaque snapshot a une version (empreinte du contenu) : fichiers
+#   prospects-<version>.json[.gz|.br], puis le pointeur "courant.json" est remplacé
+#   atomiquement (os.replace) -> un lecteur voit toujours l'ancienne OU la nouvelle version
+# - l'API garde la version courante en mémoire et ne relit que si le pointeur change
+#   (un os.stat par requête, comme le cache de configs/loader.py)
+# - écritures hors sync (crud.create_prospect, re-scoring) : rafraichir_snapshot()
+#   reconstruit le snapshot, ou le retire si impossible (GET /prospects/ relit alors
+#   la base) -> jamais de snapshot périmé servi avec un ETag valide
+# - chaque rafraîchissement / retrait incrémente generation_ecritures() : les caches
+#   dérivés de la table (filtre de Bloom de wdc_api/filtre_urls.py) voient l'écriture
+#   même quand le pointeur n'existait pas (SQLite, avant la première sync)
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:  # compression brotli optionnelle (pip install brotli)
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    brotli = None
+
+logger = logging.getLogger("wdc_api.snapshot")
+
+# Dossier des snapshots
+DOSSIER_SNAPSHOTS = Path(os.getenv("WDC_SNAPSHOT_DIR", "snapshots"))
+
+# Nombre d'anciennes versions gardées sur disque (retour arrière / lecteurs en cours)
+NB_VERSIONS_GARDEES = 3
+
+POINTEUR = "courant.json"
+
+# Même forme (et même ordre de champs) que schemas.ProspectOut
+SQL_SNAPSHOT = """
+    SELECT COALESCE(
+        json_agg(
+            json_build_object('name', name, 'title', title, 'sector', sector, 'url', url, 'id', id)
+            ORDER BY id
+        ),
+        '[]'::json
+    )::text
+    FROM public.prospects
+"""
+
+
+class Snapshot:
+    """Une version du snapshot chargée en mémoire (corps déjà encodés)."""
+
+    __slots__ = ("version", "cree_le", "corps")
+
+    def __init__(self, version: str, cree_le: str, corps: dict[str, bytes]):
+        self.version = version
+        self.cree_le = cree_le
+        # encodage HTTP ("identity", "gzip", "br") -> octets
+        self.corps = corps
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def choisir(self, accept_encoding: str) -> tuple[str, bytes]:
+        """Meilleur encodage accepté par le client : br, puis gzip, sinon en clair."""
+        acceptes = {e.split(";")[0].strip().lower() for e in (accept_encoding or "").split(",")}
+        for encodage in ("br", "gzip"):
+            if encodage in acceptes and encodage in self.corps:
+                return encodage, self.corps[encodage]
+        return "identity", self.corps["identity"]
+
+
+_EXTENSIONS = {"identity": ".json", "gzip": ".json.gz", "br": ".json.br"}
+
+_courant: Snapshot | None = None
+_signature: tuple[int, int] | None = None
+_verrou = threading.Lock()
+
+# Écritures hors sync signalées dans ce processus (rafraichir_snapshot / invalider_snapshot)
+_generation = 0
+
+
+def _ecrire_atomique(chemin: Path, contenu: bytes) -> None:
+    temp = chemin.with_name(chemin.name + ".part")
+    temp.write_bytes(contenu)
+    os.replace(temp, chemin)
+
+
+def publier_snapshot(corps_json: bytes, dossier: Path = DOSSIER_SNAPSHOTS) -> str:
+    """
+    Écrit une nouvelle version du snapshot (toutes compressions) puis bascule le pointeur.
+    Retour : la version publiée. Publier un contenu identique ne change rien.
+    """
+    dossier.mkdir(parents=True, exist_ok=True)
+    version = hashlib.sha1(corps_json).hexdigest()[:16]
+
+    corps = {"identity": corps_json, "gzip": gzip.compress(corps_json, compresslevel=6)}
+    if brotli is not None:
+        corps["br"] = brotli.compress(corps_json, quality=9)
+
+    for encodage, contenu in corps.items():
+        _ecrire_atomique(dossier / f"prospects-{version}{_EXTENSIONS[encodage]}", contenu)
+
+    pointeur = {
+        "version": version,
+        "cree_le": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "encodages": sorted(corps),
+    }
+    _ecrire_atomique(dossier / POINTEUR, json.dumps(pointeur).encode("utf-8"))
+    _nettoyer(dossier, version)
+    return version
+
+
+def _nettoyer(dossier: Path, courante: str) -> None:
+    """Supprime les versions au-delà des NB_VERSIONS_GARDEES plus récentes."""
+    versions: dict[str, float] = {}
+    for f in dossier.glob("prospects-*.json*"):
+        v = f.name[len("prospects-"):].split(".")[0]
+        versions[v] = max(versions.get(v, 0.0), f.stat().st_mtime)
+    anciennes = sorted((v for v in versions if v != courante), key=versions.get, reverse=True)
+    for v in anciennes[max(0, NB_VERSIONS_GARDEES - 1):]:
+        for f in dossier.glob(f"prospects-{v}.json*"):
+            f.unlink(missing_ok=True)
+
+
+def reconstruire_snapshot(conn, dossier: Path = DOSSIER_SNAPSHOTS) -> str:
+    """
+    Reconstruit le snapshot depuis PostgreSQL (connexion DB-API, ex: psycopg2).
+    Appelé par sync_prospects_postgres.py après chaque synchronisation.
+    """
+    with conn.cursor() as cur:
+        cur.execute(SQL_SNAPSHOT)
+        texte = cur.fetchone()[0]
+    conn.rollback()  # lecture seule : on ne laisse pas de transaction ouverte
+    return publier_snapshot(texte.encode("utf-8"), dossier)
+
+
+def generation_ecritures() -> int:
+    """Compteur des écritures hors sync (change à chaque rafraichir_snapshot / invalider_snapshot)."""
+    return _generation
+
+
+def _nouvelle_generation() -> None:
+    global _generation
+    with _verrou:
+        _generation += 1
+
+
+def invalider_snapshot(dossier: Path = DOSSIER_SNAPSHOTS) -> None:
+    """
+    Retire le pointeur : GET /prospects/ relit la base jusqu'au prochain snapshot publié.
+    Incrémente generation_ecritures(), que le pointeur ait existé ou non.
+    """
+    global _courant, _signature
+    with _verrou:
+        (dossier / POINTEUR).unlink(missing_ok=True)
+        _courant, _signature = None, None
+    _nouvelle_generation()
+
+
+def rafraichir_snapshot(connexion, dossier: Path = DOSSIER_SNAPSHOTS) -> str | None:
+    """
+    Après une écriture hors sync : reconstruit le snapshot (PostgreSQL), sinon le retire.
+    Dans les deux cas, generation_ecritures() change.
+    `connexion` : connexion SQLAlchemy (Connection, Session.connection()).
+    Retour : la version publiée, ou None si le snapshot a été retiré. Ne lève jamais.
+    """
+    if connexion.dialect.name == "postgresql":
+        try:
+            texte = connexion.exec_driver_sql(SQL_SNAPSHOT).scalar()
+            version = publier_snapshot(texte.encode("utf-8"), dossier)
+            _nouvelle_generation()
+            return version
+        except Exception:
+            logger.exception("Reconstruction du snapshot impossible : snapshot retiré")
+    invalider_snapshot(dossier)
+    return None
+
+
+def snapshot_courant(dossier: Path = DOSSIER_SNAPSHOTS) -> Snapshot | None:
+    """Version courante (en mémoire), rechargée seulement si le pointeur a changé. None si aucun snapshot."""
+    global _courant, _signature
+    try:
+        st = (dossier / POINTEUR).stat()
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    if _courant is not None and signature == _signature:
+        return _courant
+
+    with _verrou:
+        if _courant is not None and signature == _signature:
+            return _courant
+        pointeur = json.loads((dossier / POINTEUR).read_text(encoding="utf-8"))
+        version = pointeur["version"]
+        corps = {}
+        for encodage in pointeur.get("encodages", ["identity"]):
+            chemin = dossier / f"prospects-{version}{_EXTENSIONS[encodage]}"
+            if chemin.exists():
+                corps[encodage] = chemin.read_bytes()
+        if "identity" not in corps:
+            return _courant
+        _courant = Snapshot(version, pointeur.get("cree_le", ""), corps)
+        _signature = signature
+        return _courant
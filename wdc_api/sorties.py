@@ -0,0 +1,261 @@
+# wdc_api/sorties.py
+# ==================
+# Écriture des fichiers de sortie en UNE passe sur le DataFrame classé.
+#
+# Avant (tri_linkedin_plus.main) : chaque fichier (prospects, audit, business, tech,
+# SQLite) était écrit séparément, à partir de copies filtrées / concaténées du frame.
+#
+# Maintenant :
+# - chaque sortie (Sortie) est décrite par une Route : un masque de lignes + ses colonnes
+# - ecrire_sorties() parcourt le frame UNE fois, par lots de TAILLE_LOT lignes, et envoie
+#   à chaque sortie les lignes du lot qui lui reviennent (une ligne peut aller dans
+#   plusieurs sorties : audit + prospects + business...)
+# - chaque sortie a son thread d'écriture et une file bornée (NB_LOTS_EN_ATTENTE) :
+#   les écritures (et compressions) se font en parallèle, mémoire bornée
+#
+# Formats : CSV (brut, gzip, zstd si `zstandard` est installé), Parquet (si `pyarrow`
+# est installé), SQLite (table recréée à chaque exécution).
+
+from __future__ import annotations
+
+import gzip
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:  # compression zstd optionnelle (pip install zstandard)
+    import zstandard
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    zstandard = None
+
+try:  # Parquet optionnel (pip install pyarrow)
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    pyarrow = None
+
+# Lignes par lot envoyé aux sorties
+TAILLE_LOT = int(os.getenv("WDC_OUTPUT_BATCH", "50000"))
+
+# Lots en attente max par sortie (au-delà, le parcours attend l'écrivain)
+NB_LOTS_EN_ATTENTE = 4
+
+# Tampon d'écriture des fichiers
+TAILLE_TAMPON = 1024 * 1024
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+
+# -----------------------------
+# Sorties
+# -----------------------------
+
+class Sortie(ABC):
+    """Une destination : ouvrir() une fois, ecrire_lot() par lot (dans l'ordre), fermer() à la fin."""
+
+    chemin: Path
+
+    @abstractmethod
+    def ouvrir(self, colonnes: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def ecrire_lot(self, lot: pd.DataFrame) -> None:
+        ...
+
+    @abstractmethod
+    def fermer(self) -> None:
+        ...
+
+
+class SortieCSV(Sortie):
+    """CSV (utf-8-sig, comme le reste du pipeline), éventuellement compressé."""
+
+    def __init__(self, chemin: str | Path, compression: str | None = None, encoding: str = "utf-8-sig"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compression inconnue : {compression} (possibles : {COMPRESSIONS})")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("Compression zstd indisponible : pip install zstandard")
+        self.chemin = Path(chemin)
+        self.compression = compression
+        self.encoding = encoding
+        self._fichier = None
+        self._colonnes: list[str] = []
+        self._entete_ecrite = False
+
+    def ouvrir(self, colonnes: Sequence[str]) -> None:
+        self._colonnes = list(colonnes)
+        options = {"encoding": self.encoding, "newline": ""}
+        if self.compression == "gzip":
+            self._fichier = gzip.open(self.chemin, "wt", compresslevel=6, **options)
+        elif self.compression == "zstd":
+            self._fichier = zstandard.open(self.chemin, "wt", **options)
+        else:
+            self._fichier = open(self.chemin, "w", buffering=TAILLE_TAMPON, **options)
+
+    def ecrire_lot(self, lot: pd.DataFrame) -> None:
+        lot.to_csv(self._fichier, index=False, header=not self._entete_ecrite)
+        self._entete_ecrite = True
+
+    def fermer(self) -> None:
+        if not self._entete_ecrite:
+            pd.DataFrame(columns=self._colonnes).to_csv(self._fichier, index=False)
+        self._fichier.close()
+
+
+class SortieParquet(Sortie):
+    """Parquet (un row group par lot)."""
+
+    def __init__(self, chemin: str | Path):
+        if pyarrow is None:
+            raise ValueError("Sortie Parquet indisponible : pip install pyarrow")
+        self.chemin = Path(chemin)
+        self._writer = None
+        self._colonnes: list[str] = []
+
+    def ouvrir(self, colonnes: Sequence[str]) -> None:
+        self._colonnes = list(colonnes)
+
+    def ecrire_lot(self, lot: pd.DataFrame) -> None:
+        table = pyarrow.Table.from_pandas(lot, preserve_index=False)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.chemin, table.schema)
+        self._writer.write_table(table)
+
+    def fermer(self) -> None:
+        if self._writer is None:
+            pyarrow.parquet.write_table(
+                pyarrow.Table.from_pandas(pd.DataFrame(columns=self._colonnes), preserve_index=False), self.chemin
+            )
+        else:
+            self._writer.close()
+
+
+class SortieSQLite(Sortie):
+    """Table SQLite recréée à chaque exécution (schéma toujours à jour). `entiers` : colonnes castées en int."""
+
+    def __init__(self, chemin: str | Path, table: str, entiers: Sequence[str] = ()):
+        self.chemin = Path(chemin)
+        self.table = table
+        self.entiers = tuple(entiers)
+        self._con: sqlite3.Connection | None = None
+        self._colonnes: list[str] = []
+        self._cree = False
+
+    def ouvrir(self, colonnes: Sequence[str]) -> None:
+        self._colonnes = list(colonnes)
+        self._con = sqlite3.connect(self.chemin)
+        self._con.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+        self._con.commit()
+
+    def ecrire_lot(self, lot: pd.DataFrame) -> None:
+        conversions = {c: int for c in self.entiers if c in lot.columns}
+        if conversions:
+            lot = lot.astype(conversions)
+        lot.to_sql(self.table, self._con, if_exists="append" if self._cree else "replace", index=False)
+        self._cree = True
+
+    def fermer(self) -> None:
+        if not self._cree:
+            pd.DataFrame(columns=self._colonnes).to_sql(self.table, self._con, if_exists="replace", index=False)
+        self._con.commit()
+        self._con.close()
+
+
+# -----------------------------
+# Routage
+# -----------------------------
+
+@dataclass
+class Route:
+    """Lignes (masque booléen aligné sur le frame, None = toutes) et colonnes envoyées à une sortie."""
+
+    sortie: Sortie
+    colonnes: Sequence[str]
+    masque: np.ndarray | None = None
+
+
+class _Ecrivain(threading.Thread):
+    """Thread d'écriture d'une sortie, alimenté par une file bornée de lots."""
+
+    _FIN = object()
+
+    def __init__(self, route: Route):
+        super().__init__(daemon=True, name=f"sortie-{route.sortie.chemin.name}")
+        self.route = route
+        self.file: queue.Queue = queue.Queue(maxsize=NB_LOTS_EN_ATTENTE)
+        self.lignes = 0
+        self.erreur: BaseException | None = None
+
+    def run(self) -> None:
+        sortie = self.route.sortie
+        lot = None
+        try:
+            sortie.ouvrir(self.route.colonnes)
+            while (lot := self.file.get()) is not self._FIN:
+                sortie.ecrire_lot(lot)
+                self.lignes += len(lot)
+            sortie.fermer()
+        except BaseException as erreur:  # remontée dans ecrire_sorties()
+            self.erreur = erreur
+            # On vide la file : le parcours ne doit pas rester bloqué sur put()
+            while lot is not self._FIN:
+                lot = self.file.get()
+
+    def envoyer(self, lot: Any) -> None:
+        self.file.put(lot)
+
+    def terminer(self) -> None:
+        self.file.put(self._FIN)
+
+
+def ecrire_sorties(df: pd.DataFrame, routes: Sequence[Route], taille_lot: int = TAILLE_LOT) -> dict[str, int]:
+    """
+    Parcourt `df` une fois et écrit chaque lot dans toutes les sorties concernées, en parallèle.
+    Retour : {chemin de la sortie: lignes écrites}.
+    """
+    for route in routes:
+        if route.masque is not None and len(route.masque) != len(df):
+            raise ValueError(f"{route.sortie.chemin} : masque de {len(route.masque)} lignes pour {len(df)} lignes")
+
+    ecrivains = [_Ecrivain(r) for r in routes]
+    for e in ecrivains:
+        e.start()
+    try:
+        for debut in range(0, len(df), max(1, taille_lot)):
+            lot = df.iloc[debut:debut + taille_lot]
+            for e in ecrivains:
+                if e.erreur is not None:
+                    continue
+                masque = e.route.masque
+                if masque is None:
+                    e.envoyer(lot[list(e.route.colonnes)])
+                    continue
+                m = masque[debut:debut + taille_lot]
+                if m.any():
+                    e.envoyer(lot.loc[m, list(e.route.colonnes)])
+    finally:
+        for e in ecrivains:
+            e.terminer()
+        for e in ecrivains:
+            e.join()
+
+    for e in ecrivains:
+        if e.erreur is not None:
+            raise e.erreur
+    return {str(e.route.sortie.chemin): e.lignes for e in ecrivains}
+
+
+def sortie_csv(chemin: str | Path, compression: str | None = None) -> SortieCSV:
+    """SortieCSV avec l'extension de la compression ("x.csv" -> "x.csv.gz" / "x.csv.zst")."""
+    chemin = str(chemin)
+    extension = {"gzip": ".gz", "zstd": ".zst"}.get(compression or "", "")
+    return SortieCSV(chemin + extension if extension and not chemin.endswith(extension) else chemin, compression)